@@ -0,0 +1,275 @@
+"""
+Interfaces implemented by the storage engines.
+
+Engines report storage failures as sqlite3.Error subclasses (constraint
+violations as sqlite3.IntegrityError with SQLite's message), so the
+wrappers in validator/ handle every engine the same way. Each engine has a
+ReadWriteLock in self.lock that guards its own operations.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class RoutingTableBackend(ABC):
+    """
+    Miner addresses (unique per address), the worker_id -> hotkey registry
+    and TEEs waiting for registration, each with a last-seen timestamp.
+    """
+
+    @abstractmethod
+    def add_address(self, hotkey, uid, address, worker_id=None):
+        """Insert a miner address, IntegrityError if the address exists."""
+
+    @abstractmethod
+    def upsert_address(self, hotkey, uid, address, worker_id=None):
+        """
+        Add or refresh the entry of hotkey/uid/address in one step, keeping
+        the other addresses of the hotkey/uid. IntegrityError if another
+        hotkey/uid owns the address.
+
+        :return: "refreshed", "replaced" or "added"
+        """
+
+    @abstractmethod
+    def update_address(self, hotkey, uid, new_address, worker_id=None):
+        """Move the entry of hotkey/uid to a new address."""
+
+    @abstractmethod
+    def update_timestamp(self, hotkey, uid, address, worker_id=None):
+        """Refresh an identical entry, True if one was found."""
+
+    @abstractmethod
+    def delete_address(self, hotkey, uid):
+        """Remove the entry of hotkey/uid."""
+
+    @abstractmethod
+    def delete_addresses_by_hotkey(self, hotkey):
+        """Remove all entries of a hotkey."""
+
+    @abstractmethod
+    def remove_miner_address_by_address(self, address):
+        """Remove the entry with this address."""
+
+    @abstractmethod
+    def clean_old_entries(self, limit=None):
+        """Remove entries older than one hour, return the number removed."""
+
+    @abstractmethod
+    def clean_old_entries_conservative(self, limit=None):
+        """Remove entries older than six hours, return the number removed."""
+
+    @abstractmethod
+    def get_miner_addresses_by_hotkey(self, hotkey):
+        """List the (uid, address, worker_id) entries of a hotkey."""
+
+    @abstractmethod
+    def get_all_miner_addresses(self):
+        """List every (hotkey, address, worker_id) entry."""
+
+    @abstractmethod
+    def get_address_timestamp(self, address):
+        """Timestamp of an address, None if unknown."""
+
+    @abstractmethod
+    def register_worker(self, worker_id, hotkey):
+        """Register (or move) a worker_id to a hotkey."""
+
+    @abstractmethod
+    def unregister_worker(self, worker_id):
+        """Remove a worker_id from the registry."""
+
+    @abstractmethod
+    def unregister_workers_by_hotkey(self, hotkey):
+        """Remove all worker_ids of a hotkey from the registry."""
+
+    @abstractmethod
+    def get_worker_hotkey(self, worker_id):
+        """Hotkey owning a worker_id, None if not registered."""
+
+    @abstractmethod
+    def get_workers_by_hotkey(self, hotkey):
+        """List the worker_ids of a hotkey."""
+
+    @abstractmethod
+    def get_all_worker_registrations(self):
+        """List every (worker_id, hotkey) pair, randomized."""
+
+    @abstractmethod
+    def clean_old_worker_registrations(self, hours=24, limit=None):
+        """Remove registrations older than hours, return the number removed."""
+
+    @abstractmethod
+    def add_unregistered_tee(self, address, hotkey):
+        """Add (or replace) an unregistered TEE."""
+
+    @abstractmethod
+    def clean_old_unregistered_tees(self, limit=None):
+        """Remove unregistered TEEs older than one hour."""
+
+    @abstractmethod
+    def get_all_unregistered_tees(self):
+        """List every (address, hotkey) unregistered TEE."""
+
+    @abstractmethod
+    def get_all_unregistered_tee_addresses(self):
+        """List the addresses of the unregistered TEEs."""
+
+    @abstractmethod
+    def remove_unregistered_tee(self, address):
+        """Remove an unregistered TEE, True if it existed."""
+
+    @abstractmethod
+    def apply_batch(self, operations):
+        """
+        Apply (operation, args) mutations atomically, see
+        RoutingTableDatabase.apply_batch for the operations.
+
+        :return: Result of each operation, or the IntegrityError it raised
+        """
+
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim space and refresh statistics, if the engine has any."""
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path while it stays in use, see
+        db/snapshot.py.
+
+        :return: Snapshot details, None if the engine keeps no file
+        """
+
+
+class TelemetryBackend(ABC):
+    """Telemetry samples per hotkey plus their scoring (delta) state."""
+
+    @abstractmethod
+    def add_telemetry(self, telemetry_data):
+        """Append a sample and advance the hotkey's delta state."""
+
+    @abstractmethod
+    def clean_old_entries(self, hours, limit=None):
+        """Remove samples older than hours, return the number removed."""
+
+    @abstractmethod
+    def compact_old_entries(self, age_hours, interval_minutes):
+        """Roll up old samples scoring doesn't need, return the number removed."""
+
+    @abstractmethod
+    def get_rollups_by_hotkey(self, hotkey):
+        """List the rollups of a hotkey."""
+
+    @abstractmethod
+    def get_telemetry_by_hotkey(
+        self, hotkey, since=None, until=None, limit=None, order="asc"
+    ):
+        """
+        List the samples of a hotkey as rows in TELEMETRY_COLUMNS order,
+        from since (inclusive) to until (exclusive) unix timestamps, oldest
+        ("asc") or latest ("desc") first, at most limit of them.
+        """
+
+    @abstractmethod
+    def get_latest_telemetry(self, hotkey):
+        """The latest sample of a hotkey, None if it has none."""
+
+    @abstractmethod
+    def get_all_hotkeys_with_telemetry(self):
+        """List the hotkeys that have samples."""
+
+    @abstractmethod
+    def delete_telemetry_by_hotkey(self, hotkey):
+        """Remove all samples of a hotkey, return the number removed."""
+
+    @abstractmethod
+    def get_all_telemetry(self):
+        """List every sample row."""
+
+    @abstractmethod
+    def get_delta_states(self):
+        """List the maintained DeltaState of every hotkey."""
+
+    @abstractmethod
+    def get_delta_telemetry(self):
+        """Compute the DeltaState of every hotkey from the raw samples."""
+
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim space and refresh statistics, if the engine has any."""
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path while it stays in use, see
+        db/snapshot.py.
+
+        :return: Snapshot details, None if the engine keeps no file
+        """
+
+
+class ErrorsBackend(ABC):
+    """Aggregated, typed error log."""
+
+    @abstractmethod
+    def register_error_types(self, error_types):
+        """Store the (code, name, template) error types."""
+
+    @abstractmethod
+    def add_errors(self, entries, window_start):
+        """Merge aggregated error entries, see ErrorsDatabase.add_errors."""
+
+    @abstractmethod
+    def get_errors_by_hotkey(self, hotkey, limit=100):
+        """Latest errors of a hotkey."""
+
+    @abstractmethod
+    def get_all_errors(self, limit=100):
+        """Latest errors."""
+
+    @abstractmethod
+    def search_errors(
+        self,
+        query=None,
+        hotkey_prefix=None,
+        since=None,
+        until=None,
+        limit=100,
+        cursor=None,
+    ):
+        """
+        Latest errors matching a free-text query, hotkey prefix and time
+        range, see ErrorsDatabase.search_errors.
+
+        :return: (errors, cursor of the next page or None)
+        """
+
+    @abstractmethod
+    def clean_old_errors(self, hours=24, limit=None):
+        """Remove errors older than hours, return the number removed."""
+
+    @abstractmethod
+    def get_error_count(self, hours=24, hotkey=None):
+        """Number of error occurrences in the last hours, of all hotkeys or one."""
+
+    @abstractmethod
+    def save_error_counters(self, rows, oldest_minute):
+        """
+        Replace the (minute, hotkey, count) counter buckets in rows and drop
+        buckets before oldest_minute.
+        """
+
+    @abstractmethod
+    def load_error_counters(self, oldest_minute):
+        """List the (minute, hotkey, count) buckets from oldest_minute on."""
+
+    @abstractmethod
+    def get_error_counts_by_type(self, hotkey=None, hours=24):
+        """List (hotkey, error_type, name, count) for the last hours."""
+
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim space and refresh statistics, if the engine has any."""
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path while it stays in use, see
+        db/snapshot.py.
+
+        :return: Snapshot details, None if the engine keeps no file
+        """
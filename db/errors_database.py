@@ -1,127 +1,928 @@
+import re
 import sqlite3
-from threading import Lock
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from db.base import ErrorsBackend
+from db.identities import HOTKEY, WORKER_ID, IdentityCache, create_identities_table
+from db.migrations import Migration, migrate
+from db.rw_lock import ReadWriteLock
+from db.snapshot import snapshot_database
 
+PARTITION_PREFIX = "errors_"
+ERROR_COLUMNS = (
+    "timestamp, hotkey, tee_address, miner_address, error_type, worker_id, "
+    "related_hotkey, status_code, detail, count, first_seen"
+)
+# Columns that identify an error when merging repeated occurrences
+IDENTITY_COLUMNS = (
+    "hotkey",
+    "tee_address",
+    "error_type",
+    "worker_id",
+    "related_hotkey",
+    "status_code",
+    "detail",
+)
+# Columns storing identity ids (see db/identities.py), by identity kind
+IDENTITY_KINDS = {"hotkey": HOTKEY, "worker_id": WORKER_ID, "related_hotkey": HOTKEY}
+# Columns of the full-text index of each partition (errors_YYYYMMDD_fts);
+# message holds the error type's name and template, status code and detail
+SEARCH_COLUMNS = (
+    "hotkey",
+    "worker_id",
+    "related_hotkey",
+    "tee_address",
+    "miner_address",
+    "message",
+)
+
+
+def match_expression(query):
+    """
+    FTS5 query matching rows that contain every term of a free-text query,
+    with a trailing * on a term matching it as a prefix.
+
+    :return: The MATCH expression, None if the query has no terms
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if re.search(r"[^\W_]", term):
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+def parse_search_cursor(cursor):
+    """
+    Split a search_errors cursor into its (timestamp, day, id) key.
+
+    :raises ValueError: If the cursor is malformed
+    """
+    timestamp, day, row_id = cursor.rsplit("/", 2)
+    if not (len(day) == 8 and day.isdigit()):
+        raise ValueError(f"Invalid search cursor: {cursor}")
+    return timestamp, day, int(row_id)
+
+
+class ErrorsDatabase(ErrorsBackend):
+    """
+    Error log stored in one table per UTC day (errors_YYYYMMDD), keyed by
+    the day an error was first seen. Queries run over a UNION ALL of the
+    partitions they need, and retention drops whole partitions.
+
+    Errors are stored as a code from the error_types table plus structured
+    parameters and an optional short detail, not as rendered messages.
+    Hotkeys and worker ids are stored as identity ids, public methods take
+    and return the strings.
+    """
 
-class ErrorsDatabase:
     def __init__(self, db_path="./errors.db"):
         self.db_path = db_path
-        self.lock = Lock()
-        self._create_table()
+        self.lock = ReadWriteLock()
+        self.identities = IdentityCache()
+        self.partitions = []  # partition days ("YYYYMMDD"), oldest first
+        self._enable_wal()
+        self._create_error_types_table()
+        self._load_partitions()
+        self._migrate()
+        with self.lock.read(), self.connect() as conn:
+            self.identities.load(conn.cursor())
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
 
-    def _create_table(self):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+    def _enable_wal(self):
+        """
+        Switch the database to WAL journaling so readers don't block on the
+        writer (and vice versa). The journal mode is persisted in the file.
+        New files also use incremental auto-vacuum, see optimize.
+        """
+        with self.lock.write(), self.connect() as conn:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def optimize(self, vacuum_pages=1000):
+        """
+        Return up to vacuum_pages free pages to the filesystem (files created
+        with incremental auto-vacuum only) and refresh the query planner
+        statistics.
+        """
+        with self.lock.write(), self.connect() as conn:
+            # executescript steps the pragma to completion, execute frees one page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+            conn.execute("PRAGMA optimize")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path without blocking its writers, see
+        db/snapshot.py. Runs without self.lock.
+        """
+        return snapshot_database(
+            self.db_path, target_path, pages_per_step, step_pause_seconds
+        )
+
+    def _create_error_types_table(self):
+        """
+        Create the lookup tables. The search index reads identities, so it
+        exists before any migration builds one.
+        """
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                CREATE TABLE IF NOT EXISTS errors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    hotkey TEXT,
-                    tee_address TEXT,
-                    miner_address TEXT,
-                    message TEXT
+                CREATE TABLE IF NOT EXISTS error_types (
+                    code INTEGER PRIMARY KEY,
+                    name TEXT,
+                    template TEXT
                 )
             """
             )
+            create_identities_table(cursor)
             conn.commit()
 
-    def add_error(self, hotkey, tee_address, miner_address, message):
+    def register_error_types(self, error_types):
         """
-        Add a new error entry to the database.
+        Store the known error codes.
+
+        :param error_types: Iterable of (code, name, template) tuples
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO error_types (code, name, template) "
+                "VALUES (?, ?, ?)",
+                list(error_types),
+            )
+            conn.commit()
+
+    def _load_partitions(self):
+        with self.lock.read(), self.connect() as conn:
+            self._read_partitions(conn.cursor())
+
+    def _read_partitions(self, cursor):
+        cursor.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name GLOB ?
+            """,
+            # Exactly eight digits, not the partitions' search indexes
+            (PARTITION_PREFIX + "[0-9]" * 8,),
+        )
+        self.partitions = sorted(
+            row[0][len(PARTITION_PREFIX) :] for row in cursor.fetchall()
+        )
+
+    @contextmanager
+    def _partition_transaction(self):
+        """
+        Write connection for transactions that create or drop partitions.
+        self.partitions is updated as they go; after a rollback it is
+        reloaded from the file, so it never lists a partition the rollback
+        undid or misses one it restored.
+        """
+        with self.lock.write(), self.connect() as conn:
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                self._read_partitions(conn.cursor())
+                raise
+
+    def _migrate(self):
+        """
+        Bring the schema up to date, see db/migrations.py. Both migrations
+        check the schema first, as files from before versioning may already
+        have been converted by their unversioned predecessors.
+        """
+        with self._partition_transaction() as conn:
+            migrate(
+                conn,
+                [
+                    Migration(1, "day partitions", self._migrate_legacy_table),
+                    Migration(2, "typed errors", self._migrate_message_partitions),
+                    Migration(3, "search index", self._build_search_indexes),
+                    Migration(4, "error counters", self._create_error_counters),
+                    Migration(5, "identity keys", self._use_identity_keys),
+                ],
+            )
+
+    def _migrate_legacy_table(self, cursor):
+        """
+        Move rows of the former single errors table into day partitions.
+        """
+        cursor.execute("PRAGMA table_info(errors)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if not columns:
+            return
+
+        count = "count" if "count" in columns else "1"
+        first_seen = "first_seen" if "first_seen" in columns else "timestamp"
+        cursor.execute(
+            f"SELECT DISTINCT date(COALESCE({first_seen}, timestamp)) FROM errors"
+        )
+        for (day,) in cursor.fetchall():
+            table = self._ensure_partition(cursor, (day or "").replace("-", ""))
+            # Free-text messages are kept as the detail of an OTHER (0) error
             cursor.execute(
-                """
-                INSERT INTO errors (hotkey, tee_address, miner_address, message) 
-                VALUES (?, ?, ?, ?)
+                f"""
+                INSERT INTO {table} ({ERROR_COLUMNS})
+                SELECT timestamp, hotkey, tee_address, miner_address, 0, NULL,
+                       NULL, NULL, message, {count},
+                       COALESCE({first_seen}, timestamp)
+                FROM errors
+                WHERE date(COALESCE({first_seen}, timestamp)) IS ?
                 """,
-                (hotkey, tee_address, miner_address, message),
+                (day,),
+            )
+        cursor.execute("DROP TABLE errors")
+
+    def _migrate_message_partitions(self, cursor):
+        """
+        Add the structured columns to partitions that still store rendered
+        messages, keeping each message as the detail of an OTHER (0) error.
+        """
+        for day in self.partitions:
+            table = f"{PARTITION_PREFIX}{day}"
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [col[1] for col in cursor.fetchall()]
+            if "error_type" in columns:
+                continue
+            for column, column_type in (
+                ("error_type", "INTEGER"),
+                ("worker_id", "TEXT"),
+                ("related_hotkey", "TEXT"),
+                ("status_code", "INTEGER"),
+                ("detail", "TEXT"),
+            ):
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            cursor.execute(
+                f"UPDATE {table} SET error_type = 0, detail = message, message = NULL"
+            )
+            self._create_partition_indexes(cursor, table)
+
+    def _create_error_counters(self, cursor):
+        """
+        Per-minute error count checkpoints (see ErrorsStorage), seeded with
+        the rows of the last day counted at the minute they were last seen.
+        """
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS error_counters (
+                minute INTEGER,
+                hotkey TEXT,
+                count INTEGER,
+                PRIMARY KEY (minute, hotkey)
+            )
+        """
+        )
+        since = datetime.now(timezone.utc) - timedelta(days=1)
+        union = self._union(
+            since_day=(since - timedelta(days=1)).strftime("%Y%m%d")
+        )
+        if union is None:
+            return
+        cursor.execute(
+            f"""
+            INSERT OR REPLACE INTO error_counters (minute, hotkey, count)
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER) / 60,
+                   COALESCE(hotkey, ''), SUM(count)
+            FROM ({union})
+            WHERE timestamp > ?
+            GROUP BY 1, 2
+            """,
+            (since.strftime("%Y-%m-%d %H:%M:%S"),),
+        )
+
+    def _use_identity_keys(self, cursor):
+        """
+        Store hotkeys and worker ids as integer ids from the identities
+        table instead of repeating the strings in every row and in the
+        hotkey indexes. Each partition is rebuilt with integer columns and
+        reindexed for search.
+        """
+        identity = "(SELECT id FROM identities WHERE kind = {0} AND value = {1})"
+        for day in self.partitions:
+            table = f"{PARTITION_PREFIX}{day}"
+            values = " UNION ".join(
+                f"SELECT {kind}, {column} FROM {table} WHERE {column} IS NOT NULL"
+                for column, kind in IDENTITY_KINDS.items()
+            )
+            cursor.execute(f"INSERT OR IGNORE INTO identities (kind, value) {values}")
+            keyed = ", ".join(
+                identity.format(IDENTITY_KINDS[column], column)
+                if column in IDENTITY_KINDS
+                else column
+                for column in ERROR_COLUMNS.split(", ")
+            )
+            self._create_partition_table(cursor, f"{table}_keyed")
+            cursor.execute(
+                f"""
+                INSERT INTO {table}_keyed (id, {ERROR_COLUMNS})
+                SELECT id, {keyed} FROM {table}
+                """
+            )
+            cursor.execute(f"DROP TABLE {table}")
+            cursor.execute(f"ALTER TABLE {table}_keyed RENAME TO {table}")
+        self._build_search_indexes(cursor)
+
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO identities (kind, value)
+            SELECT DISTINCT {HOTKEY}, hotkey FROM error_counters
+            WHERE hotkey IS NOT NULL
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE error_counters_keyed (
+                minute INTEGER,
+                hotkey INTEGER,
+                count INTEGER,
+                PRIMARY KEY (minute, hotkey)
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO error_counters_keyed (minute, hotkey, count)
+            SELECT minute, {identity.format(HOTKEY, "hotkey")}, count
+            FROM error_counters
+            """
+        )
+        cursor.execute("DROP TABLE error_counters")
+        cursor.execute("ALTER TABLE error_counters_keyed RENAME TO error_counters")
+
+    def save_error_counters(self, rows, oldest_minute):
+        """
+        Checkpoint error counter buckets.
+
+        :param rows: (minute, hotkey, count) rows, replacing stored counts
+        :param oldest_minute: Buckets before this minute are deleted
+        """
+        with self.lock.write(), self.connect() as conn:
+            rows = [
+                (minute, self.identities.get_or_create_id(conn, HOTKEY, hotkey), count)
+                for minute, hotkey, count in rows
+            ]
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO error_counters (minute, hotkey, count) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            cursor.execute(
+                "DELETE FROM error_counters WHERE minute < ?", (oldest_minute,)
             )
             conn.commit()
 
+    def load_error_counters(self, oldest_minute):
+        """List the (minute, hotkey, count) buckets from oldest_minute on."""
+        with self.lock.read(), self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT minute, hotkey, count FROM error_counters WHERE minute >= ?",
+                (oldest_minute,),
+            )
+            return [
+                (minute, self.identities.get_value(cursor, hotkey), count)
+                for minute, hotkey, count in cursor.fetchall()
+            ]
+
+    def _build_search_indexes(self, cursor):
+        """Index the rows of the existing partitions for search_errors."""
+        for day in self.partitions:
+            table = f"{PARTITION_PREFIX}{day}"
+            self._create_partition_indexes(cursor, table)
+            self._create_search_index(cursor, table)
+            cursor.execute(f"DELETE FROM {table}_fts")
+            cursor.execute(
+                f"""
+                INSERT INTO {table}_fts (rowid, {", ".join(SEARCH_COLUMNS)})
+                SELECT {self._search_values(table)} FROM {table}
+                """
+            )
+
+    def _create_partition_indexes(self, cursor, table):
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_aggregate")
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_type
+            ON {table} (hotkey, error_type, first_seen)
+            """
+        )
+        # Latest-first reads and search pagination walk this index
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_timestamp
+            ON {table} (timestamp, id)
+            """
+        )
+
+    @staticmethod
+    def _search_values(row):
+        """
+        SQL expressions of a row's SEARCH_COLUMNS, preceded by its id. The
+        index holds the strings of identity columns.
+        """
+        value = "(SELECT value FROM identities WHERE id = {0}.{1})"
+        return (
+            f"{row}.id, {value.format(row, 'hotkey')}, "
+            f"{value.format(row, 'worker_id')}, "
+            f"{value.format(row, 'related_hotkey')}, "
+            f"{row}.tee_address, {row}.miner_address, "
+            f"COALESCE((SELECT name || ' ' || template FROM error_types "
+            f"WHERE code = {row}.error_type), '') || ' ' || "
+            f"COALESCE({row}.status_code, '') || ' ' || COALESCE({row}.detail, '')"
+        )
+
+    def _create_search_index(self, cursor, table):
+        """
+        Create the full-text index of a partition, kept in sync with it by
+        triggers. Dropping the partition drops the triggers, not the index.
+        """
+        cursor.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts
+            USING fts5({", ".join(SEARCH_COLUMNS)})
+            """
+        )
+        columns = ", ".join(SEARCH_COLUMNS)
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {table}_fts (rowid, {columns})
+                VALUES ({self._search_values("new")});
+            END
+            """
+        )
+        # add_errors sets miner_address on every merge, only reindex changes
+        indexed = (
+            "hotkey",
+            "tee_address",
+            "miner_address",
+            "error_type",
+            "worker_id",
+            "related_hotkey",
+            "status_code",
+            "detail",
+        )
+        changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in indexed)
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update
+            AFTER UPDATE OF {", ".join(indexed)} ON {table}
+            WHEN {changed}
+            BEGIN
+                DELETE FROM {table}_fts WHERE rowid = old.id;
+                INSERT INTO {table}_fts (rowid, {columns})
+                VALUES ({self._search_values("new")});
+            END
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM {table}_fts WHERE rowid = old.id;
+            END
+            """
+        )
+
+    def _ensure_partition(self, cursor, day):
+        """
+        Create the partition for a day ("YYYYMMDD") if needed.
+
+        :return: The partition table name
+        """
+        if not (len(day) == 8 and day.isdigit()):
+            # Rows without a usable timestamp go to today's partition
+            day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        table = f"{PARTITION_PREFIX}{day}"
+        if day not in self.partitions:
+            self._create_partition_table(cursor, table)
+            self._create_partition_indexes(cursor, table)
+            self._create_search_index(cursor, table)
+            self.partitions = sorted(set(self.partitions) | {day})
+        return table
+
+    @staticmethod
+    def _create_partition_table(cursor, table):
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                hotkey INTEGER,
+                tee_address TEXT,
+                miner_address TEXT,
+                error_type INTEGER,
+                worker_id INTEGER,
+                related_hotkey INTEGER,
+                status_code INTEGER,
+                detail TEXT,
+                count INTEGER DEFAULT 1,
+                first_seen DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
+    def _encode(self, conn, entry):
+        """An error entry with identity ids instead of hotkeys and worker ids."""
+        return dict(
+            entry,
+            **{
+                column: self.identities.get_or_create_id(conn, kind, entry[column])
+                for column, kind in IDENTITY_KINDS.items()
+            },
+        )
+
+    def _decode(self, cursor, errors):
+        """Replace the identity ids of error dicts by their strings."""
+        for error in errors:
+            for column in IDENTITY_KINDS:
+                if column in error:
+                    error[column] = self.identities.get_value(cursor, error[column])
+        return errors
+
+    def _union(self, since_day=None):
+        """
+        UNION ALL over the partitions from since_day ("YYYYMMDD") on, for use
+        as a subquery. None when there are no matching partitions.
+        """
+        days = [day for day in self.partitions if since_day is None or day >= since_day]
+        if not days:
+            return None
+        return " UNION ALL ".join(
+            f"SELECT {ERROR_COLUMNS} FROM {PARTITION_PREFIX}{day}" for day in days
+        )
+
+    def add_errors(self, entries, window_start):
+        """
+        Merge aggregated errors into the table in a single transaction.
+
+        :param entries: Iterable of dicts with miner_address, count,
+                        first_seen, last_seen and the IDENTITY_COLUMNS
+        :param window_start: Callable mapping a first_seen timestamp to the
+                             start of its aggregation window; an entry is
+                             merged into a row of the same error first seen
+                             in that window, otherwise inserted
+        """
+        with self._partition_transaction() as conn:
+            # Identities are committed as they are created, before any write
+            entries = [self._encode(conn, entry) for entry in entries]
+            cursor = conn.cursor()
+            identity = " AND ".join(f"{column} IS ?" for column in IDENTITY_COLUMNS)
+            for entry in entries:
+                start = window_start(entry["first_seen"])
+                table = self._ensure_partition(cursor, start[:10].replace("-", ""))
+                cursor.execute(
+                    f"""
+                    UPDATE {table}
+                    SET count = count + ?,
+                        timestamp = MAX(timestamp, ?),
+                        miner_address = ?
+                    WHERE id = (
+                        SELECT id FROM {table}
+                        WHERE {identity} AND first_seen >= ?
+                        ORDER BY first_seen DESC
+                        LIMIT 1
+                    )
+                    """,
+                    (
+                        entry["count"],
+                        entry["last_seen"],
+                        entry["miner_address"],
+                        *(entry[column] for column in IDENTITY_COLUMNS),
+                        start,
+                    ),
+                )
+                if cursor.rowcount:
+                    continue
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} ({ERROR_COLUMNS})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        entry["last_seen"],
+                        entry["hotkey"],
+                        entry["tee_address"],
+                        entry["miner_address"],
+                        entry["error_type"],
+                        entry["worker_id"],
+                        entry["related_hotkey"],
+                        entry["status_code"],
+                        entry["detail"],
+                        entry["count"],
+                        entry["first_seen"],
+                    ),
+                )
+            conn.commit()
+
     def get_errors_by_hotkey(self, hotkey, limit=100):
         """
         Retrieve errors for a specific hotkey.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
+            union = self._union()
+            if union is None:
+                return []
             cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT timestamp, tee_address, miner_address, message 
-                FROM errors 
-                WHERE hotkey = ? 
+                f"""
+                SELECT timestamp, tee_address, miner_address, error_type,
+                worker_id, related_hotkey, status_code, detail, count, first_seen
+                FROM ({union})
+                WHERE hotkey = ?
                 ORDER BY timestamp DESC
                 LIMIT ?
                 """,
-                (hotkey, limit),
+                (self.identities.get_id(cursor, HOTKEY, hotkey), limit),
             )
             results = cursor.fetchall()
-            return [
+            errors = [
                 {
                     "timestamp": row[0],
                     "tee_address": row[1],
                     "miner_address": row[2],
-                    "message": row[3],
+                    "error_type": row[3],
+                    "worker_id": row[4],
+                    "related_hotkey": row[5],
+                    "status_code": row[6],
+                    "detail": row[7],
+                    "count": row[8],
+                    "first_seen": row[9],
+                    "last_seen": row[0],
                 }
                 for row in results
             ]
+            return self._decode(cursor, errors)
 
     def get_all_errors(self, limit=100):
         """
         Retrieve all errors, ordered by timestamp descending.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
+            union = self._union()
+            if union is None:
+                return []
             cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT timestamp, hotkey, tee_address, miner_address, message 
-                FROM errors 
+                f"""
+                SELECT timestamp, hotkey, tee_address, miner_address, error_type,
+                worker_id, related_hotkey, status_code, detail, count, first_seen
+                FROM ({union})
                 ORDER BY timestamp DESC
                 LIMIT ?
                 """,
                 (limit,),
             )
             results = cursor.fetchall()
-            return [
+            errors = [
                 {
                     "timestamp": row[0],
                     "hotkey": row[1],
                     "tee_address": row[2],
                     "miner_address": row[3],
-                    "message": row[4],
+                    "error_type": row[4],
+                    "worker_id": row[5],
+                    "related_hotkey": row[6],
+                    "status_code": row[7],
+                    "detail": row[8],
+                    "count": row[9],
+                    "first_seen": row[10],
+                    "last_seen": row[0],
                 }
                 for row in results
             ]
+            return self._decode(cursor, errors)
+
+    def search_errors(
+        self,
+        query=None,
+        hotkey_prefix=None,
+        since=None,
+        until=None,
+        limit=100,
+        cursor=None,
+    ):
+        """
+        Search errors, latest first, using each partition's full-text index
+        for query and the hotkey index for hotkey_prefix.
+
+        :param query: Free text, every term must match (see match_expression)
+        :param hotkey_prefix: Only errors of hotkeys starting with this
+        :param since: Only errors last seen at or after this timestamp
+        :param until: Only errors last seen before this timestamp
+        :param limit: Page size
+        :param cursor: next_cursor of the previous page
+        :return: (errors in get_all_errors layout, next_cursor or None)
+        """
+        match = match_expression(query) if query else None
+        if query and match is None:
+            return [], None
+        after = parse_search_cursor(cursor) if cursor else None
+        # Rows last seen since then were first seen at most one aggregation
+        # window earlier, as in get_error_count
+        since_day = None
+        if since:
+            since_time = datetime.strptime(since[:10], "%Y-%m-%d")
+            since_day = (since_time - timedelta(days=1)).strftime("%Y%m%d")
+        until_day = until[:10].replace("-", "") if until else None
+
+        with self.lock.read(), self.connect() as conn:
+            db_cursor = conn.cursor()
+            days = [
+                day
+                for day in self.partitions
+                if (since_day is None or day >= since_day)
+                and (until_day is None or day <= until_day)
+            ]
+            rows = self._search(
+                db_cursor, days, match, hotkey_prefix, since, until, after, limit
+            )
+            errors = self._decode(
+                db_cursor,
+                [
+                    {
+                        "timestamp": row[2],
+                        "hotkey": row[3],
+                        "tee_address": row[4],
+                        "miner_address": row[5],
+                        "error_type": row[6],
+                        "worker_id": row[7],
+                        "related_hotkey": row[8],
+                        "status_code": row[9],
+                        "detail": row[10],
+                        "count": row[11],
+                        "first_seen": row[12],
+                        "last_seen": row[2],
+                    }
+                    for row in rows[:limit]
+                ],
+            )
 
-    def clean_old_errors(self, hours=24):
+        next_cursor = None
+        if len(rows) > limit:
+            day, row_id, timestamp = rows[limit - 1][:3]
+            next_cursor = f"{timestamp}/{day}/{row_id}"
+        return errors, next_cursor
+
+    def _search(self, cursor, days, match, hotkey_prefix, since, until, after, limit):
+        """
+        Run a search over the partitions of the given days.
+
+        :return: Up to limit + 1 (day, id, ERROR_COLUMNS...) rows, latest first
+        """
+        arms, params = [], []
+        for day in days:
+            table = f"{PARTITION_PREFIX}{day}"
+            conditions = []
+            if match:
+                conditions.append(
+                    f"id IN (SELECT rowid FROM {table}_fts "
+                    f"WHERE {table}_fts MATCH ?)"
+                )
+                params.append(match)
+            if hotkey_prefix:
+                conditions.append(
+                    f"hotkey IN (SELECT id FROM identities "
+                    f"WHERE kind = {HOTKEY} AND value GLOB ?)"
+                )
+                params.append(re.sub(r"([*?\[])", r"[\1]", hotkey_prefix) + "*")
+            if since:
+                conditions.append("timestamp >= ?")
+                params.append(since)
+            if until:
+                conditions.append("timestamp < ?")
+                params.append(until)
+            if after:
+                conditions.append(f"(timestamp, '{day}', id) < (?, ?, ?)")
+                params.extend(after)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            arms.append(
+                f"SELECT '{day}' AS day, id, {ERROR_COLUMNS} FROM {table} {where}"
+            )
+        if not arms:
+            return []
+        cursor.execute(
+            f"""
+            {" UNION ALL ".join(arms)}
+            ORDER BY timestamp DESC, day DESC, id DESC
+            LIMIT ?
+            """,
+            (*params, limit + 1),
+        )
+        return cursor.fetchall()
+
+    def clean_old_errors(self, hours=24, limit=None):
         """
         Remove error entries older than the specified number of hours.
+
+        Partitions of days entirely before the cutoff are dropped; only the
+        partition of the cutoff day itself needs a row-level delete.
+
+        :param limit: Maximum number of rows deleted from the cutoff day
+                      partition, None for all
+        :return: Number of rows removed
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        cutoff_day = cutoff.strftime("%Y%m%d")
+        with self._partition_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                DELETE FROM errors 
-                WHERE timestamp < datetime('now', ?)
-                """,
-                (f"-{hours} hours",),
-            )
+            removed = 0
+            for day in [day for day in self.partitions if day < cutoff_day]:
+                table = f"{PARTITION_PREFIX}{day}"
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                removed += cursor.fetchone()[0]
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+                self.partitions.remove(day)
+            if cutoff_day in self.partitions:
+                table = f"{PARTITION_PREFIX}{cutoff_day}"
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table}
+                        WHERE timestamp < ?
+                        LIMIT ?
+                    )
+                    """,
+                    (
+                        cutoff.strftime("%Y-%m-%d %H:%M:%S"),
+                        -1 if limit is None else limit,
+                    ),
+                )
+                removed += cursor.rowcount
             conn.commit()
-            return cursor.rowcount
+            return removed
 
-    def get_error_count(self, hours=24):
+    def get_error_count(self, hours=24, hotkey=None):
         """
-        Get the count of errors in the last specified number of hours.
+        Get the count of errors in the last specified number of hours,
+        counting every occurrence aggregated into a row last seen in that
+        period, optionally for a single hotkey.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        with self.lock.read(), self.connect() as conn:
+            # Rows last seen after the cutoff were first seen at most one
+            # aggregation window before it, so one extra day covers them
+            union = self._union(
+                since_day=(cutoff - timedelta(days=1)).strftime("%Y%m%d")
+            )
+            if union is None:
+                return 0
+            where = "WHERE timestamp > ?"
+            params = [cutoff.strftime("%Y-%m-%d %H:%M:%S")]
             cursor = conn.cursor()
+            if hotkey is not None:
+                where += " AND hotkey = ?"
+                params.append(self.identities.get_id(cursor, HOTKEY, hotkey))
             cursor.execute(
-                """
-                SELECT COUNT(*) FROM errors 
-                WHERE timestamp > datetime('now', ?)
+                f"""
+                SELECT COALESCE(SUM(count), 0) FROM ({union})
+                {where}
                 """,
-                (f"-{hours} hours",),
+                params,
             )
             result = cursor.fetchone()
             return result[0] if result else 0
+
+    def get_error_counts_by_type(self, hotkey=None, hours=24):
+        """
+        Count errors per hotkey and error type in the last specified number
+        of hours, optionally for a single hotkey.
+
+        :return: List of (hotkey, error_type, name, count) tuples
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        with self.lock.read(), self.connect() as conn:
+            union = self._union(
+                since_day=(cutoff - timedelta(days=1)).strftime("%Y%m%d")
+            )
+            if union is None:
+                return []
+            where, params = "WHERE e.timestamp > ?", [
+                cutoff.strftime("%Y-%m-%d %H:%M:%S")
+            ]
+            cursor = conn.cursor()
+            if hotkey is not None:
+                where += " AND e.hotkey = ?"
+                params.append(self.identities.get_id(cursor, HOTKEY, hotkey))
+            cursor.execute(
+                f"""
+                SELECT e.hotkey, e.error_type, t.name, SUM(e.count)
+                FROM ({union}) e
+                LEFT JOIN error_types t ON t.code = e.error_type
+                {where}
+                GROUP BY e.hotkey, e.error_type
+                ORDER BY e.hotkey, SUM(e.count) DESC
+                """,
+                params,
+            )
+            return [
+                (self.identities.get_value(cursor, row_hotkey), code, name, count)
+                for row_hotkey, code, name, count in cursor.fetchall()
+            ]
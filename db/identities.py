@@ -0,0 +1,106 @@
+"""
+Integer surrogate keys for hotkeys and worker ids.
+
+Fact tables store the id of a hotkey or worker id instead of repeating the
+48-character SS58 string in every row and index entry. The mapping lives
+in the identities table of the same database file and is cached in both
+directions, so encoding and decoding on the hot path don't query it. Ids
+are never deleted or reused, cached entries stay valid.
+"""
+
+import threading
+
+# Kinds of identity, an id is unique across kinds
+HOTKEY = 0
+WORKER_ID = 1
+
+
+def create_identities_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS identities (
+            id INTEGER PRIMARY KEY,
+            kind INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (kind, value)
+        )
+    """
+    )
+
+
+class IdentityCache:
+    """Bidirectional (kind, value) <-> id cache of an identities table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._values = {}
+
+    def _remember(self, identity_id, kind, value):
+        with self._lock:
+            self._ids[(kind, value)] = identity_id
+            self._values[identity_id] = value
+
+    def load(self, cursor):
+        """Fill the cache with every identity of the database."""
+        cursor.execute("SELECT id, kind, value FROM identities")
+        for identity_id, kind, value in cursor.fetchall():
+            self._remember(identity_id, kind, value)
+
+    def get_id(self, cursor, kind, value):
+        """
+        Id of an existing identity.
+
+        :return: The id, None if value is None or unknown
+        """
+        if value is None:
+            return None
+        value = str(value)
+        identity_id = self._ids.get((kind, value))
+        if identity_id is None:
+            cursor.execute(
+                "SELECT id FROM identities WHERE kind = ? AND value = ?",
+                (kind, value),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            identity_id = row[0]
+            self._remember(identity_id, kind, value)
+        return identity_id
+
+    def get_or_create_id(self, conn, kind, value):
+        """
+        Id of an identity, creating it if needed. A new identity is
+        committed right away so a rollback of the caller's writes can't
+        leave a cached id behind, call this before writing.
+
+        :return: The id, None if value is None
+        """
+        cursor = conn.cursor()
+        identity_id = self.get_id(cursor, kind, value)
+        if identity_id is None and value is not None:
+            cursor.execute(
+                "INSERT OR IGNORE INTO identities (kind, value) VALUES (?, ?)",
+                (kind, str(value)),
+            )
+            conn.commit()
+            identity_id = self.get_id(cursor, kind, value)
+        return identity_id
+
+    def get_value(self, cursor, identity_id):
+        """
+        Value of an identity id.
+
+        :return: The hotkey or worker id, None if identity_id is None
+        """
+        if identity_id is None:
+            return None
+        value = self._values.get(identity_id)
+        if value is None:
+            cursor.execute(
+                "SELECT kind, value FROM identities WHERE id = ?", (identity_id,)
+            )
+            kind, value = cursor.fetchone()
+            self._remember(identity_id, kind, value)
+        return value
@@ -0,0 +1,632 @@
+"""
+In-memory storage engines with the semantics of the SQLite ones, for
+ephemeral validators, tests and benchmarks. Nothing is persisted.
+"""
+
+import bisect
+import itertools
+import random
+import re
+import sqlite3
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from db.base import ErrorsBackend, RoutingTableBackend, TelemetryBackend
+from db.errors_database import IDENTITY_COLUMNS, SEARCH_COLUMNS, parse_search_cursor
+from db.rw_lock import ReadWriteLock
+from db.telemetry_database import (
+    CURRENT_TIME_INDEX,
+    TELEMETRY_COLUMNS,
+    TIMESTAMP_INDEX,
+    continues_run,
+    is_descending,
+    run_samples,
+    sample_row,
+    select_samples,
+    trim_run,
+)
+from db.telemetry_delta import advance
+
+# Timestamps are kept like the SQLite engines keep them: CURRENT_TIMESTAMP
+# text (UTC), except telemetry timestamps which are integer unix seconds
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _now(offset=timedelta(0)):
+    return (datetime.now(timezone.utc) + offset).strftime(TIMESTAMP_FORMAT)
+
+
+def _text(value):
+    """Store a value the way a TEXT column does."""
+    return None if value is None else str(value)
+
+
+def _build_run_states(runs):
+    """build_states over telemetry runs, counting every sample of a run."""
+    states = {}
+    for run in runs:
+        samples = run_samples(run)
+        state = states.get(samples[0][0])
+        for sample in samples:
+            state = advance(state, sample)
+        # The samples between the first and the last one of a run
+        states[state.hotkey] = replace(
+            state, sample_count=state.sample_count + run[-1] - len(samples)
+        )
+    return states
+
+
+def _tokens(value):
+    """Lowercased words of a value, like FTS5's unicode61 tokenizer."""
+    return re.findall(r"[^\W_]+", str(value).lower()) if value is not None else []
+
+
+def _matches_term(term, columns):
+    """
+    Whether a term of ErrorsDatabase.match_expression (the words of a
+    phrase, the last one a prefix if the term ends with *) is in a column.
+    """
+    prefix = term.endswith("*")
+    words = _tokens(term)
+    for tokens in columns:
+        for start in range(len(tokens) - len(words) + 1):
+            window = tokens[start : start + len(words)]
+            if window[:-1] != words[:-1]:
+                continue
+            if window[-1] == words[-1] or (prefix and window[-1].startswith(words[-1])):
+                return True
+    return False
+
+
+def _expire(table, cutoff, limit):
+    """
+    Delete up to limit entries of a dict of lists whose last item (the
+    timestamp) is before cutoff.
+
+    :return: Number of entries deleted
+    """
+    expired = [key for key, entry in table.items() if entry[-1] < cutoff]
+    if limit is not None:
+        expired = expired[:limit]
+    for key in expired:
+        del table[key]
+    return len(expired)
+
+
+class MemoryRoutingTableDatabase(RoutingTableBackend):
+    def __init__(self):
+        self.lock = ReadWriteLock()
+        # address -> [hotkey, uid, address, worker_id, timestamp]
+        self.miner_addresses = {}
+        # worker_id -> [hotkey, timestamp]
+        self.worker_registry = {}
+        # address -> [hotkey, timestamp]
+        self.unregistered_tees = {}
+
+    def _insert_address(self, hotkey, uid, address, worker_id):
+        if address in self.miner_addresses:
+            raise sqlite3.IntegrityError(
+                "UNIQUE constraint failed: miner_addresses.address"
+            )
+        self.miner_addresses[address] = [
+            hotkey,
+            _text(uid),
+            address,
+            _text(worker_id),
+            _now(),
+        ]
+
+    def _delete_where(self, **fields):
+        index = {"hotkey": 0, "uid": 1, "address": 2}
+        matches = [
+            address
+            for address, entry in self.miner_addresses.items()
+            if all(entry[index[name]] == value for name, value in fields.items())
+        ]
+        for address in matches:
+            del self.miner_addresses[address]
+        return len(matches)
+
+    def add_address(self, hotkey, uid, address, worker_id=None):
+        with self.lock.write():
+            self._insert_address(hotkey, uid, address, worker_id)
+
+    def update_address(self, hotkey, uid, new_address, worker_id=None):
+        with self.lock.write():
+            for address, entry in list(self.miner_addresses.items()):
+                if entry[0] != hotkey or entry[1] != _text(uid):
+                    continue
+                if new_address != address and new_address in self.miner_addresses:
+                    raise sqlite3.IntegrityError(
+                        "UNIQUE constraint failed: miner_addresses.address"
+                    )
+                del self.miner_addresses[address]
+                entry[2] = new_address
+                if worker_id is not None:
+                    entry[3] = _text(worker_id)
+                self.miner_addresses[new_address] = entry
+
+    def update_timestamp(self, hotkey, uid, address, worker_id=None):
+        with self.lock.write():
+            entry = self.miner_addresses.get(address)
+            # worker_id = NULL never matches in SQL
+            if (
+                entry is None
+                or worker_id is None
+                or entry[:2] != [hotkey, _text(uid)]
+                or entry[3] != _text(worker_id)
+            ):
+                return False
+            entry[4] = _now()
+            return True
+
+    def delete_address(self, hotkey, uid):
+        with self.lock.write():
+            self._delete_where(hotkey=hotkey, uid=_text(uid))
+
+    def delete_addresses_by_hotkey(self, hotkey):
+        with self.lock.write():
+            self._delete_where(hotkey=hotkey)
+
+    def remove_miner_address_by_address(self, address):
+        with self.lock.write():
+            self.miner_addresses.pop(address, None)
+
+    def clean_old_entries(self, limit=None):
+        with self.lock.write():
+            return _expire(self.miner_addresses, _now(-timedelta(hours=1)), limit)
+
+    def clean_old_entries_conservative(self, limit=None):
+        with self.lock.write():
+            return _expire(self.miner_addresses, _now(-timedelta(hours=6)), limit)
+
+    def get_miner_addresses_by_hotkey(self, hotkey):
+        with self.lock.read():
+            return [
+                (uid, address, worker_id)
+                for entry_hotkey, uid, address, worker_id, _ in (
+                    self.miner_addresses.values()
+                )
+                if entry_hotkey == hotkey
+            ]
+
+    def get_all_miner_addresses(self):
+        with self.lock.read():
+            return [
+                (hotkey, address, worker_id)
+                for hotkey, _, address, worker_id, _ in self.miner_addresses.values()
+            ]
+
+    def get_address_timestamp(self, address):
+        with self.lock.read():
+            entry = self.miner_addresses.get(address)
+            return entry[4] if entry else None
+
+    def register_worker(self, worker_id, hotkey):
+        with self.lock.write():
+            self._register_worker(worker_id, hotkey)
+
+    def _register_worker(self, worker_id, hotkey):
+        if hotkey is None:
+            raise sqlite3.IntegrityError(
+                "NOT NULL constraint failed: worker_registry.hotkey"
+            )
+        # INSERT OR REPLACE moves the row to the end
+        self.worker_registry.pop(_text(worker_id), None)
+        self.worker_registry[_text(worker_id)] = [hotkey, _now()]
+
+    def unregister_worker(self, worker_id):
+        with self.lock.write():
+            self.worker_registry.pop(_text(worker_id), None)
+
+    def unregister_workers_by_hotkey(self, hotkey):
+        with self.lock.write():
+            for worker_id, (worker_hotkey, _) in list(self.worker_registry.items()):
+                if worker_hotkey == hotkey:
+                    del self.worker_registry[worker_id]
+
+    def get_worker_hotkey(self, worker_id):
+        with self.lock.read():
+            entry = self.worker_registry.get(str(worker_id))
+            return entry[0] if entry else None
+
+    def get_workers_by_hotkey(self, hotkey):
+        with self.lock.read():
+            return [
+                worker_id
+                for worker_id, (worker_hotkey, _) in self.worker_registry.items()
+                if worker_hotkey == hotkey
+            ]
+
+    def get_all_worker_registrations(self):
+        with self.lock.read():
+            worker_list = [
+                (worker_id, hotkey)
+                for worker_id, (hotkey, _) in self.worker_registry.items()
+            ]
+        random.shuffle(worker_list)
+        return worker_list
+
+    def clean_old_worker_registrations(self, hours=24, limit=None):
+        with self.lock.write():
+            return _expire(self.worker_registry, _now(-timedelta(hours=hours)), limit)
+
+    def add_unregistered_tee(self, address, hotkey):
+        with self.lock.write():
+            if hotkey is None:
+                raise sqlite3.IntegrityError(
+                    "NOT NULL constraint failed: unregistered_tees.hotkey"
+                )
+            self.unregistered_tees.pop(address, None)
+            self.unregistered_tees[address] = [hotkey, _now()]
+
+    def clean_old_unregistered_tees(self, limit=None):
+        with self.lock.write():
+            return _expire(self.unregistered_tees, _now(-timedelta(hours=1)), limit)
+
+    def get_all_unregistered_tees(self):
+        with self.lock.read():
+            return [
+                (address, hotkey)
+                for address, (hotkey, _) in self.unregistered_tees.items()
+            ]
+
+    def get_all_unregistered_tee_addresses(self):
+        with self.lock.read():
+            return list(self.unregistered_tees)
+
+    def remove_unregistered_tee(self, address):
+        with self.lock.write():
+            return self.unregistered_tees.pop(address, None) is not None
+
+    def _upsert_address(self, hotkey, uid, address, worker_id=None):
+        """Same outcomes as RoutingTableDatabase._upsert_address."""
+        existing = self.miner_addresses.get(address)
+        if existing is None:
+            self._insert_address(hotkey, uid, address, worker_id)
+            return "added"
+        if existing[:2] != [hotkey, _text(uid)]:
+            raise sqlite3.IntegrityError(
+                "UNIQUE constraint failed: miner_addresses.address"
+            )
+        outcome = "refreshed"
+        if existing[3] != _text(worker_id):
+            outcome = "replaced"
+        existing[3:5] = [_text(worker_id), _now()]
+        return outcome
+
+    def upsert_address(self, hotkey, uid, address, worker_id=None):
+        with self.lock.write():
+            return self._upsert_address(hotkey, uid, address, worker_id)
+
+    def _remove_address(self, address):
+        return self.miner_addresses.pop(address, None) is not None
+
+    def _remove_registered_unregistered_tees(self):
+        registered = [
+            address
+            for address in self.unregistered_tees
+            if address in self.miner_addresses
+        ]
+        for address in registered:
+            del self.unregistered_tees[address]
+        return len(registered)
+
+    def apply_batch(self, operations):
+        handlers = {
+            "register_worker": self._register_worker,
+            "add_address": self._upsert_address,
+            "remove_address": self._remove_address,
+            "remove_registered_unregistered_tees": (
+                self._remove_registered_unregistered_tees
+            ),
+        }
+        results = []
+        with self.lock.write():
+            for name, args in operations:
+                try:
+                    results.append(handlers[name](*args))
+                except sqlite3.IntegrityError as e:
+                    results.append(e)
+        return results
+
+
+class MemoryTelemetryDatabase(TelemetryBackend):
+    """
+    Telemetry runs per hotkey in insertion order, stored like the SQLite
+    engine stores them (see RUN_COLUMNS). Like the log engine it keeps no
+    rollups, old samples are only removed by clean_old_entries.
+    """
+
+    def __init__(self):
+        self.lock = ReadWriteLock()
+        # hotkey -> list of runs in TELEMETRY_COLUMNS + RUN_COLUMNS order
+        self.rows = {}
+        self.delta_states = {}
+
+    def add_telemetry(self, telemetry_data):
+        sample = sample_row(telemetry_data, int(time.time()))
+        hotkey = sample[0]
+        run_end = (sample[TIMESTAMP_INDEX], sample[CURRENT_TIME_INDEX])
+        with self.lock.write():
+            runs = self.rows.setdefault(hotkey, [])
+            state = self.delta_states.get(hotkey)
+            if runs and state is not None and continues_run(state.latest, sample):
+                run = runs[-1]
+                runs[-1] = run[: len(TELEMETRY_COLUMNS)] + run_end + (run[-1] + 1,)
+            else:
+                runs.append(sample + run_end + (1,))
+            self.delta_states[hotkey] = advance(state, sample)
+
+    def clean_old_entries(self, hours, limit=None):
+        cutoff = int(time.time() - hours * 3600)
+        removed = 0
+        with self.lock.write():
+            for hotkey in list(self.rows):
+                if limit is not None and removed >= limit:
+                    break
+                runs = self.rows[hotkey]
+                expired = [i for i, run in enumerate(runs) if run[-3] < cutoff]
+                if limit is not None:
+                    expired = expired[: limit - removed]
+                drop = set(expired)
+                # A run reaching past the cutoff is trimmed, see TelemetryDatabase
+                kept = [
+                    run if run[-3] < cutoff else trim_run(run, cutoff)
+                    for i, run in enumerate(runs)
+                    if i not in drop
+                ]
+                if kept == runs:
+                    continue
+                runs = kept
+                removed += len(expired)
+                self.delta_states.pop(hotkey, None)
+                if runs:
+                    self.rows[hotkey] = runs
+                    self.delta_states.update(_build_run_states(runs))
+                else:
+                    del self.rows[hotkey]
+        return removed
+
+    def compact_old_entries(self, age_hours, interval_minutes):
+        return 0
+
+    def get_rollups_by_hotkey(self, hotkey):
+        return []
+
+    def get_telemetry_by_hotkey(
+        self, hotkey, since=None, until=None, limit=None, order="asc"
+    ):
+        descending = is_descending(order)
+        with self.lock.read():
+            # Runs are appended in time order and don't overlap
+            runs = self.rows.get(hotkey, [])
+            start, end = 0, len(runs)
+            if since is not None:
+                start = bisect.bisect_left(runs, since, key=lambda run: run[-3])
+            if until is not None:
+                end = bisect.bisect_left(
+                    runs, until, key=lambda run: run[TIMESTAMP_INDEX]
+                )
+            selected = runs[start:end]
+        if descending:
+            selected.reverse()
+        samples = select_samples(selected, since, until, descending)
+        return list(itertools.islice(samples, limit))
+
+    def get_latest_telemetry(self, hotkey):
+        with self.lock.read():
+            state = self.delta_states.get(hotkey)
+            return None if state is None else state.latest
+
+    def get_all_hotkeys_with_telemetry(self):
+        with self.lock.read():
+            return list(self.rows)
+
+    def delete_telemetry_by_hotkey(self, hotkey):
+        with self.lock.write():
+            self.delta_states.pop(hotkey, None)
+            return len(self.rows.pop(hotkey, ()))
+
+    def get_all_telemetry(self):
+        with self.lock.read():
+            return [
+                sample
+                for runs in self.rows.values()
+                for run in runs
+                for sample in run_samples(run)
+            ]
+
+    def get_delta_states(self):
+        with self.lock.read():
+            return list(self.delta_states.values())
+
+    def get_delta_telemetry(self):
+        with self.lock.read():
+            states = {}
+            for runs in self.rows.values():
+                states.update(_build_run_states(runs))
+            return list(states.values())
+
+
+class MemoryErrorsDatabase(ErrorsBackend):
+    def __init__(self):
+        self.lock = ReadWriteLock()
+        self.error_types = {}  # code -> name
+        self.error_templates = {}  # code -> template
+        # dicts in ErrorsDatabase.get_all_errors layout plus an "id"
+        self.errors = []
+        self._ids = itertools.count(1)
+        self.counters = {}  # (minute, hotkey) -> count
+
+    def register_error_types(self, error_types):
+        with self.lock.write():
+            for code, name, template in error_types:
+                self.error_types[code] = name
+                self.error_templates[code] = template
+
+    def add_errors(self, entries, window_start):
+        with self.lock.write():
+            for entry in entries:
+                start = window_start(entry["first_seen"])
+                matches = [
+                    error
+                    for error in self.errors
+                    if error["first_seen"] >= start
+                    and all(error[key] == entry[key] for key in IDENTITY_COLUMNS)
+                ]
+                if matches:
+                    error = max(matches, key=lambda error: error["first_seen"])
+                    error["count"] += entry["count"]
+                    error["timestamp"] = max(error["timestamp"], entry["last_seen"])
+                    error["last_seen"] = error["timestamp"]
+                    error["miner_address"] = entry["miner_address"]
+                    continue
+                error = {key: entry[key] for key in IDENTITY_COLUMNS}
+                error.update(
+                    id=next(self._ids),
+                    timestamp=entry["last_seen"],
+                    miner_address=entry["miner_address"],
+                    count=entry["count"],
+                    first_seen=entry["first_seen"],
+                    last_seen=entry["last_seen"],
+                )
+                self.errors.append(error)
+
+    @staticmethod
+    def _copy(error):
+        return {key: value for key, value in error.items() if key != "id"}
+
+    def _latest(self, errors, limit):
+        errors = sorted(errors, key=lambda error: error["timestamp"], reverse=True)
+        return [self._copy(error) for error in errors[:limit]]
+
+    def _search_columns(self, error):
+        """Token lists of an error's SEARCH_COLUMNS."""
+        message = " ".join(
+            str(value)
+            for value in (
+                self.error_types.get(error["error_type"]),
+                self.error_templates.get(error["error_type"]),
+                error["status_code"],
+                error["detail"],
+            )
+            if value is not None
+        )
+        values = dict(error, message=message)
+        return [_tokens(values[column]) for column in SEARCH_COLUMNS]
+
+    def search_errors(
+        self,
+        query=None,
+        hotkey_prefix=None,
+        since=None,
+        until=None,
+        limit=100,
+        cursor=None,
+    ):
+        terms = query.split() if query else []
+        terms = [term for term in terms if _tokens(term)]
+        if query and not terms:
+            return [], None
+        after = parse_search_cursor(cursor) if cursor else None
+
+        def key(error):
+            return (error["timestamp"], error["first_seen"][:10].replace("-", ""))
+
+        with self.lock.read():
+            found = []
+            for error in self.errors:
+                if hotkey_prefix and not (error["hotkey"] or "").startswith(
+                    hotkey_prefix
+                ):
+                    continue
+                if since and error["timestamp"] < since:
+                    continue
+                if until and error["timestamp"] >= until:
+                    continue
+                if after and key(error) + (error["id"],) >= after:
+                    continue
+                if terms:
+                    columns = self._search_columns(error)
+                    if not all(_matches_term(term, columns) for term in terms):
+                        continue
+                found.append(error)
+            found.sort(key=lambda error: key(error) + (error["id"],), reverse=True)
+            page = found[:limit]
+            next_cursor = None
+            if len(found) > limit:
+                timestamp, day = key(page[-1])
+                next_cursor = f"{timestamp}/{day}/{page[-1]['id']}"
+            return [self._copy(error) for error in page], next_cursor
+
+    def get_errors_by_hotkey(self, hotkey, limit=100):
+        with self.lock.read():
+            errors = self._latest(
+                [error for error in self.errors if error["hotkey"] == hotkey], limit
+            )
+        for error in errors:
+            del error["hotkey"]
+        return errors
+
+    def get_all_errors(self, limit=100):
+        with self.lock.read():
+            return self._latest(self.errors, limit)
+
+    def clean_old_errors(self, hours=24, limit=None):
+        cutoff = _now(-timedelta(hours=hours))
+        with self.lock.write():
+            expired = [
+                i for i, error in enumerate(self.errors) if error["timestamp"] < cutoff
+            ]
+            if limit is not None:
+                expired = expired[:limit]
+            drop = set(expired)
+            self.errors = [
+                error for i, error in enumerate(self.errors) if i not in drop
+            ]
+            return len(expired)
+
+    def get_error_count(self, hours=24, hotkey=None):
+        cutoff = _now(-timedelta(hours=hours))
+        with self.lock.read():
+            return sum(
+                error["count"]
+                for error in self.errors
+                if error["timestamp"] > cutoff
+                and (hotkey is None or error["hotkey"] == hotkey)
+            )
+
+    def save_error_counters(self, rows, oldest_minute):
+        with self.lock.write():
+            for minute, hotkey, count in rows:
+                self.counters[(minute, hotkey)] = count
+            for key in [key for key in self.counters if key[0] < oldest_minute]:
+                del self.counters[key]
+
+    def load_error_counters(self, oldest_minute):
+        with self.lock.read():
+            return [
+                (minute, hotkey, count)
+                for (minute, hotkey), count in sorted(self.counters.items())
+                if minute >= oldest_minute
+            ]
+
+    def get_error_counts_by_type(self, hotkey=None, hours=24):
+        cutoff = _now(-timedelta(hours=hours))
+        counts = {}
+        with self.lock.read():
+            for error in self.errors:
+                if error["timestamp"] <= cutoff:
+                    continue
+                if hotkey is not None and error["hotkey"] != hotkey:
+                    continue
+                key = (error["hotkey"], error["error_type"])
+                counts[key] = counts.get(key, 0) + error["count"]
+            names = dict(self.error_types)
+        rows = [
+            (row_hotkey, code, names.get(code), count)
+            for (row_hotkey, code), count in counts.items()
+        ]
+        return sorted(rows, key=lambda row: (row[0], -row[3]))
@@ -0,0 +1,49 @@
+"""
+Versioned schema migrations for the SQLite databases.
+
+Every database keeps the version of its schema in PRAGMA user_version.
+Each migration runs in its own transaction together with the version
+bump, so a failed migration leaves the file at the previous version and is
+retried on the next start. Files created before versioning are at version
+0, which is why the first migration of each database is written to be safe
+on an existing schema.
+"""
+
+from typing import Callable, Iterable, NamedTuple
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    # Called with a cursor inside the migration's transaction
+    apply: Callable
+
+
+def get_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations: Iterable[Migration]) -> int:
+    """
+    Apply the migrations newer than the database's version, in order.
+
+    :param conn: Connection to the database
+    :param migrations: All migrations of the database
+    :return: The schema version after migrating
+    """
+    version = get_version(conn)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= version:
+            continue
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            migration.apply(cursor)
+            # PRAGMA arguments can't be bound, the version is an int
+            cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = migration.version
+    return version
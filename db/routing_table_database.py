@@ -1,18 +1,187 @@
 import sqlite3
-from threading import Lock
+from db.base import RoutingTableBackend
+from db.identities import HOTKEY, WORKER_ID, IdentityCache, create_identities_table
+from db.migrations import Migration, migrate
+from db.rw_lock import ReadWriteLock
+from db.snapshot import snapshot_database
 import random
 
+# Identity kind of each argument of the apply_batch operations that take
+# hotkeys or worker ids, None for other arguments
+OPERATION_IDENTITIES = {
+    "register_worker": (WORKER_ID, HOTKEY),
+    "add_address": (HOTKEY, None, None, WORKER_ID),
+}
 
-class RoutingTableDatabase:
+
+class RoutingTableDatabase(RoutingTableBackend):
     def __init__(self, db_path="./miner_tee_addresses.db"):
         self.db_path = db_path
-        self.lock = Lock()
+        self.lock = ReadWriteLock()
+        self.identities = IdentityCache()
+        self._enable_wal()
         self._create_table()
         self._create_worker_registry_table()
         self._create_unregistered_tees_table()
+        self._migrate()
+        with self.lock.read(), self.connect() as conn:
+            self.identities.load(conn.cursor())
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _enable_wal(self):
+        """
+        Switch the database to WAL journaling so readers don't block on the
+        writer (and vice versa). The journal mode is persisted in the file.
+        New files also use incremental auto-vacuum, see optimize.
+        """
+        with self.lock.write(), self.connect() as conn:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def optimize(self, vacuum_pages=1000):
+        """
+        Return up to vacuum_pages free pages to the filesystem (files created
+        with incremental auto-vacuum only) and refresh the query planner
+        statistics.
+        """
+        with self.lock.write(), self.connect() as conn:
+            # executescript steps the pragma to completion, execute frees one page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+            conn.execute("PRAGMA optimize")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path without blocking its writers, see
+        db/snapshot.py. Runs without self.lock.
+        """
+        return snapshot_database(
+            self.db_path, target_path, pages_per_step, step_pause_seconds
+        )
+
+    def _migrate(self):
+        """
+        Apply schema changes made after the tables above, see
+        db/migrations.py. Files created before v1 are at version 0, v1 is
+        the first version the routing table records.
+        """
+        with self.lock.write(), self.connect() as conn:
+            migrate(
+                conn,
+                [
+                    Migration(1, "unique address entry", self._add_entry_index),
+                    Migration(2, "identity keys", self._use_identity_keys),
+                ],
+            )
+
+    def _add_entry_index(self, cursor):
+        """
+        Make (hotkey, uid, address) unique, the conflict target of
+        upsert_address. A hotkey/uid can have several entries, one per TEE.
+        address is already unique, so existing files can't hold duplicates.
+        """
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_miner_addresses_entry
+            ON miner_addresses (hotkey, uid, address)
+            """
+        )
+
+    def _use_identity_keys(self, cursor):
+        """
+        Store hotkeys and worker ids as integer ids from the identities
+        table (see db/identities.py) instead of repeating the strings in
+        every row and index entry. The address, worker registry and
+        unregistered TEE tables share it, a hotkey has the same id in each.
+        """
+        create_identities_table(cursor)
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO identities (kind, value)
+            SELECT {HOTKEY}, hotkey FROM miner_addresses WHERE hotkey IS NOT NULL
+            UNION
+            SELECT {HOTKEY}, hotkey FROM worker_registry WHERE hotkey IS NOT NULL
+            UNION
+            SELECT {HOTKEY}, hotkey FROM unregistered_tees WHERE hotkey IS NOT NULL
+            UNION
+            SELECT {WORKER_ID}, worker_id FROM miner_addresses
+            WHERE worker_id IS NOT NULL
+            UNION
+            SELECT {WORKER_ID}, worker_id FROM worker_registry
+            WHERE worker_id IS NOT NULL
+            """
+        )
+        identity = "(SELECT id FROM identities WHERE kind = {0} AND value = {1})"
+        hotkey = identity.format(HOTKEY, "hotkey")
+        worker_id = identity.format(WORKER_ID, "worker_id")
+
+        cursor.execute(
+            """
+            CREATE TABLE miner_addresses_keyed (
+                hotkey INTEGER,
+                uid TEXT,
+                address TEXT UNIQUE,
+                worker_id INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO miner_addresses_keyed
+            (rowid, hotkey, uid, address, worker_id, timestamp)
+            SELECT rowid, {hotkey}, uid, address, {worker_id}, timestamp
+            FROM miner_addresses
+            """
+        )
+        cursor.execute("DROP TABLE miner_addresses")
+        cursor.execute("ALTER TABLE miner_addresses_keyed RENAME TO miner_addresses")
+        self._add_entry_index(cursor)
+
+        # worker_id becomes the rowid alias, registrations without one
+        # couldn't be looked up anyway and are dropped
+        cursor.execute(
+            """
+            CREATE TABLE worker_registry_keyed (
+                worker_id INTEGER PRIMARY KEY,
+                hotkey INTEGER NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO worker_registry_keyed (worker_id, hotkey, timestamp)
+            SELECT {worker_id}, {hotkey}, timestamp FROM worker_registry
+            WHERE worker_id IS NOT NULL
+            """
+        )
+        cursor.execute("DROP TABLE worker_registry")
+        cursor.execute("ALTER TABLE worker_registry_keyed RENAME TO worker_registry")
+
+        cursor.execute(
+            """
+            CREATE TABLE unregistered_tees_keyed (
+                address TEXT PRIMARY KEY,
+                hotkey INTEGER NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO unregistered_tees_keyed (rowid, address, hotkey, timestamp)
+            SELECT rowid, address, {hotkey}, timestamp FROM unregistered_tees
+            """
+        )
+        cursor.execute("DROP TABLE unregistered_tees")
+        cursor.execute(
+            "ALTER TABLE unregistered_tees_keyed RENAME TO unregistered_tees"
+        )
 
     def _create_table(self):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -28,7 +197,7 @@ class RoutingTableDatabase:
             conn.commit()
 
     def _create_worker_registry_table(self):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -42,7 +211,7 @@ class RoutingTableDatabase:
             conn.commit()
 
     def _create_unregistered_tees_table(self):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -56,7 +225,9 @@ class RoutingTableDatabase:
             conn.commit()
 
     def add_address(self, hotkey, uid, address, worker_id=None):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
+            hotkey = self.identities.get_or_create_id(conn, HOTKEY, hotkey)
+            worker_id = self.identities.get_or_create_id(conn, WORKER_ID, worker_id)
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -68,8 +239,10 @@ class RoutingTableDatabase:
             conn.commit()
 
     def update_address(self, hotkey, uid, new_address, worker_id=None):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
+            worker_id = self.identities.get_or_create_id(conn, WORKER_ID, worker_id)
             cursor = conn.cursor()
+            hotkey = self.identities.get_id(cursor, HOTKEY, hotkey)
             if worker_id is not None:
                 cursor.execute(
                     """
@@ -92,7 +265,7 @@ class RoutingTableDatabase:
         """
         Update the timestamp for an existing miner address record to current time.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -101,96 +274,141 @@ class RoutingTableDatabase:
                 WHERE hotkey = ? AND uid = ? AND address = ? 
                 AND worker_id = ?
                 """,
-                (hotkey, uid, address, worker_id),
+                (
+                    self.identities.get_id(cursor, HOTKEY, hotkey),
+                    uid,
+                    address,
+                    self.identities.get_id(cursor, WORKER_ID, worker_id),
+                ),
             )
             conn.commit()
             # Return True if a row was updated
             return cursor.rowcount > 0
 
     def delete_address(self, hotkey, uid):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 DELETE FROM miner_addresses 
                 WHERE hotkey = ? AND uid = ?
                 """,
-                (hotkey, uid),
+                (self.identities.get_id(cursor, HOTKEY, hotkey), uid),
             )
             conn.commit()
 
-    def clean_old_entries(self):
+    def delete_addresses_by_hotkey(self, hotkey):
         """
-        Remove all entries where the timestamp is more than one hour older.
+        Remove all miner addresses of a hotkey.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM miner_addresses 
-                WHERE timestamp < datetime('now', '-1 hour')
-                """
+                DELETE FROM miner_addresses WHERE hotkey = ?
+                """,
+                (self.identities.get_id(cursor, HOTKEY, hotkey),),
             )
             conn.commit()
 
-    def clean_old_entries_conservative(self):
+    def clean_old_entries(self, limit=None):
         """
-        Remove entries where the timestamp is more than 6 hours older.
-        More conservative cleanup for very old entries only.
+        Remove all entries where the timestamp is more than one hour older.
+
+        :param limit: Maximum number of rows to delete, None for all
+        :return: Number of rows deleted
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM miner_addresses 
-                WHERE timestamp < datetime('now', '-6 hours')
-                """
+                DELETE FROM miner_addresses WHERE rowid IN (
+                    SELECT rowid FROM miner_addresses
+                    WHERE timestamp < datetime('now', '-1 hour')
+                    LIMIT ?
+                )
+                """,
+                (-1 if limit is None else limit,),
             )
             conn.commit()
+            return cursor.rowcount
 
-    def remove_miner_address_by_address(self, address):
+    def clean_old_entries_conservative(self, limit=None):
         """
-        Remove a miner address entry by address only.
+        Remove entries where the timestamp is more than 6 hours older.
+        More conservative cleanup for very old entries only.
+
+        :param limit: Maximum number of rows to delete, None for all
+        :return: Number of rows deleted
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM miner_addresses 
-                WHERE address = ?
+                DELETE FROM miner_addresses WHERE rowid IN (
+                    SELECT rowid FROM miner_addresses
+                    WHERE timestamp < datetime('now', '-6 hours')
+                    LIMIT ?
+                )
                 """,
-                (address,),
+                (-1 if limit is None else limit,),
             )
             conn.commit()
+            return cursor.rowcount
+
+    def remove_miner_address_by_address(self, address):
+        """
+        Remove a miner address entry by address only.
+        """
+        with self.lock.write(), self.connect() as conn:
+            self._remove_miner_address_by_address(conn.cursor(), address)
+            conn.commit()
+
+    def _remove_miner_address_by_address(self, cursor, address):
+        cursor.execute(
+            """
+            DELETE FROM miner_addresses 
+            WHERE address = ?
+            """,
+            (address,),
+        )
+        return cursor.rowcount > 0
 
     def register_worker(self, worker_id, hotkey):
         """
         Register a worker_id with a hotkey in the worker registry.
         If the worker_id already exists, it will update the hotkey.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO worker_registry (worker_id, hotkey) 
-                VALUES (?, ?)
-                """,
-                (worker_id, hotkey),
-            )
+        with self.lock.write(), self.connect() as conn:
+            worker_id = self.identities.get_or_create_id(conn, WORKER_ID, worker_id)
+            hotkey = self.identities.get_or_create_id(conn, HOTKEY, hotkey)
+            self._register_worker(conn.cursor(), worker_id, hotkey)
             conn.commit()
 
+    def _register_worker(self, cursor, worker_id, hotkey):
+        """Register identity ids, a registration without a worker id is ignored."""
+        if worker_id is None:
+            return
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO worker_registry (worker_id, hotkey) 
+            VALUES (?, ?)
+            """,
+            (worker_id, hotkey),
+        )
+
     def unregister_worker(self, worker_id):
         """
         Remove a worker_id from the worker registry.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 DELETE FROM worker_registry 
                 WHERE worker_id = ?
                 """,
-                (worker_id,),
+                (self.identities.get_id(cursor, WORKER_ID, worker_id),),
             )
             conn.commit()
 
@@ -198,14 +416,14 @@ class RoutingTableDatabase:
         """
         Remove all worker_ids associated with a hotkey from the registry.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 DELETE FROM worker_registry 
                 WHERE hotkey = ?
                 """,
-                (hotkey,),
+                (self.identities.get_id(cursor, HOTKEY, hotkey),),
             )
             conn.commit()
 
@@ -214,42 +432,40 @@ class RoutingTableDatabase:
         Get the hotkey associated with a worker_id from the registry.
         Returns None if the worker_id is not registered.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
-            # Ensure worker_id is treated as a string for comparison
-            worker_id_str = str(worker_id)
             cursor.execute(
                 """
                 SELECT hotkey FROM worker_registry WHERE worker_id = ?;
                 """,
-                (worker_id_str,),
+                (self.identities.get_id(cursor, WORKER_ID, worker_id),),
             )
 
             result = cursor.fetchone()
 
-            return result[0] if result else None
+            return self.identities.get_value(cursor, result[0]) if result else None
 
     def get_workers_by_hotkey(self, hotkey):
         """
         Get all worker_ids associated with a hotkey from the registry.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT worker_id FROM worker_registry 
                 WHERE hotkey = ?
                 """,
-                (hotkey,),
+                (self.identities.get_id(cursor, HOTKEY, hotkey),),
             )
             results = cursor.fetchall()
-            return [row[0] for row in results]
+            return [self.identities.get_value(cursor, row[0]) for row in results]
 
     def get_all_worker_registrations(self):
         """
         Get all worker_id and hotkey pairs from the registry.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -258,31 +474,45 @@ class RoutingTableDatabase:
             )
             results = cursor.fetchall()
             # Convert to list and randomize in Python
-            worker_list = [(row[0], row[1]) for row in results]
+            worker_list = [
+                (
+                    self.identities.get_value(cursor, row[0]),
+                    self.identities.get_value(cursor, row[1]),
+                )
+                for row in results
+            ]
             random.shuffle(worker_list)
             return worker_list
 
-    def clean_old_worker_registrations(self, hours=24):
+    def clean_old_worker_registrations(self, hours=24, limit=None):
         """
         Remove worker registrations older than the specified number of hours.
+
+        :param limit: Maximum number of rows to delete, None for all
+        :return: Number of rows deleted
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM worker_registry 
-                WHERE timestamp < datetime('now', ?)
+                DELETE FROM worker_registry WHERE rowid IN (
+                    SELECT rowid FROM worker_registry
+                    WHERE timestamp < datetime('now', ?)
+                    LIMIT ?
+                )
                 """,
-                (f"-{hours} hours",),
+                (f"-{hours} hours", -1 if limit is None else limit),
             )
             conn.commit()
+            return cursor.rowcount
 
     def add_unregistered_tee(self, address, hotkey):
         """
         Add a new unregistered TEE to the database.
         If the address already exists, it will update the hotkey.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
+            hotkey = self.identities.get_or_create_id(conn, HOTKEY, hotkey)
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -293,25 +523,33 @@ class RoutingTableDatabase:
             )
             conn.commit()
 
-    def clean_old_unregistered_tees(self):
+    def clean_old_unregistered_tees(self, limit=None):
         """
         Remove all unregistered TEEs where the timestamp is more than one hour old.
+
+        :param limit: Maximum number of rows to delete, None for all
+        :return: Number of rows deleted
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM unregistered_tees 
-                WHERE timestamp < datetime('now', '-1 hour')
-                """
+                DELETE FROM unregistered_tees WHERE rowid IN (
+                    SELECT rowid FROM unregistered_tees
+                    WHERE timestamp < datetime('now', '-1 hour')
+                    LIMIT ?
+                )
+                """,
+                (-1 if limit is None else limit,),
             )
             conn.commit()
+            return cursor.rowcount
 
     def get_all_unregistered_tees(self):
         """
         Get all unregistered TEEs from the database.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -319,13 +557,16 @@ class RoutingTableDatabase:
                 """
             )
             results = cursor.fetchall()
-            return [(address, hotkey) for address, hotkey in results]
+            return [
+                (address, self.identities.get_value(cursor, hotkey))
+                for address, hotkey in results
+            ]
 
     def get_all_unregistered_tee_addresses(self):
         """
         Get all addresses from the unregistered_tees table.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -343,7 +584,7 @@ class RoutingTableDatabase:
         :return: A list of (uid, address, worker_id) tuples for the specified
                  hotkey
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -351,10 +592,31 @@ class RoutingTableDatabase:
                 FROM miner_addresses 
                 WHERE hotkey = ?
                 """,
-                (hotkey,),
+                (self.identities.get_id(cursor, HOTKEY, hotkey),),
             )
             results = cursor.fetchall()
-            return [(row[0], row[1], row[2]) for row in results]
+            return [
+                (row[0], row[1], self.identities.get_value(cursor, row[2]))
+                for row in results
+            ]
+
+    def get_all_miner_addresses(self):
+        """
+        Get every miner address in the routing table.
+
+        :return: A list of (hotkey, address, worker_id) tuples
+        """
+        with self.lock.read(), self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT hotkey, address, worker_id FROM miner_addresses")
+            return [
+                (
+                    self.identities.get_value(cursor, row[0]),
+                    row[1],
+                    self.identities.get_value(cursor, row[2]),
+                )
+                for row in cursor.fetchall()
+            ]
 
     def get_address_timestamp(self, address):
         """
@@ -363,7 +625,7 @@ class RoutingTableDatabase:
         :param address: The address to check
         :return: The timestamp string or None if not found
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -381,14 +643,130 @@ class RoutingTableDatabase:
         :param address: The address of the unregistered TEE to remove
         :return: True if an entry was removed, False if not found
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                DELETE FROM unregistered_tees 
-                WHERE address = ?
-                """,
-                (address,),
+        with self.lock.write(), self.connect() as conn:
+            removed = self._remove_unregistered_tee(conn.cursor(), address)
+            conn.commit()
+            return removed
+
+    def _remove_unregistered_tee(self, cursor, address):
+        cursor.execute(
+            """
+            DELETE FROM unregistered_tees 
+            WHERE address = ?
+            """,
+            (address,),
+        )
+        return cursor.rowcount > 0
+
+    def _remove_registered_unregistered_tees(self, cursor):
+        """
+        Drop unregistered TEE entries whose address is now in the routing
+        table. Returns the number of entries removed.
+        """
+        cursor.execute(
+            """
+            DELETE FROM unregistered_tees 
+            WHERE address IN (SELECT address FROM miner_addresses)
+            """
+        )
+        return cursor.rowcount
+
+    def _upsert_address(self, cursor, hotkey, uid, address, worker_id=None):
+        """
+        Add a miner address, refreshing the timestamp if an identical entry
+        exists and updating the worker_id if the entry of hotkey/uid/address
+        has another one. Other addresses of the hotkey/uid (a miner can run
+        several TEEs) are left as they are. The write is a single upsert on
+        (hotkey, uid, address), an address owned by another hotkey/uid
+        raises IntegrityError and leaves the existing entries untouched.
+        hotkey and worker_id are identity ids, see _encode_operation.
+
+        :return: "refreshed", "replaced" or "added"
+        """
+        # Indexed lookup for the outcome only, the caller's transaction
+        # keeps it consistent with the upsert
+        cursor.execute(
+            "SELECT worker_id FROM miner_addresses "
+            "WHERE hotkey = ? AND uid = ? AND address = ?",
+            (hotkey, uid, address),
+        )
+        existing = cursor.fetchone()
+        cursor.execute(
+            """
+            INSERT INTO miner_addresses (hotkey, uid, address, worker_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (hotkey, uid, address) DO UPDATE SET
+                worker_id = excluded.worker_id,
+                timestamp = CURRENT_TIMESTAMP
+            """,
+            (hotkey, uid, address, worker_id),
+        )
+        if existing is None:
+            return "added"
+        if existing[0] == worker_id:
+            return "refreshed"
+        return "replaced"
+
+    def upsert_address(self, hotkey, uid, address, worker_id=None):
+        """
+        Add or refresh a miner address in one transaction, see
+        _upsert_address.
+        """
+        with self.lock.write(), self.connect() as conn:
+            hotkey, uid, address, worker_id = self._encode_operation(
+                conn, "add_address", (hotkey, uid, address, worker_id)
             )
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            outcome = self._upsert_address(cursor, hotkey, uid, address, worker_id)
             conn.commit()
-            return cursor.rowcount > 0
+            return outcome
+
+    def apply_batch(self, operations):
+        """
+        Apply a list of (operation, args) mutations in a single transaction.
+
+        Supported operations are "register_worker", "add_address",
+        "remove_address" and "remove_registered_unregistered_tees". A
+        constraint violation only fails its own statement, the rest of the
+        batch is still committed.
+
+        :param operations: List of (operation name, args tuple) pairs
+        :return: List with the result of each operation, or the
+                 sqlite3.IntegrityError it raised
+        """
+        handlers = {
+            "register_worker": self._register_worker,
+            "add_address": self._upsert_address,
+            "remove_address": self._remove_miner_address_by_address,
+            "remove_registered_unregistered_tees": (
+                self._remove_registered_unregistered_tees
+            ),
+        }
+        results = []
+        with self.lock.write(), self.connect() as conn:
+            # Identities are committed as they are created, before the batch
+            operations = [
+                (name, self._encode_operation(conn, name, args))
+                for name, args in operations
+            ]
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for name, args in operations:
+                try:
+                    results.append(handlers[name](cursor, *args))
+                except sqlite3.IntegrityError as e:
+                    results.append(e)
+            conn.commit()
+        return results
+
+    def _encode_operation(self, conn, name, args):
+        """
+        Replace the hotkeys and worker ids in the args of an apply_batch
+        operation by their identity ids.
+        """
+        kinds = OPERATION_IDENTITIES.get(name, ()) + (None,) * len(args)
+        return tuple(
+            arg if kind is None else self.identities.get_or_create_id(conn, kind, arg)
+            for arg, kind in zip(args, kinds)
+        )
@@ -1,154 +1,1012 @@
 import sqlite3
-from threading import Lock
+import time
+from itertools import islice
+from db.base import TelemetryBackend
+from db.identities import HOTKEY, WORKER_ID, IdentityCache, create_identities_table
+from db.migrations import Migration, migrate
+from db.rw_lock import ReadWriteLock
+from db.snapshot import snapshot_database
+from db.telemetry_delta import DeltaState, advance
 
+# Column order of the telemetry table (worker_id was added by migration).
+# The table stores identity ids for hotkey and worker_id, rows returned by
+# TelemetryDatabase carry the strings.
+TELEMETRY_COLUMNS = (
+    "hotkey",
+    "uid",
+    "timestamp",
+    "boot_time",
+    "last_operation_time",
+    "current_time",
+    "twitter_auth_errors",
+    "twitter_errors",
+    "twitter_ratelimit_errors",
+    "twitter_returned_other",
+    "twitter_returned_profiles",
+    "twitter_returned_tweets",
+    "twitter_scrapes",
+    "web_errors",
+    "web_success",
+    "worker_id",
+)
+WORKER_ID_INDEX = TELEMETRY_COLUMNS.index("worker_id")
+TIMESTAMP_INDEX = TELEMETRY_COLUMNS.index("timestamp")
+CURRENT_TIME_INDEX = TELEMETRY_COLUMNS.index("current_time")
+# Telemetry columns with TEXT affinity
+TEXT_COLUMNS = ("hotkey", "uid", "worker_id")
 
-class TelemetryDatabase:
+# Consecutive samples of a hotkey that only differ in timestamp and
+# current_time (an idle TEE) are stored as one run: the row of the first
+# sample followed by these columns for the last sample and the number of
+# samples. The samples in between repeat the first one, scoring can't tell
+# them apart.
+RUN_COLUMNS = ("last_seen", "last_current_time", "run_length")
+# Quoted, current_time would otherwise be the CURRENT_TIME keyword
+RUN_SELECT = ", ".join(f'"{column}"' for column in TELEMETRY_COLUMNS + RUN_COLUMNS)
+
+
+def sample_row(telemetry_data, timestamp):
+    """A sample as a row in TELEMETRY_COLUMNS order, as the table stores it."""
+    row = []
+    for column in TELEMETRY_COLUMNS:
+        if column == "timestamp":
+            row.append(timestamp)
+        elif column in TEXT_COLUMNS:
+            value = getattr(telemetry_data, column)
+            row.append(None if value is None else str(value))
+        else:
+            row.append(getattr(telemetry_data, column))
+    return tuple(row)
+
+
+def continues_run(latest, sample):
+    """Whether sample repeats latest apart from timestamp and current_time."""
+    return all(
+        value == other
+        for index, (value, other) in enumerate(zip(latest, sample))
+        if index not in (TIMESTAMP_INDEX, CURRENT_TIME_INDEX)
+    )
+
+
+def run_samples(run):
+    """
+    The first and, for longer runs, the last sample of a run (a row in
+    TELEMETRY_COLUMNS + RUN_COLUMNS order), in time order.
+    """
+    width = len(TELEMETRY_COLUMNS)
+    first = tuple(run[:width])
+    last_seen, last_current_time, run_length = run[width:]
+    if run_length < 2:
+        return [first]
+    last = list(first)
+    last[TIMESTAMP_INDEX] = last_seen
+    last[CURRENT_TIME_INDEX] = last_current_time
+    return [first, tuple(last)]
+
+
+def trim_run(run, cutoff):
+    """
+    Drop the samples of a run (a row in TELEMETRY_COLUMNS + RUN_COLUMNS
+    order) taken before cutoff. The samples in between aren't stored, they
+    are taken to follow the run's average cadence, so the run then starts at
+    the first of them at or after cutoff.
+
+    :return: The trimmed run, None if all of its samples are before cutoff
+    """
+    width = len(TELEMETRY_COLUMNS)
+    timestamp = run[TIMESTAMP_INDEX]
+    last_seen, last_current_time, run_length = run[width:]
+    if last_seen < cutoff:
+        return None
+    if timestamp >= cutoff or run_length < 2:
+        return tuple(run)
+    intervals = run_length - 1
+    span = last_seen - timestamp
+    # Rounded up, the first sample at or after cutoff
+    skipped = min(intervals, -(-(cutoff - timestamp) * intervals // span))
+    trimmed = list(run)
+    trimmed[TIMESTAMP_INDEX] = timestamp + skipped * span // intervals
+    current_time = run[CURRENT_TIME_INDEX]
+    if current_time is not None and last_current_time is not None:
+        trimmed[CURRENT_TIME_INDEX] = (
+            current_time + skipped * (last_current_time - current_time) // intervals
+        )
+    trimmed[-1] = run_length - skipped
+    return tuple(trimmed)
+
+
+def select_samples(runs, since=None, until=None, descending=False):
+    """
+    Yield the samples of runs given in time order (latest first when
+    descending) with a timestamp from since (inclusive) to until (exclusive).
+    """
+    for run in runs:
+        samples = run_samples(run)
+        if descending:
+            samples.reverse()
+        for sample in samples:
+            timestamp = sample[TIMESTAMP_INDEX]
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp >= until:
+                continue
+            yield sample
+
+
+def is_descending(order):
+    """
+    Whether a telemetry query order is latest first.
+
+    :param order: "asc" (oldest first) or "desc" (latest first)
+    :raises ValueError: For any other order
+    """
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid order: {order}, expected 'asc' or 'desc'")
+    return order == "desc"
+
+
+class TelemetryDatabase(TelemetryBackend):
     def __init__(self, db_path="./telemetry_data.db"):
         self.db_path = db_path
-        self.lock = Lock()
-        self._create_table()
-        self._ensure_worker_id_column()
+        self.lock = ReadWriteLock()
+        self.identities = IdentityCache()
+        self._enable_wal()
+        self._migrate()
+        with self.lock.read(), self.connect() as conn:
+            self.identities.load(conn.cursor())
 
-    def _create_table(self):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS telemetry (
-                    hotkey TEXT,
-                    uid TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    boot_time INT,
-                    last_operation_time INT,
-                    current_time INT,
-                    twitter_auth_errors INT,
-                    twitter_errors INT,
-                    twitter_ratelimit_errors INT,
-                    twitter_returned_other INT,
-                    twitter_returned_profiles INT,
-                    twitter_returned_tweets INT,
-                    twitter_scrapes INT,
-                    web_errors INT,
-                    web_success INT,
-                    worker_id TEXT
-                )
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _enable_wal(self):
+        """
+        Switch the database to WAL journaling so readers don't block on the
+        writer (and vice versa). The journal mode is persisted in the file.
+        New files also use incremental auto-vacuum, see optimize.
+        """
+        with self.lock.write(), self.connect() as conn:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def optimize(self, vacuum_pages=1000):
+        """
+        Return up to vacuum_pages free pages to the filesystem (files created
+        with incremental auto-vacuum only) and refresh the query planner
+        statistics.
+        """
+        with self.lock.write(), self.connect() as conn:
+            # executescript steps the pragma to completion, execute frees one page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+            conn.execute("PRAGMA optimize")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the database to target_path without blocking its writers, see
+        db/snapshot.py. Runs without self.lock.
+        """
+        return snapshot_database(
+            self.db_path, target_path, pages_per_step, step_pause_seconds
+        )
+
+    def _migrate(self):
+        with self.lock.write(), self.connect() as conn:
+            migrate(
+                conn,
+                [
+                    Migration(1, "base schema", self._create_base_schema),
+                    Migration(2, "epoch timestamps", self._use_epoch_timestamps),
+                    Migration(3, "identity keys", self._use_identity_keys),
+                    Migration(4, "change-only writes", self._add_run_columns),
+                ],
+            )
+
+    def _create_base_schema(self, cursor):
+        """
+        The schema before versioning. Safe to run on existing databases,
+        which may predate the worker_id column.
+        """
+        cursor.execute(
             """
+            CREATE TABLE IF NOT EXISTS telemetry (
+                hotkey TEXT,
+                uid TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                boot_time INT,
+                last_operation_time INT,
+                current_time INT,
+                twitter_auth_errors INT,
+                twitter_errors INT,
+                twitter_ratelimit_errors INT,
+                twitter_returned_other INT,
+                twitter_returned_profiles INT,
+                twitter_returned_tweets INT,
+                twitter_scrapes INT,
+                web_errors INT,
+                web_success INT
             )
-            conn.commit()
+        """
+        )
+        cursor.execute("PRAGMA table_info(telemetry)")
+        if "worker_id" not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE telemetry ADD COLUMN worker_id TEXT")
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_telemetry_hotkey_timestamp
+            ON telemetry (hotkey, timestamp)
+            """
+        )
+        # Per-hotkey, per-interval summaries of raw samples removed by
+        # compact_old_entries
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS telemetry_rollups (
+                hotkey TEXT,
+                interval_start DATETIME,
+                sample_count INT,
+                reset_count INT,
+                first_timestamp DATETIME,
+                last_timestamp DATETIME,
+                min_twitter_returned_tweets INT,
+                max_twitter_returned_tweets INT,
+                PRIMARY KEY (hotkey, interval_start)
+            )
+        """
+        )
+        # Per-hotkey scoring state (baseline and latest row, see
+        # db.telemetry_delta) kept up to date on insert
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS telemetry_delta_state (
+                hotkey TEXT PRIMARY KEY,
+                sample_count INT,
+                reset_count INT,
+                state TEXT
+            )
+        """
+        )
 
-    def _ensure_worker_id_column(self):
+    def _use_epoch_timestamps(self, cursor):
         """
-        Ensure the worker_id column exists in the telemetry table.
-        This handles database migrations for existing databases.
+        Store timestamps as integer unix seconds instead of DATETIME text,
+        so reads need no parsing and range filters compare integers. The
+        tables are rebuilt to drop the text CURRENT_TIMESTAMP defaults.
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            # Check if worker_id column exists
-            cursor.execute("PRAGMA table_info(telemetry)")
-            columns = [col[1] for col in cursor.fetchall()]
+        columns = ", ".join(f'"{column}"' for column in TELEMETRY_COLUMNS)
+        epoch = "CAST(strftime('%s', {0}) AS INTEGER)"
+        converted = ", ".join(
+            epoch.format("timestamp") if column == "timestamp" else f'"{column}"'
+            for column in TELEMETRY_COLUMNS
+        )
+        cursor.execute(
+            """
+            CREATE TABLE telemetry_epoch (
+                hotkey TEXT,
+                uid TEXT,
+                timestamp INTEGER NOT NULL,
+                boot_time INT,
+                last_operation_time INT,
+                current_time INT,
+                twitter_auth_errors INT,
+                twitter_errors INT,
+                twitter_ratelimit_errors INT,
+                twitter_returned_other INT,
+                twitter_returned_profiles INT,
+                twitter_returned_tweets INT,
+                twitter_scrapes INT,
+                web_errors INT,
+                web_success INT,
+                worker_id TEXT
+            )
+        """
+        )
+        # Keep the rowids, they order samples with the same timestamp
+        cursor.execute(
+            f"""
+            INSERT INTO telemetry_epoch (rowid, {columns})
+            SELECT rowid, {converted} FROM telemetry
+            WHERE timestamp IS NOT NULL
+            """
+        )
+        cursor.execute("DROP TABLE telemetry")
+        cursor.execute("ALTER TABLE telemetry_epoch RENAME TO telemetry")
+        cursor.execute(
+            """
+            CREATE INDEX idx_telemetry_hotkey_timestamp
+            ON telemetry (hotkey, timestamp)
+            """
+        )
+
+        cursor.execute(
+            """
+            CREATE TABLE telemetry_rollups_epoch (
+                hotkey TEXT,
+                interval_start INTEGER,
+                sample_count INT,
+                reset_count INT,
+                first_timestamp INTEGER,
+                last_timestamp INTEGER,
+                min_twitter_returned_tweets INT,
+                max_twitter_returned_tweets INT,
+                PRIMARY KEY (hotkey, interval_start)
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO telemetry_rollups_epoch
+            SELECT hotkey, {epoch.format("interval_start")}, sample_count,
+                   reset_count, {epoch.format("first_timestamp")},
+                   {epoch.format("last_timestamp")},
+                   min_twitter_returned_tweets, max_twitter_returned_tweets
+            FROM telemetry_rollups
+            """
+        )
+        cursor.execute("DROP TABLE telemetry_rollups")
+        cursor.execute(
+            "ALTER TABLE telemetry_rollups_epoch RENAME TO telemetry_rollups"
+        )
+        # The stored states embed rows with the old timestamps, they are
+        # rebuilt by _add_run_columns
+
+    def _use_identity_keys(self, cursor):
+        """
+        Store hotkeys and worker ids as integer ids from the identities
+        table (see db/identities.py) instead of repeating the strings in
+        every row and in the hotkey indexes.
+        """
+        create_identities_table(cursor)
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO identities (kind, value)
+            SELECT {HOTKEY}, hotkey FROM telemetry WHERE hotkey IS NOT NULL
+            UNION
+            SELECT {HOTKEY}, hotkey FROM telemetry_rollups WHERE hotkey IS NOT NULL
+            UNION
+            SELECT {WORKER_ID}, worker_id FROM telemetry
+            WHERE worker_id IS NOT NULL
+            """
+        )
+        identity = "(SELECT id FROM identities WHERE kind = {0} AND value = {1})"
+        columns = ", ".join(f'"{column}"' for column in TELEMETRY_COLUMNS)
+        keyed = ", ".join(
+            identity.format(HOTKEY, "hotkey")
+            if column == "hotkey"
+            else identity.format(WORKER_ID, "worker_id")
+            if column == "worker_id"
+            else f'"{column}"'
+            for column in TELEMETRY_COLUMNS
+        )
+        cursor.execute(
+            """
+            CREATE TABLE telemetry_keyed (
+                hotkey INTEGER,
+                uid TEXT,
+                timestamp INTEGER NOT NULL,
+                boot_time INT,
+                last_operation_time INT,
+                current_time INT,
+                twitter_auth_errors INT,
+                twitter_errors INT,
+                twitter_ratelimit_errors INT,
+                twitter_returned_other INT,
+                twitter_returned_profiles INT,
+                twitter_returned_tweets INT,
+                twitter_scrapes INT,
+                web_errors INT,
+                web_success INT,
+                worker_id INTEGER
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO telemetry_keyed (rowid, {columns})
+            SELECT rowid, {keyed} FROM telemetry
+            """
+        )
+        cursor.execute("DROP TABLE telemetry")
+        cursor.execute("ALTER TABLE telemetry_keyed RENAME TO telemetry")
+        cursor.execute(
+            """
+            CREATE INDEX idx_telemetry_hotkey_timestamp
+            ON telemetry (hotkey, timestamp)
+            """
+        )
+
+        cursor.execute(
+            """
+            CREATE TABLE telemetry_rollups_keyed (
+                hotkey INTEGER,
+                interval_start INTEGER,
+                sample_count INT,
+                reset_count INT,
+                first_timestamp INTEGER,
+                last_timestamp INTEGER,
+                min_twitter_returned_tweets INT,
+                max_twitter_returned_tweets INT,
+                PRIMARY KEY (hotkey, interval_start)
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO telemetry_rollups_keyed
+            SELECT {identity.format(HOTKEY, "hotkey")}, interval_start,
+                   sample_count, reset_count, first_timestamp, last_timestamp,
+                   min_twitter_returned_tweets, max_twitter_returned_tweets
+            FROM telemetry_rollups
+            """
+        )
+        cursor.execute("DROP TABLE telemetry_rollups")
+        cursor.execute(
+            "ALTER TABLE telemetry_rollups_keyed RENAME TO telemetry_rollups"
+        )
+
+        cursor.execute("DROP TABLE telemetry_delta_state")
+        cursor.execute(
+            """
+            CREATE TABLE telemetry_delta_state (
+                hotkey INTEGER PRIMARY KEY,
+                sample_count INT,
+                reset_count INT,
+                state TEXT
+            )
+        """
+        )
+
+    def _add_run_columns(self, cursor):
+        """
+        Store repeated samples as runs (see RUN_COLUMNS), existing rows
+        become runs of one sample. Builds the delta states, the last
+        migration touching the telemetry layout does.
+        """
+        cursor.execute("ALTER TABLE telemetry ADD COLUMN last_seen INTEGER")
+        cursor.execute("ALTER TABLE telemetry ADD COLUMN last_current_time INT")
+        cursor.execute(
+            "ALTER TABLE telemetry ADD COLUMN run_length INTEGER NOT NULL DEFAULT 1"
+        )
+        cursor.execute(
+            'UPDATE telemetry SET last_seen = timestamp, '
+            'last_current_time = "current_time"'
+        )
+        self._rebuild_delta_states(cursor)
+
+    def _decode_row(self, cursor, row):
+        """Replace the identity ids of a telemetry row by their strings."""
+        row = list(row)
+        row[0] = self.identities.get_value(cursor, row[0])
+        row[WORKER_ID_INDEX] = self.identities.get_value(cursor, row[WORKER_ID_INDEX])
+        return tuple(row)
+
+    def _save_delta_state(self, cursor, state):
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO telemetry_delta_state
+            (hotkey, sample_count, reset_count, state)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                self.identities.get_id(cursor, HOTKEY, state.hotkey),
+                state.sample_count,
+                state.reset_count,
+                state.to_json(),
+            ),
+        )
+
+    def _load_delta_state(self, cursor, hotkey_id):
+        cursor.execute(
+            """
+            SELECT sample_count, reset_count, state
+            FROM telemetry_delta_state WHERE hotkey = ?
+            """,
+            (hotkey_id,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        hotkey = self.identities.get_value(cursor, hotkey_id)
+        return DeltaState.from_json(hotkey, *row)
 
-            if "worker_id" not in columns:
-                # Add the worker_id column if it doesn't exist
+    def _rebuild_delta_states(self, cursor, hotkeys=None):
+        """
+        Recompute the delta state of the given hotkey ids (all when None)
+        from their remaining telemetry, after rows were removed.
+        """
+        if hotkeys is None:
+            cursor.execute("DELETE FROM telemetry_delta_state")
+            states = self._query_delta_states(cursor)
+        else:
+            states = []
+            hotkeys = list(hotkeys)
+            for i in range(0, len(hotkeys), 500):
+                chunk = hotkeys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
                 cursor.execute(
-                    """
-                    ALTER TABLE telemetry
-                    ADD COLUMN worker_id TEXT
-                    """
+                    f"""
+                    DELETE FROM telemetry_delta_state
+                    WHERE hotkey IN ({placeholders})
+                    """,
+                    chunk,
                 )
-                conn.commit()
+                states.extend(self._query_delta_states(cursor, chunk))
+        for state in states:
+            self._save_delta_state(cursor, state)
+
+    def _query_delta_states(self, cursor, hotkeys=None):
+        """
+        Compute the delta state of every hotkey (or only the given ids) in
+        a single query. The baseline resets whenever twitter_returned_tweets
+        drops below all earlier samples, i.e. it is the last sample below
+        the running minimum, exactly like WeightsManager._get_delta_node_data.
+        Only the first sample of a run can be a reset.
+        """
+        where, params = "", []
+        if hotkeys is not None:
+            where = f"WHERE hotkey IN ({','.join('?' * len(hotkeys))})"
+            params = list(hotkeys)
+        # Quoted, current_time would otherwise be the CURRENT_TIME keyword
+        quoted = [f'"{column}"' for column in TELEMETRY_COLUMNS]
+        columns = ", ".join(quoted + ["last_seen", "last_current_time"])
+        baseline_columns = ", ".join(f"b.{column}" for column in quoted)
+        # The latest sample is the last one of the latest run
+        latest_columns = ", ".join(
+            "l.last_seen"
+            if column == '"timestamp"'
+            else "l.last_current_time"
+            if column == '"current_time"'
+            else f"l.{column}"
+            for column in quoted
+        )
+        cursor.execute(
+            f"""
+            WITH ordered AS MATERIALIZED (
+                SELECT
+                    {columns},
+                    SUM(run_length) OVER (PARTITION BY hotkey) AS sample_count,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY hotkey ORDER BY timestamp DESC, rowid DESC
+                    ) AS from_end,
+                    COALESCE(
+                        twitter_returned_tweets < MIN(twitter_returned_tweets) OVER (
+                            PARTITION BY hotkey ORDER BY timestamp, rowid
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                        ),
+                        ROW_NUMBER() OVER (
+                            PARTITION BY hotkey ORDER BY timestamp, rowid
+                        ) = 1
+                    ) AS is_reset
+                FROM telemetry
+                {where}
+            ),
+            ranked AS MATERIALIZED (
+                SELECT
+                    *,
+                    SUM(is_reset) OVER (PARTITION BY hotkey) - 1 AS reset_count,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY hotkey, is_reset ORDER BY from_end
+                    ) AS reset_rank
+                FROM ordered
+            )
+            SELECT l.hotkey, l.sample_count, l.reset_count,
+                   {baseline_columns}, {latest_columns}
+            FROM ranked l
+            JOIN ranked b
+              ON b.hotkey = l.hotkey AND b.is_reset AND b.reset_rank = 1
+            WHERE l.from_end = 1
+            """,
+            params,
+        )
+        width = len(TELEMETRY_COLUMNS)
+        return [
+            DeltaState(
+                self.identities.get_value(cursor, row[0]),
+                row[1],
+                row[2],
+                self._decode_row(cursor, row[3 : 3 + width]),
+                self._decode_row(cursor, row[3 + width :]),
+            )
+            for row in cursor.fetchall()
+        ]
+
+    def _extend_run(self, cursor, hotkey_id, timestamp, current_time):
+        """
+        Add a sample to the latest run of a hotkey.
+
+        :return: rowid of the run, None if the hotkey has no telemetry
+        """
+        cursor.execute(
+            """
+            SELECT rowid FROM telemetry WHERE hotkey = ?
+            ORDER BY timestamp DESC, rowid DESC LIMIT 1
+            """,
+            (hotkey_id,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        cursor.execute(
+            """
+            UPDATE telemetry
+            SET last_seen = ?, last_current_time = ?, run_length = run_length + 1
+            WHERE rowid = ?
+            """,
+            (timestamp, current_time, row[0]),
+        )
+        return row[0]
 
     def add_telemetry(self, telemetry_data):
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        """
+        Store a sample. A sample repeating the latest one of its hotkey apart
+        from timestamp and current_time extends that run instead of adding a
+        row, so the table grows with activity rather than with time.
+        """
+        with self.lock.write(), self.connect() as conn:
+            hotkey_id = self.identities.get_or_create_id(
+                conn, HOTKEY, telemetry_data.hotkey
+            )
+            worker_id = self.identities.get_or_create_id(
+                conn, WORKER_ID, telemetry_data.worker_id
+            )
             cursor = conn.cursor()
+            now = int(time.time())
+            state = self._load_delta_state(cursor, hotkey_id)
+            rowid = None
+            if state is not None and continues_run(
+                state.latest, sample_row(telemetry_data, now)
+            ):
+                rowid = self._extend_run(
+                    cursor, hotkey_id, now, telemetry_data.current_time
+                )
+            if rowid is None:
+                rowid = self._insert_run(
+                    cursor, hotkey_id, worker_id, now, telemetry_data
+                )
+            cursor.execute(
+                f"SELECT {RUN_SELECT} FROM telemetry WHERE rowid = ?", (rowid,)
+            )
+            row = run_samples(self._decode_row(cursor, cursor.fetchone()))[-1]
+            self._save_delta_state(cursor, advance(state, row))
+            conn.commit()
+
+    def _insert_run(self, cursor, hotkey_id, worker_id, timestamp, telemetry_data):
+        """Insert a sample as a run of one, return its rowid."""
+        cursor.execute(
+            """
+            INSERT INTO telemetry (hotkey, uid, timestamp, boot_time,
+            last_operation_time, "current_time", twitter_auth_errors,
+            twitter_errors, twitter_ratelimit_errors, twitter_returned_other,
+            twitter_returned_profiles, twitter_returned_tweets, twitter_scrapes,
+            web_errors, web_success, worker_id, last_seen, last_current_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                hotkey_id,
+                telemetry_data.uid,
+                timestamp,
+                telemetry_data.boot_time,
+                telemetry_data.last_operation_time,
+                telemetry_data.current_time,
+                telemetry_data.twitter_auth_errors,
+                telemetry_data.twitter_errors,
+                telemetry_data.twitter_ratelimit_errors,
+                telemetry_data.twitter_returned_other,
+                telemetry_data.twitter_returned_profiles,
+                telemetry_data.twitter_returned_tweets,
+                telemetry_data.twitter_scrapes,
+                telemetry_data.web_errors,
+                telemetry_data.web_success,
+                worker_id,
+                timestamp,
+                telemetry_data.current_time,
+            ),
+        )
+        return cursor.lastrowid
+
+    def clean_old_entries(self, hours, limit=None):
+        """
+        Remove all telemetry entries older than the specified number of hours.
+        A run is removed once its last sample is older, a run reaching past
+        the cutoff is trimmed to its samples after it (see trim_run).
+
+        :param limit: Maximum number of entries to delete, None for all
+        :return: Number of entries deleted
+        """
+        cutoff = int(time.time() - hours * 3600)
+        with self.lock.write(), self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TEMP TABLE expired AS
+                SELECT rowid AS rid, hotkey FROM telemetry
+                WHERE last_seen < ?
+                LIMIT ?
+                """,
+                (cutoff, -1 if limit is None else limit),
+            )
+            cursor.execute(
+                "DELETE FROM telemetry WHERE rowid IN (SELECT rid FROM expired)"
+            )
+            removed = cursor.rowcount
+            cursor.execute("SELECT DISTINCT hotkey FROM expired")
+            hotkeys = {row[0] for row in cursor.fetchall()}
+            cursor.execute("DROP TABLE expired")
+            cursor.execute(
+                f"""
+                SELECT rowid, {RUN_SELECT} FROM telemetry
+                WHERE timestamp < ? AND last_seen >= ?
+                """,
+                (cutoff, cutoff),
+            )
+            for rowid, *run in cursor.fetchall():
+                trimmed = trim_run(run, cutoff)
+                cursor.execute(
+                    """
+                    UPDATE telemetry
+                    SET timestamp = ?, "current_time" = ?, run_length = ?
+                    WHERE rowid = ?
+                    """,
+                    (
+                        trimmed[TIMESTAMP_INDEX],
+                        trimmed[CURRENT_TIME_INDEX],
+                        trimmed[-1],
+                        rowid,
+                    ),
+                )
+                hotkeys.add(run[0])
+            self._rebuild_delta_states(cursor, hotkeys)
             cursor.execute(
                 """
-                INSERT INTO telemetry (hotkey, uid, boot_time, last_operation_time, current_time, 
-                twitter_auth_errors, twitter_errors, twitter_ratelimit_errors, twitter_returned_other, 
-                twitter_returned_profiles, twitter_returned_tweets, twitter_scrapes, web_errors, web_success,
-                worker_id) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                DELETE FROM telemetry_rollups
+                WHERE last_timestamp < ?
                 """,
-                (
-                    telemetry_data.hotkey,
-                    telemetry_data.uid,
-                    telemetry_data.boot_time,
-                    telemetry_data.last_operation_time,
-                    telemetry_data.current_time,
-                    telemetry_data.twitter_auth_errors,
-                    telemetry_data.twitter_errors,
-                    telemetry_data.twitter_ratelimit_errors,
-                    telemetry_data.twitter_returned_other,
-                    telemetry_data.twitter_returned_profiles,
-                    telemetry_data.twitter_returned_tweets,
-                    telemetry_data.twitter_scrapes,
-                    telemetry_data.web_errors,
-                    telemetry_data.web_success,
-                    telemetry_data.worker_id,
-                ),
+                (cutoff,),
             )
             conn.commit()
+            return removed
 
-    def clean_old_entries(self, hours):
+    def compact_old_entries(self, age_hours, interval_minutes):
         """
-        Remove all telemetry entries older than the specified number of hours.
+        Collapse raw samples older than age_hours into telemetry_rollups.
+
+        Scoring only depends on the final baseline and the latest sample of
+        each hotkey. The baseline resets whenever twitter_returned_tweets
+        drops below the running minimum, so a sample can only end up as the
+        final baseline if it is not above any later one. Once expiry drops
+        the samples before it, any such sample can become the baseline, so
+        all of them are kept, as well as the sample before one without a
+        tweet count (which never moves the baseline off the oldest sample).
+        All other old samples are removed, the two most recent samples per
+        hotkey are always kept. Removed samples are summarised per
+        interval_minutes, including how many counter resets they contained.
+        A run of repeated samples is compacted as a whole, once its last
+        sample is old enough.
+
+        :param age_hours: Only samples older than this are compacted
+        :param interval_minutes: Width of a rollup interval
+        :return: Number of rows (runs) removed
         """
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        interval_seconds = max(1, int(interval_minutes * 60))
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                DELETE FROM telemetry 
-                WHERE timestamp < datetime('now', ?)
+                CREATE TEMP TABLE compacted AS
+                WITH ordered AS (
+                    SELECT
+                        rowid AS rid,
+                        hotkey,
+                        timestamp,
+                        last_seen,
+                        run_length,
+                        twitter_returned_tweets AS tweets,
+                        LAG(twitter_returned_tweets) OVER w AS previous_tweets,
+                        LEAD(twitter_returned_tweets) OVER w AS next_tweets,
+                        MIN(twitter_returned_tweets) OVER (
+                            w ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                        ) AS later_min_tweets,
+                        COUNT(*) OVER w_desc AS from_end
+                    FROM telemetry
+                    WINDOW
+                        w AS (PARTITION BY hotkey ORDER BY timestamp, rowid),
+                        w_desc AS (
+                            PARTITION BY hotkey ORDER BY timestamp DESC, rowid DESC
+                            ROWS UNBOUNDED PRECEDING
+                        )
+                )
+                SELECT rid, hotkey, timestamp, last_seen, run_length, tweets,
+                       COALESCE(tweets < previous_tweets, 0) AS is_reset
+                FROM ordered
+                WHERE last_seen < ?
+                  AND from_end > 2
+                  AND tweets IS NOT NULL
+                  AND next_tweets IS NOT NULL
+                  AND tweets > later_min_tweets
                 """,
-                (f"-{hours} hours",),
+                (int(time.time() - age_hours * 3600),),
             )
+            cursor.execute(
+                """
+                INSERT INTO telemetry_rollups (
+                    hotkey, interval_start, sample_count, reset_count,
+                    first_timestamp, last_timestamp,
+                    min_twitter_returned_tweets, max_twitter_returned_tweets
+                )
+                SELECT
+                    hotkey,
+                    (timestamp / ?) * ?,
+                    SUM(run_length), SUM(is_reset), MIN(timestamp), MAX(last_seen),
+                    MIN(tweets), MAX(tweets)
+                FROM compacted
+                WHERE true
+                GROUP BY 1, 2
+                ON CONFLICT (hotkey, interval_start) DO UPDATE SET
+                    sample_count = sample_count + excluded.sample_count,
+                    reset_count = reset_count + excluded.reset_count,
+                    first_timestamp = MIN(first_timestamp, excluded.first_timestamp),
+                    last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+                    min_twitter_returned_tweets = MIN(
+                        min_twitter_returned_tweets,
+                        excluded.min_twitter_returned_tweets
+                    ),
+                    max_twitter_returned_tweets = MAX(
+                        max_twitter_returned_tweets,
+                        excluded.max_twitter_returned_tweets
+                    )
+                """,
+                (interval_seconds, interval_seconds),
+            )
+            cursor.execute(
+                "DELETE FROM telemetry WHERE rowid IN (SELECT rid FROM compacted)"
+            )
+            removed = cursor.rowcount
+            cursor.execute("SELECT DISTINCT hotkey FROM compacted")
+            self._rebuild_delta_states(cursor, [row[0] for row in cursor.fetchall()])
+            cursor.execute("DROP TABLE compacted")
             conn.commit()
+            return removed
 
-    def get_telemetry_by_hotkey(self, hotkey):
-        """Retrieve telemetry data for a specific hotkey."""
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+    def get_rollups_by_hotkey(self, hotkey):
+        """Retrieve the telemetry rollups for a specific hotkey."""
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT * FROM telemetry WHERE hotkey = ?
+                SELECT * FROM telemetry_rollups
+                WHERE hotkey = ?
+                ORDER BY interval_start
                 """,
-                (hotkey,),
+                (self.identities.get_id(cursor, HOTKEY, hotkey),),
             )
-            telemetry_data = cursor.fetchall()
-            return telemetry_data
+            return [(hotkey,) + row[1:] for row in cursor.fetchall()]
+
+    def get_telemetry_by_hotkey(
+        self, hotkey, since=None, until=None, limit=None, order="asc"
+    ):
+        """
+        Retrieve telemetry data for a specific hotkey in time order, read
+        from the (hotkey, timestamp) index.
+
+        :param since: Only samples at or after this unix timestamp
+        :param until: Only samples before this unix timestamp
+        :param limit: Maximum number of samples, None for all
+        :param order: "asc" for oldest first, "desc" for latest first
+        """
+        descending = is_descending(order)
+        direction = "DESC" if descending else "ASC"
+        with self.lock.read(), self.connect() as conn:
+            cursor = conn.cursor()
+            hotkey_id = self.identities.get_id(cursor, HOTKEY, hotkey)
+            conditions = ["hotkey = ?"]
+            params = [hotkey_id]
+            if since is not None:
+                # Runs don't overlap, the last one starting before since is
+                # the only earlier one that can reach into the range
+                conditions.append(
+                    """
+                    timestamp >= COALESCE((
+                        SELECT MAX(timestamp) FROM telemetry
+                        WHERE hotkey = ? AND timestamp < ?
+                    ), ?)
+                    """
+                )
+                params.extend([hotkey_id, int(since), int(since)])
+            if until is not None:
+                conditions.append("timestamp < ?")
+                params.append(int(until))
+            query = f"""
+                SELECT {RUN_SELECT} FROM telemetry
+                WHERE {" AND ".join(conditions)}
+                ORDER BY timestamp {direction}, rowid {direction}
+            """
+            if limit is not None:
+                # Every run has a sample in range except, possibly, that one
+                query += " LIMIT ?"
+                params.append(int(limit) + 1)
+            cursor.execute(query, params)
+            runs = [self._decode_row(cursor, row) for row in cursor.fetchall()]
+            samples = select_samples(runs, since, until, descending)
+            return list(islice(samples, limit))
+
+    def get_latest_telemetry(self, hotkey):
+        """
+        Latest telemetry row of a hotkey, read from its delta state.
+
+        :return: The row, None if the hotkey has no telemetry
+        """
+        with self.lock.read(), self.connect() as conn:
+            cursor = conn.cursor()
+            hotkey_id = self.identities.get_id(cursor, HOTKEY, hotkey)
+            if hotkey_id is None:
+                return None
+            state = self._load_delta_state(cursor, hotkey_id)
+            return None if state is None else state.latest
 
     def get_all_hotkeys_with_telemetry(self):
         """Retrieve all unique hotkeys that have at least one telemetry entry."""
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT DISTINCT hotkey FROM telemetry
                 """
             )
-            hotkeys = [row[0] for row in cursor.fetchall()]
+            hotkeys = [
+                self.identities.get_value(cursor, row[0])
+                for row in cursor.fetchall()
+            ]
             return hotkeys
 
     def delete_telemetry_by_hotkey(self, hotkey):
         """Delete all telemetry entries for a specific hotkey."""
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.write(), self.connect() as conn:
             cursor = conn.cursor()
+            hotkey = self.identities.get_id(cursor, HOTKEY, hotkey)
             cursor.execute(
                 """
                 DELETE FROM telemetry WHERE hotkey = ?
                 """,
                 (hotkey,),
             )
+            rows_deleted = cursor.rowcount
+            cursor.execute(
+                "DELETE FROM telemetry_delta_state WHERE hotkey = ?", (hotkey,)
+            )
             conn.commit()
-            return cursor.rowcount  # Return the number of rows deleted
+            return rows_deleted  # Return the number of rows deleted
 
     def get_all_telemetry(self):
         """Retrieve all telemetry data from the database."""
-        with self.lock, sqlite3.connect(self.db_path) as conn:
+        with self.lock.read(), self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {RUN_SELECT} FROM telemetry")
+            telemetry_data = [
+                sample
+                for row in cursor.fetchall()
+                for sample in run_samples(self._decode_row(cursor, row))
+            ]
+            return telemetry_data
+
+    def get_delta_states(self):
+        """Retrieve the delta state of every hotkey with telemetry."""
+        with self.lock.read(), self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT * FROM telemetry
+                SELECT hotkey, sample_count, reset_count, state
+                FROM telemetry_delta_state
                 """
             )
-            telemetry_data = cursor.fetchall()
-            return telemetry_data
+            return [
+                DeltaState.from_json(
+                    self.identities.get_value(cursor, row[0]), *row[1:]
+                )
+                for row in cursor.fetchall()
+            ]
+
+    def get_delta_telemetry(self):
+        """
+        Compute the delta state of every hotkey from the raw telemetry in a
+        single window-function query, independent of telemetry_delta_state.
+        """
+        with self.lock.read(), self.connect() as conn:
+            return self._query_delta_states(conn.cursor())
@@ -0,0 +1,64 @@
+import json
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# Position of twitter_returned_tweets in a telemetry row
+TWEETS_INDEX = 11
+
+
+@dataclass
+class DeltaState:
+    """
+    Running scoring state of one hotkey: the current baseline (the last
+    counter reset) and latest telemetry rows, in telemetry table layout.
+    """
+
+    hotkey: str
+    sample_count: int
+    reset_count: int
+    baseline: tuple
+    latest: tuple
+
+    def to_json(self):
+        return json.dumps([list(self.baseline), list(self.latest)])
+
+    @classmethod
+    def from_json(cls, hotkey, sample_count, reset_count, value):
+        baseline, latest = json.loads(value)
+        return cls(hotkey, sample_count, reset_count, tuple(baseline), tuple(latest))
+
+
+def advance(state: Optional[DeltaState], row) -> DeltaState:
+    """
+    Fold one telemetry row into a hotkey's state, matching the baseline walk
+    in WeightsManager._get_delta_node_data: the baseline moves to any sample
+    whose twitter_returned_tweets is below the current baseline.
+
+    :param state: Current state of the row's hotkey, or None
+    :param row: Telemetry row newer than every row already folded in
+    :return: The updated state
+    """
+    row = tuple(row)
+    if state is None:
+        return DeltaState(row[0], 1, 0, row, row)
+    tweets = row[TWEETS_INDEX]
+    baseline_tweets = state.baseline[TWEETS_INDEX]
+    if tweets is not None and baseline_tweets is not None and tweets < baseline_tweets:
+        return DeltaState(
+            state.hotkey, state.sample_count + 1, state.reset_count + 1, row, row
+        )
+    return DeltaState(
+        state.hotkey, state.sample_count + 1, state.reset_count, state.baseline, row
+    )
+
+
+def build_states(rows: Iterable) -> dict:
+    """
+    Build the states of all hotkeys from telemetry rows in time order.
+
+    :return: Dict of hotkey -> DeltaState
+    """
+    states = {}
+    for row in rows:
+        states[row[0]] = advance(states.get(row[0]), row)
+    return states
@@ -0,0 +1,474 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from array import array
+from contextlib import ExitStack
+from itertools import islice
+
+from db.base import TelemetryBackend
+from db.rw_lock import ReadWriteLock
+from db.telemetry_database import is_descending
+from db.telemetry_delta import advance, build_states
+
+# timestamp, uid id, hotkey id, worker_id id, then the twelve counters in the
+# column order of the telemetry table
+RECORD = struct.Struct("<qIIIqqqqqqqqqqqq")
+COUNTER_FIELDS = (
+    "boot_time",
+    "last_operation_time",
+    "current_time",
+    "twitter_auth_errors",
+    "twitter_errors",
+    "twitter_ratelimit_errors",
+    "twitter_returned_other",
+    "twitter_returned_profiles",
+    "twitter_returned_tweets",
+    "twitter_scrapes",
+    "web_errors",
+    "web_success",
+)
+NULL_INT = -(2**63)
+NULL_ID = 0xFFFFFFFF
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+
+
+class _Segment:
+    """One append-only segment file plus its in-memory hotkey index."""
+
+    def __init__(self, path, start):
+        self.path = path
+        self.start = start
+        self.count = 0
+        self.index = {}  # hotkey id -> array of record positions
+        self._map = None
+        self._mapped_count = 0
+        self._map_lock = threading.Lock()
+
+    def add_to_index(self, position, hotkey_id):
+        self.index.setdefault(hotkey_id, array("I")).append(position)
+
+    def view(self):
+        """Map the file and return a memoryview over its complete records."""
+        count = self.count
+        if count == 0:
+            return memoryview(b"")
+        with self._map_lock:
+            # Only the active segment grows, sealed segments map once
+            if self._map is None or self._mapped_count < count:
+                self.close()
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapped_count = count
+            return memoryview(self._map)[: count * RECORD.size]
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A reader still holds a view, the map is released with it
+                pass
+            self._map = None
+
+
+class TelemetryLogDatabase(TelemetryBackend):
+    """
+    Append-only telemetry storage engine.
+
+    Samples are written as fixed-size binary records to segment files that
+    rotate every segment_minutes and are read back through mmap. Strings
+    (hotkeys, uids, worker_ids) live in a small append-only dictionary file
+    and each segment keeps an in-memory index of record positions per
+    hotkey, rebuilt from the segment on startup. Rows are returned in the
+    same layout as TelemetryDatabase so TelemetryStorage can use either.
+
+    Expiry drops whole segments and hides the remaining expired records
+    behind a persisted cutoff; deleting a hotkey appends a tombstone that
+    hides all of its earlier records. Per-hotkey delta states are rebuilt
+    from the log on startup and advanced on every append.
+    """
+
+    def __init__(self, directory="./telemetry_log", segment_minutes=60):
+        self.directory = directory
+        self.segment_seconds = max(60, int(segment_minutes * 60))
+        self.lock = ReadWriteLock()
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._dictionary_path = os.path.join(self.directory, "dictionary.log")
+        self._tombstones_path = os.path.join(self.directory, "tombstones.log")
+        self._meta_path = os.path.join(self.directory, "meta.json")
+
+        self.strings = []
+        self.string_ids = {}
+        self.tombstones = {}  # hotkey id -> (segment start, record count)
+        self.expired_before = 0
+        self.segments = []
+
+        self._load_dictionary()
+        self._load_tombstones()
+        self._load_meta()
+        self._load_segments()
+        self.delta_states = build_states(self._scan())
+
+    # Loading
+
+    def _load_dictionary(self):
+        if not os.path.exists(self._dictionary_path):
+            return
+        with open(self._dictionary_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Partial line from an interrupted write
+                    break
+                self._remember_string(json.loads(line))
+
+    def _load_tombstones(self):
+        if not os.path.exists(self._tombstones_path):
+            return
+        with open(self._tombstones_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                hotkey_id, segment_start, count = json.loads(line)
+                self.tombstones[hotkey_id] = (segment_start, count)
+
+    def _load_meta(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                self.expired_before = json.load(f).get("expired_before", 0)
+
+    def _load_segments(self):
+        names = sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for name in names:
+            start = int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            segment = _Segment(os.path.join(self.directory, name), start)
+            size = os.path.getsize(segment.path)
+            if size % RECORD.size:
+                # Drop a partially written trailing record
+                with open(segment.path, "r+b") as f:
+                    f.truncate(size - size % RECORD.size)
+            segment.count = size // RECORD.size
+            for position, record in enumerate(RECORD.iter_unpack(segment.view())):
+                segment.add_to_index(position, record[2])
+            self.segments.append(segment)
+
+    # Helpers
+
+    def _remember_string(self, value):
+        self.string_ids[value] = len(self.strings)
+        self.strings.append(value)
+
+    def _string_id(self, value):
+        if value is None:
+            return NULL_ID
+        value = str(value)
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            with open(self._dictionary_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(value) + "\n")
+            self._remember_string(value)
+            string_id = self.string_ids[value]
+        return string_id
+
+    def _string(self, string_id):
+        return None if string_id == NULL_ID else self.strings[string_id]
+
+    def _segment_for(self, timestamp):
+        start = timestamp - timestamp % self.segment_seconds
+        if self.segments and self.segments[-1].start >= start:
+            return self.segments[-1]
+        segment = _Segment(
+            os.path.join(
+                self.directory, f"{SEGMENT_PREFIX}{start:012d}{SEGMENT_SUFFIX}"
+            ),
+            start,
+        )
+        self.segments.append(segment)
+        return segment
+
+    def _is_visible(self, segment, position, timestamp, hotkey_id):
+        if timestamp < self.expired_before:
+            return False
+        tombstone = self.tombstones.get(hotkey_id)
+        return tombstone is None or (segment.start, position) >= tombstone
+
+    def _to_row(self, record):
+        counters = [None if value == NULL_INT else value for value in record[4:]]
+        return (
+            self._string(record[2]),
+            self._string(record[1]),
+            record[0],
+            *counters,
+            self._string(record[3]),
+        )
+
+    def _scan(self, hotkey_id=None):
+        """Yield visible rows, optionally only those of one hotkey."""
+        for segment in list(self.segments):
+            view = segment.view()
+            if hotkey_id is None:
+                for position, record in enumerate(RECORD.iter_unpack(view)):
+                    if self._is_visible(segment, position, record[0], record[2]):
+                        yield self._to_row(record)
+                continue
+            for position in segment.index.get(hotkey_id, ()):
+                record = RECORD.unpack_from(view, position * RECORD.size)
+                if self._is_visible(segment, position, record[0], hotkey_id):
+                    yield self._to_row(record)
+
+    def _scan_range(self, hotkey_id, since, until, descending):
+        """
+        Yield the visible rows of one hotkey from since (inclusive) to until
+        (exclusive), skipping segments that end before since.
+        """
+        segments = list(self.segments)
+        if descending:
+            segments.reverse()
+        for segment in segments:
+            # A segment only holds records before its start + segment_seconds
+            if since is not None and segment.start + self.segment_seconds <= since:
+                continue
+            view = segment.view()
+            positions = segment.index.get(hotkey_id, ())
+            if descending:
+                positions = reversed(positions)
+            for position in positions:
+                record = RECORD.unpack_from(view, position * RECORD.size)
+                timestamp = record[0]
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp >= until:
+                    continue
+                if self._is_visible(segment, position, timestamp, hotkey_id):
+                    yield self._to_row(record)
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"expired_before": self.expired_before}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    # TelemetryDatabase interface
+
+    def add_telemetry(self, telemetry_data):
+        with self.lock.write():
+            timestamp = int(time.time())
+            hotkey_id = self._string_id(telemetry_data.hotkey)
+            counters = []
+            for field in COUNTER_FIELDS:
+                value = getattr(telemetry_data, field)
+                counters.append(NULL_INT if value is None else int(value))
+            record = RECORD.pack(
+                timestamp,
+                self._string_id(telemetry_data.uid),
+                hotkey_id,
+                self._string_id(telemetry_data.worker_id),
+                *counters,
+            )
+            segment = self._segment_for(timestamp)
+            with open(segment.path, "ab") as f:
+                f.write(record)
+            segment.add_to_index(segment.count, hotkey_id)
+            segment.count += 1
+
+            row = self._to_row(RECORD.unpack(record))
+            self.delta_states[row[0]] = advance(self.delta_states.get(row[0]), row)
+
+    def clean_old_entries(self, hours, limit=None):
+        """
+        Remove all telemetry entries older than the specified number of hours.
+        Expiry only drops whole segment files, so limit is not needed.
+
+        :return: Number of records in the dropped segments
+        """
+        removed = 0
+        with self.lock.write():
+            cutoff = int(time.time() - hours * 3600)
+            affected = set()
+            for segment in self.segments:
+                if segment.start < cutoff:
+                    affected.update(segment.index)
+            self.expired_before = max(self.expired_before, cutoff)
+            self._save_meta()
+            while (
+                self.segments
+                and self.segments[0].start + self.segment_seconds <= cutoff
+                and self.segments[0] is not self.segments[-1]
+            ):
+                segment = self.segments.pop(0)
+                removed += segment.count
+                segment.close()
+                os.remove(segment.path)
+            for hotkey_id in affected:
+                hotkey = self.strings[hotkey_id]
+                self.delta_states.pop(hotkey, None)
+                self.delta_states.update(build_states(self._scan(hotkey_id)))
+        return removed
+
+    def compact_old_entries(self, age_hours, interval_minutes):
+        """
+        Records are fixed size and only ever appended, so there is nothing to
+        compact; expired segments are dropped by clean_old_entries.
+
+        :return: Number of raw samples removed (always 0)
+        """
+        return 0
+
+    def get_rollups_by_hotkey(self, hotkey):
+        """The log engine keeps no rollups."""
+        return []
+
+    def get_telemetry_by_hotkey(
+        self, hotkey, since=None, until=None, limit=None, order="asc"
+    ):
+        """
+        Retrieve telemetry data for a specific hotkey in time order.
+
+        :param since: Only samples at or after this unix timestamp
+        :param until: Only samples before this unix timestamp
+        :param limit: Maximum number of samples, None for all
+        :param order: "asc" for oldest first, "desc" for latest first
+        """
+        descending = is_descending(order)
+        with self.lock.read():
+            hotkey_id = self.string_ids.get(hotkey)
+            if hotkey_id is None:
+                return []
+            rows = self._scan_range(hotkey_id, since, until, descending)
+            return list(islice(rows, limit))
+
+    def get_latest_telemetry(self, hotkey):
+        """Latest telemetry row of a hotkey from its delta state, or None."""
+        with self.lock.read():
+            state = self.delta_states.get(hotkey)
+            return None if state is None else state.latest
+
+    def get_all_hotkeys_with_telemetry(self):
+        """Retrieve all unique hotkeys that have at least one telemetry entry."""
+        with self.lock.read():
+            hotkey_ids = set()
+            for segment in self.segments:
+                view = segment.view()
+                for hotkey_id, positions in segment.index.items():
+                    if hotkey_id in hotkey_ids:
+                        continue
+                    position = positions[-1]
+                    timestamp = RECORD.unpack_from(view, position * RECORD.size)[0]
+                    if self._is_visible(segment, position, timestamp, hotkey_id):
+                        hotkey_ids.add(hotkey_id)
+            return [self.strings[hotkey_id] for hotkey_id in hotkey_ids]
+
+    def delete_telemetry_by_hotkey(self, hotkey):
+        """Delete all telemetry entries for a specific hotkey."""
+        with self.lock.write():
+            hotkey_id = self.string_ids.get(hotkey)
+            if hotkey_id is None:
+                return 0
+            deleted = sum(1 for _ in self._scan(hotkey_id))
+            if self.segments:
+                tombstone = (self.segments[-1].start, self.segments[-1].count)
+            else:
+                tombstone = (0, 0)
+            with open(self._tombstones_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps([hotkey_id, *tombstone]) + "\n")
+            self.tombstones[hotkey_id] = tombstone
+            self.delta_states.pop(hotkey, None)
+            return deleted
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the log to a directory named like TelemetryStorage names it
+        (target_path without extension plus "_log"), without blocking the
+        writers for the copy.
+
+        The files are opened and their lengths taken under the read lock.
+        They are only ever appended to, so copying those lengths gives the
+        log as of that moment, even if a segment expires while it is copied
+        (the open handle keeps it readable). The copy replaces the previous
+        one once it is complete.
+
+        :param pages_per_step: Copied in chunks of this many 4 KiB pages
+        :param step_pause_seconds: Pause between chunks
+        :return: Dict with the target path, files, size in bytes and seconds
+                 taken
+        """
+        started = time.monotonic()
+        target = f"{os.path.splitext(target_path)[0]}_log"
+        temporary = f"{target}.tmp"
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        chunk_size = max(1, pages_per_step) * 4096
+        copied = 0
+        try:
+            with ExitStack() as stack:
+                sources = []
+                with self.lock.read():
+                    meta = {"expired_before": self.expired_before}
+                    for path in (self._dictionary_path, self._tombstones_path):
+                        if os.path.exists(path):
+                            f = stack.enter_context(open(path, "rb"))
+                            sources.append((path, f, os.path.getsize(path)))
+                    for segment in self.segments:
+                        if segment.count:
+                            f = stack.enter_context(open(segment.path, "rb"))
+                            sources.append(
+                                (segment.path, f, segment.count * RECORD.size)
+                            )
+
+                with open(
+                    os.path.join(temporary, "meta.json"), "w", encoding="utf-8"
+                ) as f:
+                    json.dump(meta, f)
+                for path, source, length in sources:
+                    name = os.path.join(temporary, os.path.basename(path))
+                    with open(name, "wb") as target_file:
+                        remaining = length
+                        while remaining > 0:
+                            chunk = source.read(min(chunk_size, remaining))
+                            if not chunk:
+                                break
+                            target_file.write(chunk)
+                            remaining -= len(chunk)
+                            if remaining and step_pause_seconds > 0:
+                                time.sleep(step_pause_seconds)
+                    copied += length - remaining
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        previous = f"{target}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(target):
+            os.rename(target, previous)
+        os.rename(temporary, target)
+        shutil.rmtree(previous, ignore_errors=True)
+        return {
+            "path": target,
+            "files": len(sources) + 1,
+            "bytes": copied,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    def get_all_telemetry(self):
+        """Retrieve all telemetry data from the log."""
+        with self.lock.read():
+            return list(self._scan())
+
+    def get_delta_states(self):
+        """Retrieve the delta state of every hotkey with telemetry."""
+        with self.lock.read():
+            return list(self.delta_states.values())
+
+    def get_delta_telemetry(self):
+        """Compute the delta state of every hotkey from a full log scan."""
+        with self.lock.read():
+            return list(build_states(self._scan()).values())
@@ -18,6 +18,7 @@ from fastapi import FastAPI
 from validator.config import Config
 from validator.http_client import HttpClientManager
 from validator.background_tasks import BackgroundTasks
+from validator.snapshots import SNAPSHOT_CADENCE_SECONDS
 from validator.api_routes import ValidatorAPI
 from validator.network_operations import (
     make_non_streamed_get,
@@ -71,9 +72,6 @@ class Validator:
 
         self.routing_table = RoutingTable()
 
-        # Add flag to coordinate routing table updates with NATS publishing
-        self.routing_table_updating = False
-
         self.metagraph = Metagraph(netuid=self.netuid, substrate=self.substrate)
         self.metagraph.sync_nodes()
 
@@ -108,6 +106,19 @@ class Validator:
             # Start telemetry collection in its own task
             asyncio.create_task(self.background_tasks.telemetry_loop(60 * 10))
 
+            # Roll up old telemetry samples every 15 minutes
+            asyncio.create_task(
+                self.background_tasks.telemetry_compaction_loop(60 * 15)
+            )
+
+            # Chunked database cleanups, vacuum and optimize every 10 minutes
+            asyncio.create_task(self.background_tasks.maintenance_loop(60 * 10))
+
+            if SNAPSHOT_CADENCE_SECONDS > 0:
+                asyncio.create_task(
+                    self.background_tasks.snapshot_loop(SNAPSHOT_CADENCE_SECONDS)
+                )
+
             # Start process monitoring cleanup task
             asyncio.create_task(self.background_tasks.monitor_cleanup_loop())
 
@@ -165,7 +176,9 @@ class Validator:
         Closes:
         - HTTP client connections
         - Server instances
+        - Buffered error logs
         """
+        await asyncio.to_thread(self.node_manager.errors_storage.flush)
         await self.http_client_manager.stop()
         if self.server:
             await self.server.stop()
@@ -291,17 +304,11 @@ class Validator:
         """Calculate simulated scores based on recently fetched telemetry data."""
         logger.info("Starting score simulation based on recent telemetry...")
         try:
-            # 1. Fetch the latest telemetry data for reachable nodes
-            telemetry = self.telemetry_storage.get_all_telemetry()
-
-            data_to_score = self.weights_manager._get_delta_node_data(telemetry)
-
-            logger.info(f"Data to score: {data_to_score}")
-            # 2. Calculate weights (scores) using the WeightsManager
+            # 1-2. Scores of the latest telemetry deltas, the cached ones
+            # unless telemetry changed since the last poll
             logger.info("Calculating weights using WeightsManager...")
-            uids, scores = await self.weights_manager.calculate_weights(
-                data_to_score, simulation=True
-            )
+            result = await self.weights_manager.get_scores(simulation=True)
+            uids, scores = result.uids, result.weights
 
             logger.info(f"Weights calculated for {len(uids)} UIDs.")
 
@@ -309,16 +316,14 @@ class Validator:
                 logger.error("Mismatch or None returned from calculate_weights.")
                 return {"scores": []}  # Return empty if calculation failed
 
-            # 3. Map UIDs back to hotkeys using the metagraph
-            uid_to_hotkey = {
-                node.node_id: node.hotkey for node in self.metagraph.nodes.values()
-            }
+            # 3. Map UIDs back to hotkeys using the metagraph index
+            metagraph_index = self.metagraph_manager.index
 
             # 4. Format the scores for the API response - directly use raw scores from calculate_weights
             formatted_scores = [
-                {"hotkey": uid_to_hotkey.get(int(uid)), "score": float(score)}
+                {"hotkey": hotkey, "score": float(score)}
                 for uid, score in zip(uids, scores)
-                if int(uid) in uid_to_hotkey
+                if (hotkey := metagraph_index.hotkey(int(uid))) is not None
             ]
 
             logger.info(
@@ -0,0 +1,103 @@
+"""
+Benchmark concurrent telemetry reads with the reader/writer lock against the
+previous behaviour where every operation was serialised through one lock.
+
+Usage:
+    python scripts/benchmark_db_reads.py [--rows 20000] [--readers 8] [--reads 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.telemetry_database import TelemetryDatabase  # noqa: E402
+
+
+class ExclusiveLock:
+    """Single mutex for reads and writes, i.e. the old threading.Lock setup."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def read(self):
+        with self._lock:
+            yield
+
+    @contextmanager
+    def write(self):
+        with self._lock:
+            yield
+
+
+def populate(db, rows):
+    sample = SimpleNamespace(
+        uid=1,
+        boot_time=0,
+        last_operation_time=0,
+        current_time=0,
+        twitter_auth_errors=0,
+        twitter_errors=0,
+        twitter_ratelimit_errors=0,
+        twitter_returned_other=0,
+        twitter_returned_profiles=0,
+        twitter_returned_tweets=0,
+        twitter_scrapes=0,
+        web_errors=0,
+        web_success=0,
+        worker_id="worker",
+    )
+    for i in range(rows):
+        sample.hotkey = f"hotkey-{i % 256}"
+        sample.twitter_returned_tweets = i
+        db.add_telemetry(sample)
+
+
+def run_readers(db, readers, reads):
+    def reader():
+        for _ in range(reads):
+            db.get_all_hotkeys_with_telemetry()
+            db.get_telemetry_by_hotkey("hotkey-7")
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TelemetryDatabase(db_path=os.path.join(tmp, "telemetry.db"))
+        populate(db, args.rows)
+
+        rw_lock = db.lock
+        db.lock = ExclusiveLock()
+        exclusive = run_readers(db, args.readers, args.reads)
+        db.lock = rw_lock
+        shared = run_readers(db, args.readers, args.reads)
+
+    total = args.readers * args.reads
+    print(f"{args.readers} readers x {args.reads} read rounds over {args.rows} rows")
+    print(f"  exclusive lock:   {exclusive:.3f}s ({total / exclusive:.1f} reads/s)")
+    print(f"  reader/writer:    {shared:.3f}s ({total / shared:.1f} reads/s)")
+    print(f"  speedup:          {exclusive / shared:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
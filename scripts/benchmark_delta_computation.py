@@ -0,0 +1,163 @@
+"""
+Benchmark the full recomputation of the telemetry deltas, starting from the
+rows telemetry storage returns, and check every variant gives the same
+deltas:
+
+- per-record: NodeData for every row, then the previous per-hotkey walk
+- records: NodeData for every row, then the vectorized _get_delta_node_data
+- rows: the vectorized _get_delta_node_data_from_rows, NodeData only for
+  the baseline and latest rows
+
+Usage:
+    python scripts/benchmark_delta_computation.py [--rows 10000 100000 1000000]
+        [--hotkeys 256] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from validator.metagraph import MetagraphIndex  # noqa: E402
+from validator.telemetry_storage import TelemetryStorage  # noqa: E402
+from validator.weights import WeightsManager  # noqa: E402
+
+
+def legacy_get_delta_node_data(weights_manager, rows):
+    """The per-record implementation before vectorization."""
+    telemetry_data = [TelemetryStorage.row_to_node_data(row) for row in rows]
+    telemetry_by_hotkey = {}
+    for record in telemetry_data:
+        if record.hotkey not in telemetry_by_hotkey:
+            telemetry_by_hotkey[record.hotkey] = []
+        telemetry_by_hotkey[record.hotkey].append(record)
+
+    endpoints = {}
+    for hotkey, telemetry_list in telemetry_by_hotkey.items():
+        if len(telemetry_list) < 2:
+            endpoints[hotkey] = None
+            continue
+        sorted_telemetry = sorted(
+            telemetry_list,
+            key=lambda x: weights_manager._convert_timestamp_to_int(x.timestamp),
+        )
+        baseline_record = sorted_telemetry[0]
+        for record in sorted_telemetry[1:]:
+            if record.twitter_returned_tweets < baseline_record.twitter_returned_tweets:
+                baseline_record = record
+        endpoints[hotkey] = (baseline_record, sorted_telemetry[-1])
+
+    return weights_manager._assemble_delta_node_data(endpoints)
+
+
+def make_telemetry(rows, hotkeys, seed=42):
+    """
+    Rows in TELEMETRY_COLUMNS order, with growing counters per hotkey and
+    the occasional restart, shuffled.
+    """
+    rng = random.Random(seed)
+    counters = [0] * hotkeys
+    telemetry = []
+    for i in range(rows):
+        index = i % hotkeys
+        if rng.random() < 0.01:
+            counters[index] = rng.randint(0, 50)
+        else:
+            counters[index] += rng.randint(0, 10)
+        value = counters[index]
+        telemetry.append(
+            (
+                f"hotkey-{index}",  # hotkey
+                index,  # uid
+                1_700_000_000 + i // hotkeys * 60,  # timestamp
+                0,  # boot_time
+                0,  # last_operation_time
+                i,  # current_time
+                value // 50,  # twitter_auth_errors
+                value // 40,  # twitter_errors
+                value // 30,  # twitter_ratelimit_errors
+                0,  # twitter_returned_other
+                value // 2,  # twitter_returned_profiles
+                value,  # twitter_returned_tweets
+                value,  # twitter_scrapes
+                value // 20,  # web_errors
+                value,  # web_success
+                "worker",  # worker_id
+            )
+        )
+    rng.shuffle(telemetry)
+    return telemetry
+
+
+def vectorized_records(weights_manager, rows):
+    telemetry_data = [TelemetryStorage.row_to_node_data(row) for row in rows]
+    return weights_manager._get_delta_node_data(telemetry_data)
+
+
+def fingerprint(delta_node_data):
+    return [
+        (vars(node), node.time_span_seconds, node.total_errors)
+        for node in delta_node_data
+    ]
+
+
+def best_of(repeat, function, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--hotkeys", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    validator = SimpleNamespace(
+        metagraph_manager=SimpleNamespace(index=MetagraphIndex()),
+        telemetry_storage=TelemetryStorage,
+    )
+    weights_manager = WeightsManager(validator)
+    variants = [
+        ("per-record", legacy_get_delta_node_data),
+        ("records", vectorized_records),
+        ("rows", WeightsManager._get_delta_node_data_from_rows),
+    ]
+
+    print(f"{args.hotkeys} hotkeys, best of {args.repeat}")
+    for rows in args.rows:
+        telemetry = make_telemetry(rows, args.hotkeys)
+        timings = []
+        expected = None
+        for name, function in variants:
+            elapsed, result = best_of(
+                args.repeat, function, weights_manager, telemetry
+            )
+            if expected is None:
+                expected = fingerprint(result)
+            elif fingerprint(result) != expected:
+                raise SystemExit(f"{name} differs from per-record at {rows} rows")
+            timings.append((name, elapsed))
+        baseline = timings[0][1]
+        print(
+            f"  {rows:>9} rows: "
+            + ", ".join(
+                f"{name} {elapsed:.3f}s ({baseline / elapsed:.1f}x)"
+                for name, elapsed in timings
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
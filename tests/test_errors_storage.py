@@ -0,0 +1,286 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from db.errors_database import ErrorsDatabase
+from validator import error_types
+from validator.error_counters import current_minute
+from validator.errors_storage import ErrorsStorage
+
+
+class TestErrorsStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = ErrorsStorage(db_path=os.path.join(self.tmp.name, "errors.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_errors_are_merged(self):
+        for _ in range(3):
+            self.storage.add_error("hotkey1", "https://tee", "1.2.3.4", "boom")
+        self.storage.add_error("hotkey1", "https://tee", "1.2.3.4", "other")
+        self.storage.add_error("hotkey2", None, "5.6.7.8", "boom")
+
+        # Nothing is written before a flush
+        self.assertEqual(self.storage.db.get_all_errors(), [])
+
+        # Reads flush first
+        errors = self.storage.get_errors_by_hotkey("hotkey1")
+        counts = {error["message"]: error["count"] for error in errors}
+        self.assertEqual(counts, {"boom": 3, "other": 1})
+        self.assertEqual(len(self.storage.get_all_errors()), 3)
+        self.assertEqual(self.storage.get_error_count(hours=1), 5)
+
+        # Later occurrences in the same window update the existing row
+        self.storage.add_error("hotkey2", None, "5.6.7.8", "boom")
+        self.storage.flush()
+        (error,) = self.storage.get_errors_by_hotkey("hotkey2")
+        self.assertEqual(error["count"], 2)
+        self.assertLessEqual(error["first_seen"], error["last_seen"])
+        self.assertEqual(self.storage.get_error_count(hours=1), 6)
+
+    def test_buffer_flushes_when_full(self):
+        self.storage.max_buffered_errors = 2
+        self.storage.add_error("hotkey1", None, None, "a")
+        self.storage.add_error("hotkey1", None, None, "b")
+        self.assertEqual(self.storage._buffer, {})
+        self.assertEqual(len(self.storage.db.get_all_errors()), 2)
+
+    def test_full_buffer_flushes_off_the_event_loop(self):
+        self.storage.max_buffered_errors = 2
+        flush_threads = []
+        flush = self.storage.flush
+
+        def record_thread():
+            flush_threads.append(threading.current_thread())
+            return flush()
+
+        self.storage.flush = record_thread
+
+        async def add_errors():
+            self.storage.add_error("hotkey1", None, None, "a")
+            self.storage.add_error("hotkey1", None, None, "b")
+            await self.storage._flush_task
+
+        asyncio.run(add_errors())
+        self.assertEqual(len(flush_threads), 1)
+        self.assertIsNot(flush_threads[0], threading.main_thread())
+        self.assertEqual(len(self.storage.db.get_all_errors()), 2)
+
+    def test_error_counters(self):
+        for _ in range(3):
+            self.storage.add_error("hotkey1", None, None, "boom")
+        self.storage.add_error("hotkey2", None, None, "boom")
+        # An occurrence outside the 1h window, still within the horizon
+        self.storage.counters.record("hotkey1", 4, minute=current_minute() - 120)
+
+        # Counted without flushing the buffer
+        self.assertEqual(self.storage.get_error_count(hours=1), 4)
+        self.assertEqual(self.storage.get_error_count(hours=1, hotkey="hotkey1"), 3)
+        self.assertEqual(self.storage.get_error_count(hours=24, hotkey="hotkey1"), 7)
+        self.assertEqual(self.storage.db.get_all_errors(), [])
+
+        # Flushes checkpoint the buckets, a new storage starts from them
+        self.storage.flush()
+        reopened = ErrorsStorage(db_path=self.storage.db.db_path)
+        self.assertEqual(reopened.get_error_count(hours=24), 8)
+        self.assertEqual(reopened.get_error_count(hours=1, hotkey="hotkey2"), 1)
+
+        # Buckets past the horizon are dropped on the next checkpoint
+        self.storage.counters.record("hotkey1", 5, minute=current_minute() - 24 * 60)
+        self.storage.flush()
+        self.assertEqual(self.storage.get_error_count(hours=24), 8)
+        oldest = self.storage.counters.oldest_minute()
+        self.assertEqual(
+            sum(row[2] for row in self.storage.db.load_error_counters(0)), 8
+        )
+        self.assertEqual(self.storage.db.load_error_counters(oldest + 1440), [])
+
+        # Longer windows are counted in the database
+        self.assertEqual(self.storage.get_error_count(hours=48, hotkey="hotkey1"), 3)
+
+    def test_typed_errors_are_rendered_and_counted(self):
+        self.storage.add_error("hotkey1", None, None, error_types.handshake_failed())
+        self.storage.add_error("hotkey1", None, None, error_types.message_status(503))
+        self.storage.add_error("hotkey1", None, None, error_types.message_status(503))
+        self.storage.add_error("hotkey1", None, None, error_types.message_status(500))
+        self.storage.add_error(
+            "hotkey2", None, None, error_types.worker_already_registered(7, "hotkey1")
+        )
+        self.storage.add_error(
+            "hotkey2", None, None, error_types.connection_error("x" * 1000)
+        )
+
+        messages = {
+            error["message"]: error["count"]
+            for error in self.storage.get_errors_by_hotkey("hotkey1")
+        }
+        self.assertEqual(
+            messages,
+            {
+                "Failed to establish secure connection": 1,
+                "Failed to send message: Status code 503": 2,
+                "Failed to send message: Status code 500": 1,
+            },
+        )
+        (connection, registered) = sorted(
+            self.storage.get_errors_by_hotkey("hotkey2"),
+            key=lambda error: error["error_type"],
+        )
+        self.assertEqual(registered["error_type"], "WORKER_ALREADY_REGISTERED")
+        self.assertEqual(
+            registered["message"],
+            "Skipped: Worker ID 7 already registered to hotkey hotkey1",
+        )
+        self.assertEqual(
+            len(connection["detail"]), error_types.ERROR_DETAIL_MAX_LENGTH
+        )
+
+        self.assertEqual(
+            self.storage.get_error_counts_by_type("hotkey1"),
+            {"hotkey1": {"MESSAGE_STATUS": 3, "HANDSHAKE_FAILED": 1}},
+        )
+        self.assertEqual(
+            set(self.storage.get_error_counts_by_type()), {"hotkey1", "hotkey2"}
+        )
+
+    def test_search_errors(self):
+        self.storage.add_error("5Fabc", None, "1.2.3.4", error_types.handshake_failed())
+        self.storage.add_error("5Gdef", None, "1.2.3.4", error_types.handshake_failed())
+        for status in (500, 502, 503):
+            self.storage.add_error(
+                "5Fabc", None, None, error_types.message_status(status)
+            )
+        self.storage.add_error(
+            "5Fxyz", None, None, error_types.connection_error("TLS certificate expired")
+        )
+
+        def messages(**kwargs):
+            result = self.storage.search_errors(**kwargs)
+            return sorted(error["message"] for error in result["errors"])
+
+        self.assertEqual(
+            messages(query="secure connection", hotkey_prefix="5F"),
+            ["Failed to establish secure connection"],
+        )
+        self.assertEqual(
+            messages(query="tls"), ["Connection error: TLS certificate expired"]
+        )
+        self.assertEqual(
+            messages(query="status 50*", hotkey_prefix="5Fa"),
+            [f"Failed to send message: Status code {code}" for code in (500, 502, 503)],
+        )
+        self.assertEqual(
+            messages(query="1.2.3.4"), 2 * ["Failed to establish secure connection"]
+        )
+        self.assertEqual(messages(query="nothing"), [])
+        self.assertEqual(messages(since="2999-01-01 00:00:00"), [])
+
+        # Keyset pagination visits every row once, latest first
+        seen, cursor = [], None
+        while True:
+            page = self.storage.search_errors(limit=2, cursor=cursor)
+            seen.extend(page["errors"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(
+            [error["timestamp"] for error in seen],
+            sorted((error["timestamp"] for error in seen), reverse=True),
+        )
+        with self.assertRaises(ValueError):
+            self.storage.search_errors(cursor="bogus")
+
+    def test_legacy_table_is_partitioned_and_expired(self):
+        path = os.path.join(self.tmp.name, "legacy.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE errors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    hotkey TEXT,
+                    tee_address TEXT,
+                    miner_address TEXT,
+                    message TEXT
+                )
+                """
+            )
+            for days_ago in (0, 0, 3, 10):
+                conn.execute(
+                    "INSERT INTO errors (timestamp, hotkey, message) "
+                    "VALUES (datetime('now', ?), 'hotkey1', 'boom')",
+                    (f"-{days_ago} days",),
+                )
+
+        db = ErrorsDatabase(db_path=path)
+        self.assertEqual(len(db.partitions), 3)
+        errors = db.get_errors_by_hotkey("hotkey1")
+        self.assertEqual(len(errors), 4)
+        # Legacy messages are kept as the detail of OTHER errors
+        self.assertEqual({(e["error_type"], e["detail"]) for e in errors}, {(0, "boom")})
+        self.assertEqual(db.get_error_count(hours=1), 2)
+        # Counters are seeded with the last day
+        self.assertEqual(db.load_error_counters(0)[0][1:], ("hotkey1", 2))
+        # Migrated rows are in the search index
+        self.assertEqual(len(db.search_errors("boom")[0]), 4)
+        # Hotkeys are stored as identity ids, searched and returned as strings
+        with db.connect() as conn:
+            for table in [f"errors_{day}" for day in db.partitions] + [
+                "error_counters"
+            ]:
+                self.assertEqual(
+                    conn.execute(
+                        f"SELECT DISTINCT typeof(hotkey) FROM {table}"
+                    ).fetchall(),
+                    [("integer",)],
+                )
+        self.assertEqual(len(db.search_errors("hotkey1")[0]), 4)
+        errors, _ = db.search_errors(hotkey_prefix="hot")
+        self.assertEqual({e["hotkey"] for e in errors}, {"hotkey1"})
+        self.assertEqual(
+            db.get_error_counts_by_type(hours=1), [("hotkey1", 0, None, 2)]
+        )
+
+        # Whole days before the cutoff are dropped as partitions
+        self.assertEqual(db.clean_old_errors(hours=5 * 24), 1)
+        self.assertEqual(len(db.partitions), 2)
+        self.assertEqual(len(db.get_all_errors()), 3)
+
+        reopened = ErrorsDatabase(db_path=path)
+        self.assertEqual(reopened.partitions, db.partitions)
+
+    def test_rolled_back_partitions_are_forgotten(self):
+        db = self.storage.db
+        entry = {
+            "hotkey": "hotkey1",
+            "tee_address": None,
+            "miner_address": None,
+            "error_type": 0,
+            "worker_id": None,
+            "related_hotkey": None,
+            "status_code": None,
+            "detail": "boom",
+            "count": 1,
+            "first_seen": "2030-01-01 00:00:00",
+            "last_seen": "2030-01-01 00:00:00",
+        }
+        # The second entry creates its partition, then fails the transaction
+        broken = dict(entry, first_seen="2030-01-02 00:00:00")
+        del broken["count"]
+        with self.assertRaises(KeyError):
+            db.add_errors([entry, broken], lambda first_seen: first_seen)
+        self.assertNotIn("20300102", db.partitions)
+
+        db.add_errors([dict(broken, count=1)], lambda first_seen: first_seen)
+        self.assertIn("20300102", db.partitions)
+        self.assertEqual(len(db.get_all_errors()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from db.identities import HOTKEY
+from tests.test_telemetry_database import make_sample
+from validator.errors_storage import ErrorsStorage
+from validator.maintenance import MaintenanceScheduler
+from validator.process_monitor import ProcessMonitor
+from validator.routing_table import RoutingTable
+from validator.telemetry_storage import TelemetryStorage
+
+
+class TestMaintenanceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = self.tmp.name
+        self.telemetry = TelemetryStorage(
+            db_path=os.path.join(path, "telemetry.db"), engine="sqlite"
+        )
+        self.errors = ErrorsStorage(db_path=os.path.join(path, "errors.db"))
+        self.routing_table = RoutingTable(
+            db_path=os.path.join(path, "miner_tee_addresses.db")
+        )
+        self.monitor = ProcessMonitor()
+        validator = SimpleNamespace(
+            telemetry_storage=self.telemetry,
+            routing_table=self.routing_table,
+            node_manager=SimpleNamespace(errors_storage=self.errors),
+        )
+        self.scheduler = MaintenanceScheduler(
+            validator, self.monitor, chunk_size=4, chunk_pause_seconds=0
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _add_telemetry(self, hotkey, count, hours_ago):
+        for tweets in range(count):
+            self.telemetry.add_telemetry(make_sample(hotkey, tweets))
+        with self.telemetry.db.connect() as conn:
+            hotkey_id = self.telemetry.db.identities.get_id(
+                conn.cursor(), HOTKEY, hotkey
+            )
+            timestamp = int(time.time()) - hours_ago * 3600
+            conn.execute(
+                "UPDATE telemetry SET timestamp = ?, last_seen = ? WHERE hotkey = ?",
+                (timestamp, timestamp, hotkey_id),
+            )
+            self.telemetry.db._rebuild_delta_states(conn.cursor(), [hotkey_id])
+
+    def test_cleanups_run_in_chunks(self):
+        self._add_telemetry("old", 10, hours_ago=24)
+        self._add_telemetry("new", 3, hours_ago=0)
+
+        results = asyncio.run(self.scheduler.run_once())
+
+        self.assertEqual(results["telemetry_expiration"]["removed"], 10)
+        self.assertEqual(results["telemetry_expiration"]["chunks"], 3)
+        self.assertEqual(self.telemetry.get_all_hotkeys_with_telemetry(), ["new"])
+        self.assertEqual(
+            [state.hotkey for state in self.telemetry.get_delta_states()], ["new"]
+        )
+        for name in ("optimize_telemetry", "optimize_errors", "optimize_routing_table"):
+            self.assertNotIn("error", results[name])
+
+        (run,) = self.monitor.process_history["maintenance"]
+        self.assertEqual(run.nodes_processed, 10)
+        self.assertIn("seconds", run.additional_metrics["error_retention"])
+
+    def test_optimize_waits_for_quiet_period(self):
+        execution_id = self.monitor.start_process("update_tee")
+        results = asyncio.run(self.scheduler.run_once())
+        self.assertIn("skipped", results["optimize_telemetry"])
+        self.monitor.end_process(execution_id)
+
+        results = asyncio.run(self.scheduler.run_once())
+        self.assertNotIn("skipped", results["optimize_telemetry"])
+
+    def test_routing_table_cleanup_limit(self):
+        db = self.routing_table.db
+        for i in range(5):
+            db.add_unregistered_tee(f"https://tee{i}", "hotkey")
+        with db.connect() as conn:
+            conn.execute(
+                "UPDATE unregistered_tees SET timestamp = datetime('now', '-2 hours')"
+            )
+        self.assertEqual(db.clean_old_unregistered_tees(limit=3), 3)
+        self.assertEqual(db.clean_old_unregistered_tees(limit=3), 2)
+        self.assertEqual(db.get_all_unregistered_tees(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from db.base import ErrorsBackend, RoutingTableBackend, TelemetryBackend
+from tests.test_telemetry_database import make_sample
+from validator import error_types
+from validator.errors_storage import ErrorsStorage
+from validator.routing_table import RoutingTable
+from validator.telemetry_storage import TelemetryStorage
+
+
+class TestMemoryEngine(unittest.TestCase):
+    """The memory engine must behave like the SQLite engine."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _routing_tables(self):
+        return {
+            "sqlite": RoutingTable(db_path=self._path("routing.db"), engine="sqlite"),
+            "memory": RoutingTable(engine="memory"),
+        }
+
+    def test_engines_implement_the_interfaces(self):
+        self.assertIsInstance(RoutingTable(engine="memory").db, RoutingTableBackend)
+        self.assertIsInstance(TelemetryStorage(engine="memory").db, TelemetryBackend)
+        self.assertIsInstance(ErrorsStorage(engine="memory").db, ErrorsBackend)
+        with self.assertRaises(ValueError):
+            RoutingTable(engine="unknown")
+
+    def test_routing_table_matches_sqlite(self):
+        results = {}
+        for engine, routing_table in self._routing_tables().items():
+            batch = routing_table.batch()
+            batch.register_worker(7, "hotkey1")
+            batch.add_miner_address("hotkey1", 1, "https://a", "7")
+            batch.add_miner_address("hotkey2", 2, "https://b", None)
+            # Address uniqueness only fails its own operation
+            batch.add_miner_address("hotkey3", 3, "https://a", None)
+            # Same hotkey/uid on a new address is another TEE of the miner
+            batch.add_miner_address("hotkey2", 2, "https://c", None)
+            outcomes = batch.commit()
+            routing_table.add_miner_address("hotkey1", 1, "https://a", "7")
+            routing_table.db.add_unregistered_tee("https://c", "hotkey2")
+            routing_table.db.add_unregistered_tee("https://d", "hotkey4")
+            cleanup = routing_table.batch()
+            cleanup.remove_registered_unregistered_tees()
+            cleanup.commit()
+
+            results[engine] = (
+                [type(outcome).__name__ for outcome in outcomes],
+                sorted(routing_table.get_snapshot().entries),
+                routing_table.get_worker_hotkey(7),
+                routing_table.get_miner_addresses("hotkey1"),
+                routing_table.get_all_unregistered_tee_addresses(),
+                routing_table.clean_old_entries(),
+                routing_table.clean_old_unregistered_tees(limit=1),
+            )
+            routing_table.clear_miner("hotkey1")
+            self.assertEqual(routing_table.get_miner_addresses("hotkey1"), [])
+
+        self.assertEqual(results["memory"], results["sqlite"])
+
+    def test_telemetry_matches_sqlite(self):
+        storages = {
+            "sqlite": TelemetryStorage(
+                db_path=self._path("telemetry.db"), engine="sqlite"
+            ),
+            "memory": TelemetryStorage(engine="memory"),
+        }
+        results = {}
+        for engine, storage in storages.items():
+            for hotkey, tweets in [
+                ("a", 5),
+                ("a", 9),
+                ("a", 2),
+                ("b", 1),
+                ("a", 4),
+                ("a", 4),
+                ("a", 4),
+            ]:
+                storage.add_telemetry(make_sample(hotkey, tweets))
+            rows = [
+                row[:2] + row[3:] for row in storage.db.get_telemetry_by_hotkey("a")
+            ]
+            states = sorted(
+                (state.hotkey, state.sample_count, state.reset_count)
+                for state in storage.db.get_delta_states()
+            )
+            computed = sorted(
+                (state.hotkey, state.sample_count, state.reset_count)
+                for state in storage.db.get_delta_telemetry()
+            )
+            results[engine] = (
+                rows,
+                states,
+                computed,
+                storage.clean_old_entries(1),
+                storage.db.delete_telemetry_by_hotkey("b"),
+                storage.get_all_hotkeys_with_telemetry(),
+            )
+
+        self.assertEqual(results["memory"], results["sqlite"])
+
+    def test_telemetry_range_queries_match_sqlite(self):
+        storages = {
+            "sqlite": TelemetryStorage(
+                db_path=self._path("telemetry.db"), engine="sqlite"
+            ),
+            "log": TelemetryStorage(db_path=self._path("telemetry.db"), engine="log"),
+            "memory": TelemetryStorage(engine="memory"),
+        }
+        results = {}
+        for engine, storage in storages.items():
+            for tweets in range(10):
+                now = 3600 * 1000 + 600 * tweets
+                with patch("db.telemetry_database.time.time", return_value=now), patch(
+                    "db.telemetry_log.time.time", return_value=now
+                ), patch("db.memory.time.time", return_value=now):
+                    storage.add_telemetry(make_sample("a", tweets))
+
+            def tweets(**kwargs):
+                return [
+                    sample.twitter_returned_tweets
+                    for sample in storage.get_telemetry_by_hotkey("a", **kwargs)
+                ]
+
+            results[engine] = (
+                tweets(),
+                tweets(since=3600 * 1001, until=3600 * 1001 + 1800),
+                tweets(since=3600 * 1001, limit=2),
+                tweets(until=3600 * 1001, order="desc", limit=3),
+                tweets(since=3600 * 1002, order="desc"),
+                storage.get_latest_telemetry("a").twitter_returned_tweets,
+                storage.get_latest_telemetry("b"),
+                storage.get_telemetry_by_hotkey("b", limit=1),
+            )
+            with self.assertRaises(ValueError):
+                storage.get_telemetry_by_hotkey("a", order="sideways")
+
+        self.assertEqual(
+            results["sqlite"],
+            (
+                list(range(10)),
+                [6, 7, 8],
+                [6, 7],
+                [5, 4, 3],
+                [],
+                9,
+                None,
+                [],
+            ),
+        )
+        self.assertEqual(results["log"], results["sqlite"])
+        self.assertEqual(results["memory"], results["sqlite"])
+
+    def test_errors_match_sqlite(self):
+        storages = {
+            "sqlite": ErrorsStorage(db_path=self._path("errors.db"), engine="sqlite"),
+            "memory": ErrorsStorage(engine="memory"),
+        }
+        # Wall-clock times differ when the engines run a second apart
+        times = ("timestamp", "first_seen", "last_seen")
+        results = {}
+        for engine, storage in storages.items():
+            storage.add_error("hotkey1", None, "1.2.3.4", error_types.skipped_ip_zero())
+            storage.add_error("hotkey1", None, "1.2.3.4", error_types.skipped_ip_zero())
+            storage.add_error("hotkey2", "https://a", None, "boom")
+            storage.flush()
+            storage.add_error("hotkey1", None, "5.6.7.8", error_types.skipped_ip_zero())
+            hotkey2_errors = storage.search_errors(hotkey_prefix="hotkey2")["errors"]
+            results[engine] = (
+                [
+                    {key: error[key] for key in ("message", "count", "miner_address")}
+                    for error in storage.get_errors_by_hotkey("hotkey1")
+                ],
+                sorted(error["message"] for error in storage.get_all_errors()),
+                storage.get_error_count(hours=1),
+                storage.get_error_counts_by_type(),
+                [
+                    error["message"]
+                    for error in storage.search_errors("ip", limit=1)["errors"]
+                ],
+                [
+                    {key: value for key, value in error.items() if key not in times}
+                    for error in hotkey2_errors
+                ],
+                storage.clean_old_errors(hours=1),
+            )
+
+        self.assertEqual(results["memory"], results["sqlite"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
-from validator.metagraph import MetagraphManager
+from validator.metagraph import MetagraphIndex, MetagraphManager
 from neurons.validator import Validator
 
 
@@ -36,3 +36,33 @@ async def test_sync_metagraph(mock_validator, metagraph_manager):
     await metagraph_manager.sync_metagraph()
     mock_validator.metagraph.sync_nodes.assert_called_once()
     mock_validator.node_manager.remove_disconnected_nodes.assert_awaited_once()
+
+
+def test_metagraph_index_lookups():
+    nodes = {
+        "hotkey-a": MagicMock(node_id=3),
+        "hotkey-b": MagicMock(node_id=0),
+    }
+    index = MetagraphIndex(nodes)
+
+    assert index.uid("hotkey-a") == 3
+    assert index.uid("missing", 0) == 0
+    assert index.hotkey(0) == "hotkey-b"
+    assert index.hotkey(1) is None
+    assert index.hotkey(7, "none") == "none"
+    assert index.hotkeys_by_uid == ["hotkey-b", None, None, "hotkey-a"]
+    assert list(index.items()) == [(3, "hotkey-a"), (0, "hotkey-b")]
+    assert "hotkey-b" in index and len(index) == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_metagraph_rebuilds_index(mock_validator, metagraph_manager):
+    mock_validator.node_manager.remove_disconnected_nodes = AsyncMock()
+    mock_validator.metagraph.nodes = {"hotkey-a": MagicMock(node_id=1)}
+
+    # sync_metagraph logs and swallows errors, a failed substrate
+    # connection would skip the rebuild
+    with patch("validator.metagraph.interface.get_substrate"):
+        await metagraph_manager.sync_metagraph()
+
+    assert metagraph_manager.index.uid("hotkey-a") == 1
@@ -47,7 +47,6 @@ class TestProcessMonitoring:
         """Test NATS publishing with monitoring"""
         # Mock validator
         mock_validator = Mock()
-        mock_validator.routing_table_updating = False
         mock_validator.routing_table.get_all_addresses_atomic.return_value = [
             "192.168.1.1",
             "192.168.1.2",
@@ -95,7 +94,6 @@ class TestProcessMonitoring:
         """Test NATS monitoring when no addresses are available"""
         # Mock validator with empty addresses
         mock_validator = Mock()
-        mock_validator.routing_table_updating = False
         mock_validator.routing_table.get_all_addresses_atomic.return_value = []
 
         # Mock background tasks with process monitor
@@ -1,9 +1,19 @@
+import os
+import tempfile
 import unittest
+from db.identities import HOTKEY
+from db.migrations import get_version
 from db.routing_table_database import RoutingTableDatabase
 from validator.routing_table import RoutingTable
 import sqlite3
 
 
+def hotkey_id(db, hotkey):
+    """Identity id the routing table stores for a hotkey."""
+    with db.connect() as conn:
+        return db.identities.get_id(conn.cursor(), HOTKEY, hotkey)
+
+
 class TestRoutingTableDatabase(unittest.TestCase):
     def setUp(self):
         # Use an in-memory database for testing
@@ -26,7 +36,7 @@ class TestRoutingTableDatabase(unittest.TestCase):
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT * FROM miner_addresses WHERE hotkey = ? AND uid = ?",
-                    ("hotkey1", "uid1"),
+                    (hotkey_id(self.db, "hotkey1"), "uid1"),
                 )
                 result = cursor.fetchone()
                 self.assertIsNotNone(result)
@@ -43,7 +53,7 @@ class TestRoutingTableDatabase(unittest.TestCase):
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT * FROM miner_addresses WHERE hotkey = ? AND uid = ?",
-                    ("hotkey1", "uid1"),
+                    (hotkey_id(self.db, "hotkey1"), "uid1"),
                 )
                 result = cursor.fetchone()
                 self.assertIsNotNone(result)
@@ -60,13 +70,78 @@ class TestRoutingTableDatabase(unittest.TestCase):
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT * FROM miner_addresses WHERE hotkey = ? AND uid = ?",
-                    ("hotkey1", "uid1"),
+                    (hotkey_id(self.db, "hotkey1"), "uid1"),
                 )
                 result = cursor.fetchone()
                 self.assertIsNone(result)
         except sqlite3.Error as e:
             self.fail(f"Unexpected database error: {e}")
 
+    def test_apply_batch(self):
+        self.db.add_address("hotkey1", "1", "address1", "worker1")
+        results = self.db.apply_batch(
+            [
+                ("register_worker", ("worker2", "hotkey2")),
+                ("add_address", ("hotkey1", 1, "address1", "worker1")),
+                ("add_address", ("hotkey2", 2, "address2", "worker2")),
+                ("add_address", ("hotkey3", 3, "address2", "worker3")),
+                ("remove_address", ("missing",)),
+            ]
+        )
+        self.assertEqual(results[1], "refreshed")
+        self.assertEqual(results[2], "added")
+        # The duplicate address fails on its own without aborting the batch
+        self.assertIsInstance(results[3], sqlite3.IntegrityError)
+        self.assertEqual(self.db.get_worker_hotkey("worker2"), "hotkey2")
+        self.assertEqual(
+            self.db.get_miner_addresses_by_hotkey("hotkey2"),
+            [("2", "address2", "worker2")],
+        )
+        self.assertEqual(self.db.get_miner_addresses_by_hotkey("hotkey3"), [])
+        self.db.unregister_worker("worker2")
+
+    def test_upsert_address(self):
+        self.assertEqual(self.db.upsert_address("hotkey1", 1, "address1"), "added")
+        self.assertEqual(
+            self.db.upsert_address("hotkey1", 1, "address1"), "refreshed"
+        )
+        self.assertEqual(
+            self.db.upsert_address("hotkey1", 1, "address1", 7), "replaced"
+        )
+        self.db.upsert_address("hotkey2", 2, "address3")
+        # Taking another entry's address fails without touching either entry
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.upsert_address("hotkey2", 2, "address1")
+        self.assertEqual(
+            self.db.get_miner_addresses_by_hotkey("hotkey1"),
+            [("1", "address1", "7")],
+        )
+        self.assertEqual(
+            self.db.get_miner_addresses_by_hotkey("hotkey2"),
+            [("2", "address3", None)],
+        )
+
+    def test_hotkey_uid_keeps_every_tee(self):
+        for address in ("tee1", "tee2", "tee3"):
+            self.assertEqual(self.db.upsert_address("5", 5, address), "added")
+        self.assertEqual(self.db.upsert_address("5", 5, "tee2"), "refreshed")
+        self.assertEqual(
+            self.db.apply_batch([("add_address", ("5", 5, "tee4", 9))]), ["added"]
+        )
+        expected = [
+            ("5", "tee1", None),
+            ("5", "tee2", None),
+            ("5", "tee3", None),
+            ("5", "tee4", "9"),
+        ]
+        self.assertEqual(sorted(self.db.get_miner_addresses_by_hotkey("5")), expected)
+
+        # Reopening (and migrating) the file keeps them as well
+        reopened = RoutingTableDatabase(db_path=self.db.db_path)
+        self.assertEqual(
+            sorted(reopened.get_miner_addresses_by_hotkey("5")), expected
+        )
+
 
 class TestRoutingTable(unittest.TestCase):
     def setUp(self):
@@ -87,7 +162,7 @@ class TestRoutingTable(unittest.TestCase):
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT * FROM miner_addresses WHERE hotkey = ?",
-                    ("hotkey1",),
+                    (hotkey_id(self.routing_table.db, "hotkey1"),),
                 )
                 result = cursor.fetchall()
                 self.assertEqual(len(result), 0)
@@ -142,6 +217,114 @@ class TestRoutingTable(unittest.TestCase):
             result = cursor.fetchall()
             self.assertEqual(len(result), 1)
 
+    def test_batch_commits_once(self):
+        self.routing_table.clear_miner("hotkey1")
+        self.routing_table.unregister_worker("worker1")
+        batch = self.routing_table.batch()
+        batch.register_worker("worker1", "hotkey1")
+        batch.add_miner_address("hotkey1", "uid1", "address1", "worker1")
+
+        # Queued registrations are visible to ownership checks in the cycle
+        self.assertEqual(batch.get_worker_hotkey("worker1"), "hotkey1")
+        # but nothing is written before commit
+        self.assertIsNone(self.routing_table.get_worker_hotkey("worker1"))
+        self.assertEqual(self.routing_table.get_miner_addresses("hotkey1"), [])
+
+        batch.commit()
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(self.routing_table.get_worker_hotkey("worker1"), "hotkey1")
+        self.assertEqual(
+            self.routing_table.get_miner_addresses("hotkey1"),
+            [("address1", "worker1")],
+        )
+        self.routing_table.clear_miner("hotkey1")
+        self.routing_table.unregister_worker("worker1")
+
+    def test_snapshot_generations(self):
+        self.routing_table.clear_miner("hotkey1")
+        before = self.routing_table.get_snapshot()
+
+        batch = self.routing_table.batch()
+        batch.add_miner_address("hotkey1", "uid1", "address1")
+        # Readers keep the committed snapshot while the batch is pending
+        self.assertIs(self.routing_table.get_snapshot(), before)
+
+        batch.commit()
+        after = self.routing_table.get_snapshot()
+        self.assertGreater(after.generation, before.generation)
+        self.assertIn(("hotkey1", "address1", None), after.entries)
+        self.assertNotIn(("hotkey1", "address1", None), before.entries)
+        self.routing_table.clear_miner("hotkey1")
+
+
+class TestRoutingTableMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "routing.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_string_rows_get_identity_keys(self):
+        # Schema and data as written before identity keys (version 1)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE miner_addresses (hotkey TEXT, uid TEXT, "
+                "address TEXT UNIQUE, worker_id TEXT, "
+                "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute(
+                "CREATE TABLE worker_registry (worker_id TEXT PRIMARY KEY, "
+                "hotkey TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute(
+                "CREATE TABLE unregistered_tees (address TEXT PRIMARY KEY, "
+                "hotkey TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.executemany(
+                "INSERT INTO miner_addresses (hotkey, uid, address, worker_id) "
+                "VALUES (?, ?, ?, ?)",
+                [("hotkey1", "1", "tee1", "worker1"), ("hotkey1", "1", "tee2", None)],
+            )
+            conn.execute(
+                "INSERT INTO worker_registry (worker_id, hotkey) "
+                "VALUES ('worker1', 'hotkey1')"
+            )
+            conn.execute(
+                "INSERT INTO unregistered_tees (address, hotkey) "
+                "VALUES ('tee3', 'hotkey2')"
+            )
+            conn.execute("PRAGMA user_version = 1")
+
+        db = RoutingTableDatabase(db_path=self.path)
+        with db.connect() as conn:
+            self.assertEqual(get_version(conn), 2)
+            for table in ("miner_addresses", "worker_registry", "unregistered_tees"):
+                self.assertEqual(
+                    conn.execute(
+                        f"SELECT DISTINCT typeof(hotkey) FROM {table}"
+                    ).fetchall(),
+                    [("integer",)],
+                )
+        self.assertEqual(
+            sorted(db.get_miner_addresses_by_hotkey("hotkey1")),
+            [("1", "tee1", "worker1"), ("1", "tee2", None)],
+        )
+        self.assertEqual(db.get_worker_hotkey("worker1"), "hotkey1")
+        self.assertEqual(db.get_all_worker_registrations(), [("worker1", "hotkey1")])
+        self.assertEqual(db.get_all_unregistered_tees(), [("tee3", "hotkey2")])
+
+        # Hotkeys and worker ids are shared across the tables
+        db.register_worker("worker2", "hotkey2")
+        self.assertEqual(db.upsert_address("hotkey2", 2, "tee3", "worker2"), "added")
+        with db.connect() as conn:
+            self.assertEqual(
+                conn.execute("SELECT COUNT(*) FROM identities").fetchone(), (4,)
+            )
+        self.assertEqual(
+            db.apply_batch([("remove_registered_unregistered_tees", ())]), [1]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
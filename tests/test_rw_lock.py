@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from db.rw_lock import ReadWriteLock
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def test_readers_share_the_lock(self):
+        inside = threading.Event()
+        release = threading.Event()
+
+        def reader():
+            with self.lock.read():
+                inside.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        self.assertTrue(inside.wait(1))
+
+        # A second reader gets in while the first one still holds the lock
+        acquired = threading.Event()
+
+        def second_reader():
+            with self.lock.read():
+                acquired.set()
+
+        other = threading.Thread(target=second_reader)
+        other.start()
+        self.assertTrue(acquired.wait(1))
+
+        release.set()
+        thread.join()
+        other.join()
+
+    def test_writer_excludes_readers(self):
+        events = []
+
+        def writer():
+            with self.lock.write():
+                events.append("write-start")
+                time.sleep(0.05)
+                events.append("write-end")
+
+        def reader():
+            with self.lock.read():
+                events.append("read")
+
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        time.sleep(0.01)
+        reader_thread = threading.Thread(target=reader)
+        reader_thread.start()
+        writer_thread.join()
+        reader_thread.join()
+
+        self.assertEqual(events, ["write-start", "write-end", "read"])
+
+    def test_context_manager_is_exclusive(self):
+        with self.lock:
+            acquired = threading.Event()
+
+            def reader():
+                with self.lock.read():
+                    acquired.set()
+
+            thread = threading.Thread(target=reader)
+            thread.start()
+            self.assertFalse(acquired.wait(0.05))
+        thread.join(1)
+        self.assertTrue(acquired.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from tests.test_telemetry_database import make_sample
+from validator.metagraph import MetagraphIndex
+from validator.telemetry_storage import TelemetryStorage
+from validator.weights import WeightsManager
+
+
+class TestScoreCache(unittest.TestCase):
+    def setUp(self):
+        self.storage = TelemetryStorage(engine="memory")
+        for tweets in (10, 20, 30):
+            self.storage.add_telemetry(make_sample("hotkey1", tweets))
+            self.storage.add_telemetry(make_sample("hotkey2", tweets * 2))
+        validator = Mock()
+        validator.metagraph.nodes = {
+            "hotkey1": SimpleNamespace(hotkey="hotkey1", node_id=1),
+            "hotkey2": SimpleNamespace(hotkey="hotkey2", node_id=2),
+        }
+        validator.metagraph_manager.index = MetagraphIndex(validator.metagraph.nodes)
+        validator.telemetry_storage = self.storage
+        self.validator = validator
+        self.weights_manager = WeightsManager(validator)
+
+    def _scores(self, simulation=False):
+        return asyncio.run(self.weights_manager.get_scores(simulation))
+
+    def test_scores_are_reused_until_telemetry_changes(self):
+        with patch.object(
+            self.weights_manager,
+            "calculate_weights",
+            wraps=self.weights_manager.calculate_weights,
+        ) as calculate:
+            first = self._scores()
+            self.assertIs(self._scores(), first)
+            self.assertEqual(calculate.call_count, 1)
+            self.assertEqual(first.uids, [1, 2])
+            self.assertEqual(set(first.components), {"hotkey1", "hotkey2"})
+            self.assertEqual(first.components["hotkey2"]["tweets"], 40)
+
+            # Each scoring mode has its own entry
+            self._scores(simulation=True)
+            self.assertEqual(calculate.call_count, 2)
+
+            self.storage.add_telemetry(make_sample("hotkey1", 100))
+            second = self._scores()
+            self.assertEqual(calculate.call_count, 3)
+            self.assertEqual(second.components["hotkey1"]["tweets"], 90)
+
+            # Metagraph syncs invalidate the scores too
+            self.validator.metagraph.nodes["hotkey3"] = SimpleNamespace(
+                hotkey="hotkey3", node_id=3
+            )
+            self.validator.metagraph_manager.index = MetagraphIndex(
+                self.validator.metagraph.nodes
+            )
+            self._scores()
+            self.assertEqual(calculate.call_count, 4)
+
+        # Reports are queued once per computation and node (hotkey3 joined
+        # for the last one), not once per read, and not for simulations
+        submit = self.validator.node_manager.score_reports.submit
+        self.assertEqual(submit.call_count, 7)
+
+    def test_concurrent_callers_share_one_computation(self):
+        async def read_concurrently():
+            return await asyncio.gather(
+                *(self.weights_manager.get_scores() for _ in range(5))
+            )
+
+        with patch.object(
+            self.weights_manager,
+            "calculate_weights",
+            wraps=self.weights_manager.calculate_weights,
+        ) as calculate:
+            results = asyncio.run(read_concurrently())
+
+        self.assertEqual(calculate.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
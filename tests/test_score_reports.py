@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+
+from validator.score_reports import ScoreReportQueue
+
+
+class TestScoreReportQueue(unittest.TestCase):
+    def setUp(self):
+        self.sent = []  # (hotkey, score) per delivery attempt
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = {}  # hotkey -> attempts to fail
+
+    async def deliver(self, hotkey, score, telemetry):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            self.sent.append((hotkey, score))
+            if self.failures.get(hotkey, 0) > 0:
+                self.failures[hotkey] -= 1
+                return False
+            return True
+        finally:
+            self.in_flight -= 1
+
+    def _deliver_all(self, queue, submit):
+        async def scenario():
+            worker = asyncio.create_task(queue.run())
+            await submit()
+            while not queue.idle():
+                await asyncio.sleep(0.005)
+            worker.cancel()
+
+        asyncio.run(scenario())
+
+    def test_deliveries_are_concurrent_and_bounded(self):
+        queue = ScoreReportQueue(self.deliver, concurrency=3)
+
+        async def submit():
+            for index in range(10):
+                queue.submit(f"hotkey{index}", index, None)
+
+        self._deliver_all(queue, submit)
+
+        self.assertEqual(len(self.sent), 10)
+        self.assertEqual(self.max_in_flight, 3)
+        self.assertEqual(queue.stats["delivered"], 10)
+
+    def test_only_the_latest_score_of_a_miner_is_sent(self):
+        queue = ScoreReportQueue(self.deliver, concurrency=2)
+
+        async def submit():
+            queue.submit("hotkey1", 1.0, None)
+            queue.submit("hotkey1", 2.0, None)
+            queue.submit("hotkey2", 3.0, None)
+
+        self._deliver_all(queue, submit)
+
+        self.assertEqual(sorted(self.sent), [("hotkey1", 2.0), ("hotkey2", 3.0)])
+        self.assertEqual(queue.stats["coalesced"], 1)
+
+    def test_failed_deliveries_are_retried(self):
+        self.failures = {"hotkey1": 2, "hotkey2": 5}
+        queue = ScoreReportQueue(
+            self.deliver, max_attempts=3, retry_delay_seconds=0.01
+        )
+
+        async def submit():
+            queue.submit("hotkey1", 1.0, None)
+            queue.submit("hotkey2", 2.0, None)
+
+        self._deliver_all(queue, submit)
+
+        self.assertEqual(self.sent.count(("hotkey1", 1.0)), 3)
+        self.assertEqual(self.sent.count(("hotkey2", 2.0)), 3)
+        self.assertEqual(queue.stats["delivered"], 1)
+        self.assertEqual(queue.stats["failed"], 1)
+        self.assertEqual(queue.stats["retried"], 4)
+
+    def test_newer_score_replaces_a_failed_report(self):
+        self.failures = {"hotkey1": 1}
+        queue = ScoreReportQueue(self.deliver, retry_delay_seconds=0.05)
+
+        async def submit():
+            queue.submit("hotkey1", 1.0, None)
+            # Lands while the first report waits for its retry
+            await asyncio.sleep(0.02)
+            queue.submit("hotkey1", 2.0, None)
+
+        self._deliver_all(queue, submit)
+
+        self.assertEqual(self.sent, [("hotkey1", 1.0), ("hotkey1", 2.0)])
+        self.assertEqual(queue.stats["delivered"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import random
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from interfaces.types import NodeData
+from validator.score_sweep import (
+    SWEEP_DEFAULTS,
+    gini,
+    kurtosis_grid,
+    parameter_grid,
+    run_sweep,
+    top_k_share,
+)
+from validator.weights import WeightsManager, apply_kurtosis_custom
+
+
+def make_delta_node_data(count, seed=7):
+    rng = random.Random(seed)
+    delta_node_data = []
+    for uid in range(count):
+        node = NodeData(
+            hotkey=f"hotkey{uid}",
+            uid=uid,
+            worker_id="worker",
+            timestamp=0,
+            boot_time=0,
+            last_operation_time=0,
+            current_time=0,
+            twitter_auth_errors=0,
+            twitter_errors=0,
+            twitter_ratelimit_errors=0,
+            twitter_returned_other=0,
+            twitter_returned_profiles=0,
+            twitter_returned_tweets=rng.randint(0, 5000),
+            twitter_scrapes=0,
+            web_errors=0,
+            web_success=0,
+        )
+        # Some nodes without a time span, some above the error thresholds
+        node.time_span_seconds = 0 if uid % 7 == 0 else rng.randint(600, 7200)
+        node.total_errors = rng.randint(0, 40)
+        delta_node_data.append(node)
+    return delta_node_data
+
+
+class TestScoreSweep(unittest.TestCase):
+    def test_grid_is_the_cartesian_product_with_defaults(self):
+        grid = parameter_grid(steepness=[1, 2, 3], tweets_weight=[0.5, 0.7])
+
+        self.assertEqual(len(grid["steepness"]), 6)
+        np.testing.assert_array_equal(grid["reward_factor"], [0.4] * 6)
+        np.testing.assert_allclose(
+            grid["error_quality_weight"], 1 - grid["tweets_weight"]
+        )
+        with self.assertRaises(ValueError):
+            parameter_grid(unknown=[1])
+        with self.assertRaises(ValueError):
+            parameter_grid(steepness=[])
+
+    def test_grid_rejects_values_outside_their_range(self):
+        for values in (
+            {"error_rate_threshold": [10, 0]},
+            {"error_rate_threshold": [-1]},
+            {"top_percentile": [90, 101]},
+            {"top_percentile": [-5]},
+            {"tweets_weight": [1.5]},
+            {"tweets_weight": [-0.1]},
+            {"steepness": [float("nan")]},
+            {"boost_factor": [float("inf")]},
+            {"reward_factor": ["high"]},
+        ):
+            with self.subTest(**values), self.assertRaises(ValueError):
+                parameter_grid(**values)
+
+        grid = parameter_grid(
+            top_percentile=[0, 100], tweets_weight=[0, 1], error_rate_threshold=[0.5]
+        )
+        self.assertEqual(len(grid["top_percentile"]), 4)
+
+    def test_kurtosis_rows_match_apply_kurtosis_custom(self):
+        x = np.array([0.0, 3, 3, 10, 50, 7, 1, 99, 42, 5])
+        grid = parameter_grid(
+            top_percentile=[50, 90],
+            reward_factor=[0, 0.4],
+            steepness=[1, 2.5],
+            center_sensitivity=[0, 0.5],
+            boost_factor=[0.2],
+        )
+        rows = kurtosis_grid(x, grid)
+        kurtosis_parameters = list(SWEEP_DEFAULTS)[:5]
+        for index in range(len(rows)):
+            parameters = {
+                name: grid[name][index] for name in kurtosis_parameters
+            }
+            np.testing.assert_allclose(
+                rows[index], apply_kurtosis_custom(x, **parameters), atol=1e-12
+            )
+
+    def test_sweep_rows_match_calculate_weights(self):
+        delta_node_data = make_delta_node_data(40)
+        # A UID reported by two hotkeys keeps the score of the last one
+        delta_node_data[5].uid = 3
+        grid = parameter_grid(
+            tweets_weight=[0.3, 0.6, 1.0], error_rate_threshold=[2, 10, 30]
+        )
+        result = run_sweep(
+            delta_node_data, [node.uid for node in delta_node_data], grid
+        )
+
+        for index in range(len(result.weights)):
+            weights_manager = WeightsManager(
+                Mock(),
+                tweets_weight=grid["tweets_weight"][index],
+                error_quality_weight=grid["error_quality_weight"][index],
+                error_rate_threshold=grid["error_rate_threshold"][index],
+            )
+            uids, weights = asyncio.run(
+                weights_manager.calculate_weights(delta_node_data, simulation=True)
+            )
+            self.assertEqual(result.uids, uids)
+            np.testing.assert_allclose(result.weights[index], weights, atol=1e-12)
+
+    def test_summary_statistics(self):
+        weights = np.array([[1.0, 1, 1, 1], [0, 0, 0, 4], [0, 0, 0, 0]])
+
+        np.testing.assert_allclose(gini(weights), [0, 0.75, 0])
+        np.testing.assert_allclose(top_k_share(weights, 2), [0.5, 1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
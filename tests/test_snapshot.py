@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from db.snapshot import snapshot_database
+from db.errors_database import ErrorsDatabase
+from db.telemetry_log import TelemetryLogDatabase
+from tests.test_telemetry_database import make_sample
+from validator.errors_storage import ErrorsStorage
+from validator.process_monitor import ProcessMonitor
+from validator.routing_table import RoutingTable
+from validator.snapshots import SnapshotManager
+from validator.telemetry_storage import TelemetryStorage
+
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.telemetry = TelemetryStorage(
+            db_path=self._path("telemetry.db"), engine="sqlite"
+        )
+        for tweets in range(50):
+            self.telemetry.add_telemetry(make_sample("hotkey1", tweets))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, *names):
+        return os.path.join(self.tmp.name, *names)
+
+    def test_snapshot_is_consistent_while_writers_continue(self):
+        target = self._path("snapshots", "telemetry.db")
+
+        def write_between_steps(seconds):
+            # Writes during the copy neither block nor restart it
+            self.telemetry.add_telemetry(make_sample("hotkey2", pause.call_count))
+
+        with patch(
+            "db.snapshot.time.sleep", side_effect=write_between_steps
+        ) as pause:
+            result = snapshot_database(
+                self.telemetry.db.db_path, target, pages_per_step=1
+            )
+
+        writes = len(self.telemetry.get_telemetry_by_hotkey("hotkey2"))
+        self.assertGreater(writes, 1)
+        self.assertEqual(writes, pause.call_count)
+        self.assertEqual(result["path"], target)
+        self.assertGreater(result["pages"], 1)
+        self.assertEqual(os.listdir(self._path("snapshots")), ["telemetry.db"])
+        with sqlite3.connect(target) as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()
+        # The copy is the database as of the start of the snapshot
+        self.assertEqual(count, 50)
+
+    def test_log_engine_snapshot(self):
+        storage = TelemetryStorage(db_path=self._path("telemetry.db"), engine="log")
+        # Several 4 KiB chunks of records
+        for tweets in range(100):
+            storage.add_telemetry(make_sample(f"hotkey{tweets % 3}", tweets))
+
+        def write_between_steps(seconds):
+            storage.add_telemetry(make_sample("hotkey9", 1))
+
+        with patch(
+            "db.telemetry_log.time.sleep", side_effect=write_between_steps
+        ) as pause:
+            result = storage.snapshot(
+                self._path("out", "telemetry_data.db"), pages_per_step=1
+            )
+
+        self.assertEqual(result["path"], self._path("out", "telemetry_data_log"))
+        copy = TelemetryLogDatabase(directory=result["path"])
+        # Writes during the copy neither block it nor end up in it
+        self.assertGreater(pause.call_count, 1)
+        self.assertEqual(
+            len(storage.get_telemetry_by_hotkey("hotkey9")), pause.call_count
+        )
+        self.assertEqual(len(copy.get_all_telemetry()), 100)
+        self.assertEqual(
+            copy.get_telemetry_by_hotkey("hotkey1"),
+            storage.db.get_telemetry_by_hotkey("hotkey1"),
+        )
+        self.assertEqual(sorted(os.listdir(self._path("out"))), ["telemetry_data_log"])
+
+    def test_manager_snapshots_every_database(self):
+        errors = ErrorsStorage(db_path=self._path("errors.db"))
+        validator = SimpleNamespace(
+            telemetry_storage=self.telemetry,
+            routing_table=RoutingTable(engine="memory"),
+            node_manager=SimpleNamespace(errors_storage=errors),
+        )
+        monitor = ProcessMonitor()
+        manager = SnapshotManager(validator, monitor, directory=self._path("out"))
+        # Still buffered, the snapshot flushes it
+        errors.add_error("hotkey1", None, None, "boom")
+
+        results = asyncio.run(manager.run_once())
+
+        # The memory engine has no file to copy
+        self.assertIn("skipped", results["miner_tee_addresses.db"])
+        self.assertTrue(os.path.exists(self._path("out", "telemetry_data.db")))
+        self.assertTrue(os.path.exists(self._path("out", "errors.db")))
+        copied = ErrorsDatabase(db_path=self._path("out", "errors.db"))
+        self.assertEqual(len(copied.get_errors_by_hotkey("hotkey1")), 1)
+        (run,) = monitor.process_history["snapshot"]
+        self.assertEqual(run.nodes_processed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from db.identities import HOTKEY
+from db.migrations import get_version
+from db.memory import MemoryTelemetryDatabase
+from db.telemetry_database import TIMESTAMP_INDEX, TelemetryDatabase, sample_row
+from db.telemetry_delta import build_states
+from validator.metagraph import MetagraphIndex
+from validator.telemetry_storage import TelemetryStorage
+from validator.weights import WeightsManager
+
+
+def make_sample(hotkey, tweets):
+    return SimpleNamespace(
+        hotkey=hotkey,
+        uid=1,
+        boot_time=0,
+        last_operation_time=0,
+        current_time=0,
+        twitter_auth_errors=tweets // 10,
+        twitter_errors=0,
+        twitter_ratelimit_errors=0,
+        twitter_returned_other=0,
+        twitter_returned_profiles=tweets // 2,
+        twitter_returned_tweets=tweets,
+        twitter_scrapes=tweets,
+        web_errors=0,
+        web_success=tweets,
+        worker_id="worker",
+    )
+
+
+class TestTelemetryCompaction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        validator = Mock()
+        validator.metagraph.nodes = {}
+        validator.metagraph_manager.index = MetagraphIndex()
+        self.weights_manager = WeightsManager(validator)
+        self._open_storage("telemetry.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open_storage(self, name):
+        """Score from a fresh database in the temporary directory."""
+        self.storage = TelemetryStorage(db_path=os.path.join(self.tmp.name, name))
+        self.weights_manager.validator.telemetry_storage = self.storage
+
+    def _add_samples(self, hotkey, tweets, hours_ago):
+        """Add one sample per entry of tweets, one minute apart."""
+        for tweet_count in tweets:
+            self.storage.add_telemetry(make_sample(hotkey, tweet_count))
+        with self.storage.db.lock.write(), self.storage.db.connect() as conn:
+            identities = self.storage.db.identities
+            hotkey_id = identities.get_id(conn.cursor(), HOTKEY, hotkey)
+            rows = conn.execute(
+                "SELECT rowid FROM telemetry WHERE hotkey = ? ORDER BY rowid",
+                (hotkey_id,),
+            ).fetchall()
+            for minutes, (rowid,) in enumerate(rows):
+                timestamp = int(time.time()) - hours_ago * 3600 + minutes * 60
+                conn.execute(
+                    "UPDATE telemetry SET timestamp = ?, last_seen = ? "
+                    "WHERE rowid = ?",
+                    (timestamp, timestamp, rowid),
+                )
+            # Timestamps were rewritten behind the delta state's back
+            self.storage.db._rebuild_delta_states(conn.cursor(), [hotkey_id])
+
+    def _deltas(self, incremental=False):
+        if incremental:
+            return self._summary(self.weights_manager.get_delta_node_data())
+        telemetry = self.storage.get_all_telemetry()
+        deltas = self._summary(self.weights_manager._get_delta_node_data(telemetry))
+        # Recomputing from the raw rows agrees with the NodeData records
+        rows = self._summary(self.weights_manager.recompute_delta_node_data())
+        self.assertEqual(rows, deltas)
+        return deltas
+
+    @staticmethod
+    def _summary(delta_node_data):
+        return sorted(
+            (
+                d.hotkey,
+                d.twitter_returned_tweets,
+                d.twitter_auth_errors,
+                d.web_success,
+                d.time_span_seconds,
+                d.timestamp,
+            )
+            for d in delta_node_data
+        )
+
+    def test_compaction_keeps_scores(self):
+        rng = random.Random(42)
+        for index in range(5):
+            tweets, value = [], 0
+            for _ in range(120):
+                # Counters mostly grow, with the occasional TEE restart
+                value = rng.randint(0, 50) if rng.random() < 0.05 else value + 7
+                tweets.append(value)
+            self._add_samples(f"hotkey{index}", tweets, hours_ago=index + 1)
+        # A hotkey whose last sample is a reset keeps at least two samples
+        self._add_samples("hotkey-reset", [10, 20, 30, 5], hours_ago=5)
+
+        before = self._deltas()
+        removed = self.storage.compact_old_entries(age_hours=0, interval_minutes=10)
+        after = self._deltas()
+
+        self.assertGreater(removed, 350)
+        self.assertEqual(before, after)
+        self.assertEqual(self._deltas(incremental=True), after)
+        self.assertEqual(len(self.storage.get_telemetry_by_hotkey("hotkey-reset")), 2)
+
+        rollups = self.storage.get_rollups_by_hotkey("hotkey0")
+        remaining = len(self.storage.get_telemetry_by_hotkey("hotkey0"))
+        self.assertEqual(sum(row[2] for row in rollups), 120 - remaining)
+
+    def test_compaction_keeps_scores_through_expiry(self):
+        tweets = [5, 30, 10, 40, 20, 60, 50, 70, 65, 80]
+        for expired in range(len(tweets) - 1):
+            with patch("time.time", return_value=time.time()):
+                self._check_compaction_through_expiry(tweets, expired)
+
+    def _check_compaction_through_expiry(self, tweets, expired):
+        """Expire the first samples with and without compacting them first."""
+        # Cut off 30 seconds before the first sample that is kept
+        hours = (2 * 3600 - expired * 60 + 30) / 3600
+        deltas = []
+        for compact in (False, True):
+            self._open_storage(f"telemetry-{expired}-{compact}.db")
+            self._add_samples("hotkey1", tweets, hours_ago=2)
+            if compact:
+                self.storage.compact_old_entries(age_hours=0, interval_minutes=10)
+            self.storage.clean_old_entries(hours)
+            deltas.append(self._deltas())
+            self.assertEqual(self._deltas(incremental=True), deltas[-1])
+        self.assertEqual(deltas[0], deltas[1], f"{expired} samples expired")
+
+    def test_repeated_samples_extend_runs(self):
+        start = 3600 * 1000
+        for minutes, tweets in enumerate([10, 10, 10, 20, 20, 5, 5, 5, 5]):
+            sample = make_sample("hotkey1", tweets)
+            sample.current_time = minutes
+            with patch(
+                "db.telemetry_database.time.time", return_value=start + minutes * 60
+            ):
+                self.storage.add_telemetry(sample)
+
+        # Only changed samples add a row
+        with self.storage.db.connect() as conn:
+            runs = conn.execute("SELECT run_length FROM telemetry ORDER BY rowid")
+            self.assertEqual(runs.fetchall(), [(3,), (2,), (4,)])
+        samples = self.storage.get_telemetry_by_hotkey("hotkey1")
+        self.assertEqual(
+            [(s.twitter_returned_tweets, s.current_time) for s in samples],
+            [(10, 0), (10, 2), (20, 3), (20, 4), (5, 5), (5, 8)],
+        )
+        (state,) = self.storage.get_delta_states()
+        self.assertEqual((state.sample_count, state.reset_count), (9, 1))
+        self.assertEqual(
+            self.storage.db.get_delta_telemetry(), self.storage.db.get_delta_states()
+        )
+        self.assertEqual(self._deltas(incremental=True), self._deltas())
+
+        # Runs expire with their last sample. The cutoff falls between two
+        # samples of the last run, which then starts at the next one
+        with patch(
+            "db.telemetry_database.time.time", return_value=start + 390 + 3600
+        ):
+            self.assertEqual(self.storage.clean_old_entries(1), 2)
+        samples = self.storage.get_telemetry_by_hotkey("hotkey1")
+        self.assertEqual(
+            [(s.timestamp, s.current_time) for s in samples],
+            [(start + 7 * 60, 7), (start + 8 * 60, 8)],
+        )
+        (state,) = self.storage.get_delta_states()
+        self.assertEqual(state.sample_count, 2)
+        self.assertEqual(state.baseline.timestamp, start + 7 * 60)
+        self.assertEqual(self._deltas(incremental=True), self._deltas())
+
+        with patch(
+            "db.telemetry_database.time.time", return_value=start + 8 * 60 + 3601
+        ):
+            self.assertEqual(self.storage.clean_old_entries(1), 1)
+        self.assertEqual(self.storage.get_telemetry_by_hotkey("hotkey1"), [])
+        self.assertEqual(self.storage.get_delta_states(), [])
+
+    def test_expiry_trims_runs_like_samples(self):
+        start = 3600 * 1000
+        tweets = [10, 10, 10, 20, 20, 5, 5, 5, 5, 5, 5, 7, 7]
+        for expired in range(len(tweets)):
+            cutoff = start + expired * 60 - 30
+            for db in (
+                TelemetryDatabase(os.path.join(self.tmp.name, f"runs-{expired}.db")),
+                MemoryTelemetryDatabase(),
+            ):
+                rows = []
+                for minutes, tweet_count in enumerate(tweets):
+                    sample = make_sample("hotkey1", tweet_count)
+                    sample.current_time = minutes
+                    with patch("time.time", return_value=start + minutes * 60):
+                        db.add_telemetry(sample)
+                    rows.append(sample_row(sample, start + minutes * 60))
+                with patch("time.time", return_value=cutoff + 3600):
+                    db.clean_old_entries(1)
+
+                # Same states as expiring the samples one by one
+                expected = build_states(
+                    row for row in rows if row[TIMESTAMP_INDEX] >= cutoff
+                )
+                self.assertEqual(db.get_delta_states(), list(expected.values()))
+                self.assertEqual(db.get_delta_telemetry(), db.get_delta_states())
+
+    def test_delta_state_follows_inserts_and_expiry(self):
+        self._add_samples("hotkey1", [10, 20, 5, 30], hours_ago=10)
+        self._add_samples("hotkey2", [1, 2, 3], hours_ago=1)
+        self.storage.add_telemetry(make_sample("hotkey1", 50))
+        self.assertEqual(self._deltas(incremental=True), self._deltas())
+
+        states = {state.hotkey: state for state in self.storage.get_delta_states()}
+        self.assertEqual(states["hotkey1"].sample_count, 5)
+        self.assertEqual(states["hotkey1"].reset_count, 1)
+        self.assertEqual(states["hotkey1"].baseline.twitter_returned_tweets, 5)
+
+        # Expiry drops the baseline, the state is rebuilt from what is left
+        self.storage.clean_old_entries(5)
+        self.assertEqual(self._deltas(incremental=True), self._deltas())
+
+        # and it survives a restart
+        reopened = TelemetryStorage(db_path=self.storage.db.db_path)
+        self.assertEqual(
+            sorted(s.sample_count for s in reopened.get_delta_states()), [1, 3]
+        )
+
+    def test_delta_query_matches_delta_state(self):
+        rng = random.Random(7)
+        for index in range(4):
+            value = 0
+            for _ in range(50):
+                value = rng.randint(0, 20) if rng.random() < 0.1 else value + 3
+                self.storage.add_telemetry(make_sample(f"hotkey{index}", value))
+        self.storage.add_telemetry(make_sample("single", 3))
+
+        def key(state):
+            return state.hotkey
+
+        queried = sorted(self.storage.get_delta_telemetry(), key=key)
+        maintained = sorted(self.storage.get_delta_states(), key=key)
+        self.assertEqual(queried, maintained)
+        self.assertEqual(len(queried), 5)
+
+    def test_recent_samples_are_not_compacted(self):
+        self._add_samples("hotkey1", [10, 20, 30, 40, 5, 15], hours_ago=1)
+        removed = self.storage.compact_old_entries(age_hours=2, interval_minutes=10)
+        self.assertEqual(removed, 0)
+        self.assertEqual(len(self.storage.get_telemetry_by_hotkey("hotkey1")), 6)
+
+
+class TestTelemetryMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "telemetry.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unversioned_database_gets_epoch_timestamps(self):
+        # Schema and data as written before versioning (no worker_id yet)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE telemetry (
+                    hotkey TEXT, uid TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    boot_time INT, last_operation_time INT, current_time INT,
+                    twitter_auth_errors INT, twitter_errors INT,
+                    twitter_ratelimit_errors INT, twitter_returned_other INT,
+                    twitter_returned_profiles INT, twitter_returned_tweets INT,
+                    twitter_scrapes INT, web_errors INT, web_success INT
+                )
+                """
+            )
+            for timestamp, tweets in [
+                ("2024-01-01 00:00:00", 10),
+                ("2024-01-01 00:10:00", 4),
+                ("2024-01-01 00:20:00", 12),
+            ]:
+                conn.execute(
+                    "INSERT INTO telemetry (hotkey, uid, timestamp, "
+                    "twitter_returned_tweets) VALUES ('hotkey1', '1', ?, ?)",
+                    (timestamp, tweets),
+                )
+
+        db = TelemetryDatabase(db_path=self.path)
+        with db.connect() as conn:
+            self.assertEqual(get_version(conn), 4)
+            # Hotkeys are stored once, the rows reference their id
+            self.assertEqual(
+                conn.execute(
+                    "SELECT DISTINCT typeof(hotkey) FROM telemetry"
+                ).fetchall(),
+                [("integer",)],
+            )
+        rows = db.get_telemetry_by_hotkey("hotkey1")
+        self.assertEqual([row[2] for row in rows], [1704067200, 1704067800, 1704068400])
+        self.assertEqual([row[-1] for row in rows], [None, None, None])
+        (state,) = db.get_delta_states()
+        self.assertEqual(state.baseline[2], 1704067800)
+
+        db.add_telemetry(make_sample("hotkey1", 20))
+        self.assertAlmostEqual(
+            db.get_telemetry_by_hotkey("hotkey1")[-1][2], time.time(), delta=5
+        )
+        # Migrations run once, reopening keeps the data as is
+        reopened = TelemetryDatabase(db_path=self.path)
+        self.assertEqual(len(reopened.get_telemetry_by_hotkey("hotkey1")), 4)
+        self.assertEqual(reopened.clean_old_entries(1), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
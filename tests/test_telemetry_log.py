@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from db.telemetry_log import TelemetryLogDatabase
+from tests.test_telemetry_database import make_sample
+from validator.telemetry_storage import TelemetryStorage
+
+
+class TestTelemetryLogDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "telemetry_log")
+        self.db = TelemetryLogDatabase(directory=self.directory)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rows_match_sqlite_layout(self):
+        storage = TelemetryStorage(
+            db_path=os.path.join(self.tmp.name, "telemetry.db"), engine="sqlite"
+        )
+        sample = make_sample("hotkey1", 42)
+        sample.twitter_errors = None
+        storage.add_telemetry(sample)
+        self.db.add_telemetry(sample)
+
+        (sqlite_row,) = storage.db.get_telemetry_by_hotkey("hotkey1")
+        (log_row,) = self.db.get_telemetry_by_hotkey("hotkey1")
+        # Same layout, only the insert timestamps may differ by a second
+        self.assertEqual(log_row[:2] + log_row[3:], sqlite_row[:2] + sqlite_row[3:])
+        self.assertAlmostEqual(log_row[2], sqlite_row[2], delta=1)
+
+    def test_reopen_and_rotate(self):
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1000):
+            self.db.add_telemetry(make_sample("hotkey1", 1))
+            self.db.add_telemetry(make_sample("hotkey2", 2))
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1001 + 5):
+            self.db.add_telemetry(make_sample("hotkey1", 3))
+        self.assertEqual(len(self.db.segments), 2)
+
+        reopened = TelemetryLogDatabase(directory=self.directory)
+        self.assertEqual(
+            [row[11] for row in reopened.get_telemetry_by_hotkey("hotkey1")], [1, 3]
+        )
+        self.assertEqual(
+            sorted(reopened.get_all_hotkeys_with_telemetry()), ["hotkey1", "hotkey2"]
+        )
+        self.assertEqual(len(reopened.get_all_telemetry()), 3)
+
+    def test_delete_and_expire(self):
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1000):
+            self.db.add_telemetry(make_sample("hotkey1", 1))
+            self.db.add_telemetry(make_sample("hotkey2", 2))
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1002):
+            self.db.add_telemetry(make_sample("hotkey2", 3))
+
+        self.assertEqual(self.db.delete_telemetry_by_hotkey("hotkey2"), 2)
+        self.assertEqual(self.db.get_telemetry_by_hotkey("hotkey2"), [])
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1002):
+            self.db.add_telemetry(make_sample("hotkey2", 4))
+        self.assertEqual(len(self.db.get_telemetry_by_hotkey("hotkey2")), 1)
+
+        with patch("db.telemetry_log.time.time", return_value=3600 * 1002):
+            self.db.clean_old_entries(1)
+        self.assertEqual(len(self.db.segments), 1)
+        self.assertEqual(self.db.get_all_hotkeys_with_telemetry(), ["hotkey2"])
+
+        reopened = TelemetryLogDatabase(directory=self.directory)
+        self.assertEqual([row[0] for row in reopened.get_all_telemetry()], ["hotkey2"])
+        (state,) = reopened.get_delta_states()
+        self.assertEqual((state.hotkey, state.sample_count), ("hotkey2", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
+from validator.score_cache import ScoreResult
 from validator.weights import WeightsManager
 from interfaces.types import NodeData
 
@@ -78,3 +79,26 @@ async def test_set_weights(weights_manager, mock_validator):
     ) as mock_set_node_weights:
         await weights_manager.set_weights([])
         mock_set_node_weights.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_set_weights_sets_them_once(weights_manager, mock_validator):
+    mock_validator.keypair.ss58_address = "validator"
+    mock_validator.metagraph.nodes = {"validator": MagicMock(node_id=0)}
+    result = ScoreResult(uids=[1, 2], weights=[0.25, 0.75], delta_node_data=[])
+    weights_manager.get_scores = AsyncMock(return_value=result)
+    with patch("validator.weights.interface.get_substrate"), patch(
+        "validator.weights.weights.blocks_since_last_update", return_value=None
+    ), patch(
+        "validator.weights.weights.min_interval_to_set_weights", return_value=0
+    ), patch(
+        "validator.weights.weights.set_node_weights", return_value=True
+    ) as set_node_weights:
+        await weights_manager.set_weights()
+
+    set_node_weights.assert_called_once()
+    assert set_node_weights.call_args.kwargs["node_ids"] == [1, 2]
+    monitor = mock_validator.background_tasks.process_monitor
+    metrics = monitor.update_metrics.call_args.kwargs
+    assert metrics["successful_nodes"] == 2
+    assert metrics["additional_metrics"]["attempts"] == 1
@@ -1,12 +1,16 @@
 from fastapi import FastAPI, Depends, HTTPException, Header, Body
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
-from typing import Optional, Callable
+from typing import List, Optional, Callable
 import os
+import asyncio
+import time
 from fiber.logging_utils import get_logger
 from datetime import datetime
 import aiohttp
 
+from validator.score_sweep import parameter_grid
+
 logger = get_logger(__name__)
 
 
@@ -152,6 +156,14 @@ class ValidatorAPI:
             dependencies=[Depends(api_key_dependency)],
         )
 
+        self.app.add_api_route(
+            "/monitor/errors/search",
+            self.search_errors,
+            methods=["GET"],
+            tags=["monitoring"],
+            dependencies=[Depends(api_key_dependency)],
+        )
+
         self.app.add_api_route(
             "/monitor/errors/{hotkey}",
             self.monitor_errors_by_hotkey,
@@ -168,6 +180,14 @@ class ValidatorAPI:
             dependencies=[Depends(api_key_dependency)],
         )
 
+        self.app.add_api_route(
+            "/maintenance/snapshot",
+            self.snapshot_databases,
+            methods=["POST"],
+            tags=["maintenance"],
+            dependencies=[Depends(api_key_dependency)],
+        )
+
         # Add process monitoring endpoint
         self.app.add_api_route(
             "/monitoring/processes",
@@ -287,6 +307,15 @@ class ValidatorAPI:
             dependencies=[Depends(api_key_dependency)],
         )
 
+        # Add JSON API endpoint for score parameter sweeps
+        self.app.add_api_route(
+            "/score-simulation/sweep",
+            self.score_simulation_sweep,
+            methods=["POST"],
+            tags=["simulation"],
+            dependencies=[Depends(api_key_dependency)],
+        )
+
         # Add Score Simulation HTML Page Route
         self.app.add_api_route(
             "/score-simulation",
@@ -341,11 +370,13 @@ class ValidatorAPI:
     async def monitor_routing_table(self):
         """Return all miner addresses and their associated hotkeys"""
         try:
-            addresses = self.validator.routing_table.get_all_addresses_with_hotkeys()
+            snapshot = self.validator.routing_table.get_snapshot()
+            addresses = snapshot.addresses_with_hotkeys()
             nodes_count = len(self.validator.metagraph.nodes)
 
             return {
                 "count": nodes_count,
+                "generation": snapshot.generation,
                 "miner_addresses": [
                     {
                         "hotkey": hotkey,
@@ -382,12 +413,34 @@ class ValidatorAPI:
         except Exception as e:
             return {"error": str(e)}
 
-    async def monitor_telemetry_by_hotkey(self, hotkey: str):
-        """Return telemetry data for a specific hotkey"""
+    async def monitor_telemetry_by_hotkey(
+        self,
+        hotkey: str,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+        order: str = "asc",
+        latest_only: bool = False,
+    ):
+        """
+        Return telemetry data for a specific hotkey, optionally from since
+        to until (unix timestamps, until excluded), latest first with
+        order=desc and at most limit samples. latest_only returns just the
+        latest sample.
+        """
         try:
-            telemetry_data = self.validator.telemetry_storage.get_telemetry_by_hotkey(
-                hotkey
-            )
+            telemetry_storage = self.validator.telemetry_storage
+            if latest_only:
+                latest = telemetry_storage.get_latest_telemetry(hotkey)
+                telemetry_data = [] if latest is None else [latest]
+            else:
+                telemetry_data = telemetry_storage.get_telemetry_by_hotkey(
+                    hotkey,
+                    since,
+                    until,
+                    None if limit is None else max(1, limit),
+                    order,
+                )
 
             # Convert NodeData objects to dictionaries
             telemetry_dict_list = []
@@ -425,27 +478,76 @@ class ValidatorAPI:
         try:
             # Get errors storage from node manager since that's where it's initialized
             errors_storage = self.validator.node_manager.errors_storage
-            errors = errors_storage.get_all_errors(limit)
+            # The reads flush buffered errors first, off the event loop
+            errors = await asyncio.to_thread(errors_storage.get_all_errors, limit)
+            error_count_24h = await asyncio.to_thread(
+                errors_storage.get_error_count, 24
+            )
+            error_count_1h = await asyncio.to_thread(errors_storage.get_error_count, 1)
 
             return {
                 "count": len(errors),
                 "errors": errors,
-                "error_count_24h": errors_storage.get_error_count(hours=24),
-                "error_count_1h": errors_storage.get_error_count(hours=1),
+                "error_count_24h": error_count_24h,
+                "error_count_1h": error_count_1h,
             }
         except Exception as e:
             return {"error": str(e)}
 
+    async def search_errors(
+        self,
+        q: Optional[str] = None,
+        hotkey_prefix: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """
+        Search the error log by text, hotkey prefix and last-seen time range
+        ("YYYY-MM-DD HH:MM:SS", UTC), latest first. Pass next_cursor as
+        cursor to get the following page.
+        """
+        try:
+            errors_storage = self.validator.node_manager.errors_storage
+            result = await asyncio.to_thread(
+                errors_storage.search_errors,
+                q,
+                hotkey_prefix,
+                since,
+                until,
+                max(1, min(limit, 1000)),
+                cursor,
+            )
+
+            return {"count": len(result["errors"]), **result}
+        except Exception as e:
+            return {"error": str(e)}
+
     async def monitor_errors_by_hotkey(self, hotkey: str, limit: int = 100):
         """Return errors for a specific hotkey"""
         try:
             errors_storage = self.validator.node_manager.errors_storage
-            errors = errors_storage.get_errors_by_hotkey(hotkey, limit)
+            errors = await asyncio.to_thread(
+                errors_storage.get_errors_by_hotkey, hotkey, limit
+            )
+            counts_by_type = await asyncio.to_thread(
+                errors_storage.get_error_counts_by_type, hotkey, 24
+            )
+            error_count_24h = await asyncio.to_thread(
+                errors_storage.get_error_count, 24, hotkey
+            )
+            error_count_1h = await asyncio.to_thread(
+                errors_storage.get_error_count, 1, hotkey
+            )
 
             return {
                 "hotkey": hotkey,
                 "count": len(errors),
                 "errors": errors,
+                "error_count_24h": error_count_24h,
+                "error_count_1h": error_count_1h,
+                "error_counts_by_type_24h": counts_by_type.get(hotkey, {}),
             }
         except Exception as e:
             return {"error": str(e)}
@@ -466,6 +568,20 @@ class ValidatorAPI:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def snapshot_databases(self):
+        """Write online snapshots of the database files"""
+        try:
+            snapshots = self.validator.background_tasks.snapshots
+            results = await snapshots.run_once()
+
+            return {
+                "success": all("skipped" not in result for result in results.values()),
+                "directory": snapshots.directory,
+                "snapshots": results,
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     async def monitor_unregistered_tee_addresses(self):
         """Return all unregistered TEE addresses in the system"""
         try:
@@ -654,6 +770,69 @@ class ValidatorAPI:
             logger.error(f"Failed to get score simulation data: {str(e)}")
             return {"error": str(e)}
 
+    async def score_simulation_sweep(
+        self,
+        top_percentile: Optional[List[float]] = Body(None),
+        reward_factor: Optional[List[float]] = Body(None),
+        steepness: Optional[List[float]] = Body(None),
+        center_sensitivity: Optional[List[float]] = Body(None),
+        boost_factor: Optional[List[float]] = Body(None),
+        tweets_weight: Optional[List[float]] = Body(None),
+        error_rate_threshold: Optional[List[float]] = Body(None),
+        top_k: int = Body(10),
+        include_weights: bool = Body(True),
+    ):
+        """
+        Simulate the scores of the current telemetry under every combination
+        of the given parameter values. Parameters left out keep their
+        defaults, error_quality_weight is 1 - tweets_weight.
+
+        :param top_k: Number of top UIDs for the top-k share
+        :param include_weights: Whether to return the weights of every set
+        :return: UIDs with their hotkeys, and per parameter set its values,
+                 Gini coefficient, top-k share and weights
+        """
+        started = time.monotonic()
+        try:
+            grid = parameter_grid(
+                top_percentile=top_percentile,
+                reward_factor=reward_factor,
+                steepness=steepness,
+                center_sensitivity=center_sensitivity,
+                boost_factor=boost_factor,
+                tweets_weight=tweets_weight,
+                error_rate_threshold=error_rate_threshold,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            result = await self.validator.weights_manager.sweep_parameters(
+                grid, simulation=True, k=top_k
+            )
+            metagraph_index = self.validator.metagraph_manager.index
+            parameter_sets = []
+            for index in range(len(result.gini)):
+                parameter_set = {
+                    name: float(values[index])
+                    for name, values in result.parameters.items()
+                }
+                parameter_set["gini"] = float(result.gini[index])
+                parameter_set["top_k_share"] = float(result.top_k_share[index])
+                if include_weights:
+                    parameter_set["weights"] = result.weights[index].tolist()
+                parameter_sets.append(parameter_set)
+            return {
+                "uids": result.uids,
+                "hotkeys": [metagraph_index.hotkey(int(uid)) for uid in result.uids],
+                "top_k": top_k,
+                "parameter_sets": parameter_sets,
+                "seconds": round(time.monotonic() - started, 3),
+            }
+        except Exception as e:
+            logger.error(f"Failed to run score parameter sweep: {str(e)}")
+            return {"error": str(e)}
+
     async def monitor_processes(self):
         """Return process monitoring statistics for background tasks"""
         try:
@@ -831,16 +1010,9 @@ class ValidatorAPI:
         :return: Deterministic weighted list of miner IP addresses
         """
         try:
-            # Get telemetry data
-            telemetry = self.validator.telemetry_storage.get_all_telemetry()
-            data_to_score = self.validator.weights_manager._get_delta_node_data(
-                telemetry
-            )
-
-            # Get the scores from calculate_weights
-            uids, weights = await self.validator.weights_manager.calculate_weights(
-                data_to_score, simulation=False
-            )
+            # Get the cached scores of the telemetry deltas
+            scores = await self.validator.weights_manager.get_scores()
+            uids, weights = scores.uids, scores.weights
 
             if not uids or not weights:
                 logger.warning("No scores available for priority miners")
@@ -861,10 +1033,11 @@ class ValidatorAPI:
 
             # Create list of (address, score, hotkey) tuples for addresses that have scores
             address_scores = []
+            hotkey_to_uid = self.validator.metagraph_manager.index.hotkey_to_uid
             for hotkey, address, worker_id in addresses_with_hotkeys:
                 try:
                     # Get UID for this hotkey
-                    node_uid = self.validator.metagraph.nodes[hotkey].node_id
+                    node_uid = hotkey_to_uid[hotkey]
                     if node_uid in uid_to_score:
                         score = uid_to_score[node_uid]
                         address_scores.append((address, score, hotkey))
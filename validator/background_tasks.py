@@ -4,14 +4,21 @@ from fiber.logging_utils import get_logger
 
 from typing import TYPE_CHECKING
 
+from validator.maintenance import MaintenanceScheduler
 from validator.process_monitor import ProcessMonitor
+from validator.snapshots import SnapshotManager
 
 if TYPE_CHECKING:
     from neurons.validator import Validator
 
 logger = get_logger(__name__)
 
-TELEMETRY_EXPIRATION_HOURS = int(os.getenv("TELEMETRY_EXPIRATION_HOURS", "8"))
+TELEMETRY_COMPACTION_AGE_HOURS = float(
+    os.getenv("TELEMETRY_COMPACTION_AGE_HOURS", "2")
+)
+TELEMETRY_ROLLUP_INTERVAL_MINUTES = int(
+    os.getenv("TELEMETRY_ROLLUP_INTERVAL_MINUTES", "10")
+)
 
 
 class BackgroundTasks:
@@ -24,6 +31,10 @@ class BackgroundTasks:
         self.validator = validator
         self.scorer = validator.scorer  # Initialize the scorer from the validator
         self.process_monitor = ProcessMonitor(max_records_per_process=256)
+        # Telemetry expiry and the other cleanups run here, see maintenance_loop
+        self.maintenance = MaintenanceScheduler(validator, self.process_monitor)
+        # Online copies of the database files, see snapshot_loop
+        self.snapshots = SnapshotManager(validator, self.process_monitor)
 
     async def sync_loop(self, cadence_seconds) -> None:
         """Background task to sync metagraph"""
@@ -83,32 +94,17 @@ class BackgroundTasks:
                 # Track connected nodes before processing
                 connected_nodes_count = len(self.validator.node_manager.connected_nodes)
 
-                # Set update flag BEFORE any routing table operations
-                self.validator.routing_table_updating = True
+                # Main tasks in proper order
+                await self.validator.node_manager.connect_new_nodes()
 
-                try:
-                    # Main tasks in proper order
-                    await self.validator.node_manager.connect_new_nodes()
+                # Track nodes after connection attempt
+                nodes_after_connect = len(self.validator.node_manager.connected_nodes)
+                new_connections = nodes_after_connect - connected_nodes_count
 
-                    # Track nodes after connection attempt
-                    nodes_after_connect = len(
-                        self.validator.node_manager.connected_nodes
-                    )
-                    new_connections = nodes_after_connect - connected_nodes_count
-
-                    # Update TEE list while flag is set
-                    await self.validator.node_manager.update_tee_list()
-
-                    # Clean old telemetry entries
-                    self.validator.telemetry_storage.clean_old_entries(
-                        TELEMETRY_EXPIRATION_HOURS
-                    )
-
-                finally:
-                    # Clear update flag before NATS publishing (ensures atomic operation)
-                    self.validator.routing_table_updating = False
+                # Commits the next routing table snapshot generation
+                await self.validator.node_manager.update_tee_list()
 
-                # Now safely publish to NATS with consistent data
+                # Publishers always read a complete snapshot, no need to wait
                 # await self.validator.NATSPublisher.send_connected_nodes()
 
                 # Also publish priority miners sorted by score
@@ -137,9 +133,6 @@ class BackgroundTasks:
                 await asyncio.sleep(safe_cadence)
 
             except Exception as e:
-                # Ensure flag is cleared on error
-                self.validator.routing_table_updating = False
-
                 # Log the error
                 logger.error(f"Error updating TEE 🚩: {str(e)}")
                 logger.debug(f"Error in updating tee: {str(e)}")
@@ -259,6 +252,49 @@ class BackgroundTasks:
                 # Wait before retrying (using pre-calculated safe delay)
                 await asyncio.sleep(retry_delay)
 
+    async def telemetry_compaction_loop(self, cadence_seconds) -> None:
+        """Background task to roll up old telemetry samples"""
+        # Ensure we have a safe cadence value (at least 60 seconds)
+        safe_cadence = max(60, int(cadence_seconds or 900))
+
+        logger.info(
+            f"Starting telemetry compaction loop (cadence: {safe_cadence}s, "
+            f"age: {TELEMETRY_COMPACTION_AGE_HOURS}h, "
+            f"interval: {TELEMETRY_ROLLUP_INTERVAL_MINUTES}m)"
+        )
+
+        while True:
+            execution_id = None
+            try:
+                await asyncio.sleep(safe_cadence)
+                execution_id = self.process_monitor.start_process(
+                    "telemetry_compaction"
+                )
+
+                removed = self.validator.telemetry_storage.compact_old_entries(
+                    TELEMETRY_COMPACTION_AGE_HOURS, TELEMETRY_ROLLUP_INTERVAL_MINUTES
+                )
+
+                self.process_monitor.update_metrics(
+                    execution_id,
+                    nodes_processed=removed,
+                    additional_metrics={"compacted_samples": removed},
+                )
+                self.process_monitor.end_process(execution_id)
+            except Exception as e:
+                logger.error(f"Error compacting telemetry: {str(e)}")
+                if execution_id:
+                    self.process_monitor.update_metrics(execution_id, errors=[str(e)])
+                    self.process_monitor.end_process(execution_id)
+
+    async def maintenance_loop(self, cadence_seconds) -> None:
+        """Background task to run chunked database maintenance"""
+        await self.maintenance.run(cadence_seconds)
+
+    async def snapshot_loop(self, cadence_seconds) -> None:
+        """Background task to snapshot the database files"""
+        await self.snapshots.run(cadence_seconds)
+
     async def monitor_cleanup_loop(self) -> None:
         """Periodic cleanup of monitoring data to prevent memory growth"""
         cleanup_interval = 3600  # 1 hour
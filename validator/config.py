@@ -15,3 +15,6 @@ class Config:
     )
     MINER_WHITELIST = os.getenv("MINER_WHITELIST", "").split(",")
     API_KEY = os.getenv("API_KEY", None)
+    # Storage engine of the routing table, telemetry and error log:
+    # "sqlite" (files) or "memory" (ephemeral, nothing is persisted)
+    STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "sqlite")
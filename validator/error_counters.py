@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+
+def current_minute() -> int:
+    """Minutes since the epoch, the key of a bucket."""
+    return int(time.time() // 60)
+
+
+class ErrorCounters:
+    """
+    Per-minute error counts, in total and per hotkey, over the last
+    horizon_hours. A sliding-window count sums at most one bucket per
+    minute of the window instead of scanning the error log.
+
+    Buckets changed since the last checkpoint are handed out by
+    take_checkpoint so ErrorsStorage can persist them, and load restores
+    them on start.
+    """
+
+    def __init__(self, horizon_hours: int = 24):
+        self.horizon_minutes = max(1, int(horizon_hours * 60))
+        self._lock = threading.Lock()
+        self._buckets = {}  # minute -> {hotkey: count}
+        self._totals = {}  # minute -> count
+        self._dirty = set()  # minutes changed since the last checkpoint
+
+    def oldest_minute(self) -> int:
+        """The first minute of the horizon."""
+        return current_minute() - self.horizon_minutes + 1
+
+    def covers(self, hours) -> bool:
+        """Whether a window of hours fits in the kept buckets."""
+        return hours * 60 <= self.horizon_minutes
+
+    def record(self, hotkey, count: int = 1, minute: Optional[int] = None):
+        """Add count errors of a hotkey to a minute, the current one by default."""
+        minute = current_minute() if minute is None else minute
+        hotkey = hotkey or ""
+        with self._lock:
+            bucket = self._buckets.setdefault(minute, {})
+            bucket[hotkey] = bucket.get(hotkey, 0) + count
+            self._totals[minute] = self._totals.get(minute, 0) + count
+            self._dirty.add(minute)
+
+    def count(self, hours, hotkey=None) -> int:
+        """
+        Errors in the last hours (at most the horizon), of one hotkey or of
+        all of them.
+        """
+        now = current_minute()
+        first = now - min(int(hours * 60), self.horizon_minutes) + 1
+        minutes = range(first, now + 1)
+        with self._lock:
+            if hotkey is None:
+                return sum(self._totals.get(minute, 0) for minute in minutes)
+            return sum(
+                self._buckets[minute].get(hotkey, 0)
+                for minute in minutes
+                if minute in self._buckets
+            )
+
+    def load(self, rows: Iterable[Tuple[int, str, int]]):
+        """Restore checkpointed (minute, hotkey, count) buckets."""
+        with self._lock:
+            for minute, hotkey, count in rows:
+                bucket = self._buckets.setdefault(minute, {})
+                bucket[hotkey] = bucket.get(hotkey, 0) + count
+                self._totals[minute] = self._totals.get(minute, 0) + count
+
+    def take_checkpoint(self) -> Tuple[List[Tuple[int, str, int]], int]:
+        """
+        Drop buckets past the horizon and collect the changed ones.
+
+        :return: (minute, hotkey, count) rows of the changed buckets, with
+                 their full counts, and the oldest minute still kept
+        """
+        oldest = self.oldest_minute()
+        with self._lock:
+            for minute in [minute for minute in self._buckets if minute < oldest]:
+                del self._buckets[minute]
+                del self._totals[minute]
+            rows = [
+                (minute, hotkey, count)
+                for minute in sorted(self._dirty)
+                if minute >= oldest
+                for hotkey, count in self._buckets[minute].items()
+            ]
+            self._dirty = set()
+        return rows, oldest
+
+    def mark_dirty(self, minutes: Iterable[int]):
+        """Include buckets in the next checkpoint again, after one failed."""
+        with self._lock:
+            self._dirty.update(minutes)
@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional
+
+# Free-text details (exception messages) are cut to this length
+ERROR_DETAIL_MAX_LENGTH = 256
+
+
+class ErrorType(IntEnum):
+    """Codes stored in the error log, see ERROR_TEMPLATES for the messages."""
+
+    OTHER = 0
+    HANDSHAKE_FAILED = 1
+    CONNECTION_ERROR = 2
+    TEE_ADDRESS_FAILED = 3
+    SKIPPED_IP_ZERO = 4
+    NODE_DEREGISTERED = 5
+    MESSAGE_NODE_NOT_CONNECTED = 6
+    MESSAGE_STATUS = 7
+    MESSAGE_ERROR = 8
+    TEE_UPDATE_SKIPPED_IP_ZERO = 9
+    TEE_UPDATE_ERROR = 10
+    LOCALHOST_TEE = 11
+    NON_HTTPS_TEE = 12
+    WORKER_ALREADY_REGISTERED = 13
+    ADDRESS_TAKEN = 14
+    REGISTRATION_ERROR = 15
+    TELEMETRY_FAILED = 16
+    SCORE_REPORT_NODE_NOT_CONNECTED = 17
+    SCORE_REPORT_STATUS = 18
+    SCORE_REPORT_ERROR = 19
+
+
+ERROR_TEMPLATES = {
+    ErrorType.OTHER: "{detail}",
+    ErrorType.HANDSHAKE_FAILED: "Failed to establish secure connection",
+    ErrorType.CONNECTION_ERROR: "Connection error: {detail}",
+    ErrorType.TEE_ADDRESS_FAILED: "Failed to get TEE address: {detail}",
+    ErrorType.SKIPPED_IP_ZERO: "Skipped: IP is 0",
+    ErrorType.NODE_DEREGISTERED: "Node deregistered from metagraph",
+    ErrorType.MESSAGE_NODE_NOT_CONNECTED: "Failed to send message: Node not connected",
+    ErrorType.MESSAGE_STATUS: "Failed to send message: Status code {status_code}",
+    ErrorType.MESSAGE_ERROR: "Error sending message: {detail}",
+    ErrorType.TEE_UPDATE_SKIPPED_IP_ZERO: "Skipped updating TEE: IP is 0",
+    ErrorType.TEE_UPDATE_ERROR: "Error during TEE update: {detail}",
+    ErrorType.LOCALHOST_TEE: "Skipped: localhost TEE address",
+    ErrorType.NON_HTTPS_TEE: "Skipped: non-HTTPS TEE address",
+    ErrorType.WORKER_ALREADY_REGISTERED: (
+        "Skipped: Worker ID {worker_id} already registered to hotkey "
+        "{related_hotkey}"
+    ),
+    ErrorType.ADDRESS_TAKEN: "Address already exists for another miner",
+    ErrorType.REGISTRATION_ERROR: "Error during registration: {detail}",
+    ErrorType.TELEMETRY_FAILED: "Telemetry failed to return results",
+    ErrorType.SCORE_REPORT_NODE_NOT_CONNECTED: (
+        "Failed to send score report: Node not connected"
+    ),
+    ErrorType.SCORE_REPORT_STATUS: (
+        "Failed to send score report: Status code {status_code}"
+    ),
+    ErrorType.SCORE_REPORT_ERROR: "Error sending score report: {detail}",
+}
+
+
+@dataclass(frozen=True)
+class ErrorRecord:
+    """A typed error with its structured parameters."""
+
+    error_type: ErrorType
+    worker_id: Optional[str] = None
+    related_hotkey: Optional[str] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+    def render(self) -> str:
+        return render_message(
+            self.error_type,
+            self.worker_id,
+            self.related_hotkey,
+            self.status_code,
+            self.detail,
+        )
+
+
+def render_message(error_type, worker_id, related_hotkey, status_code, detail):
+    """Render the human readable message of a stored error."""
+    try:
+        template = ERROR_TEMPLATES[ErrorType(error_type)]
+    except ValueError:
+        template = "{detail}"
+    return template.format(
+        worker_id=worker_id,
+        related_hotkey=related_hotkey,
+        status_code=status_code,
+        detail=detail if detail is not None else "",
+    )
+
+
+def _detail(value) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value)[:ERROR_DETAIL_MAX_LENGTH]
+
+
+def other(message) -> ErrorRecord:
+    return ErrorRecord(ErrorType.OTHER, detail=_detail(message))
+
+
+def handshake_failed() -> ErrorRecord:
+    return ErrorRecord(ErrorType.HANDSHAKE_FAILED)
+
+
+def connection_error(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.CONNECTION_ERROR, detail=_detail(error))
+
+
+def tee_address_failed(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.TEE_ADDRESS_FAILED, detail=_detail(error))
+
+
+def skipped_ip_zero() -> ErrorRecord:
+    return ErrorRecord(ErrorType.SKIPPED_IP_ZERO)
+
+
+def node_deregistered() -> ErrorRecord:
+    return ErrorRecord(ErrorType.NODE_DEREGISTERED)
+
+
+def message_node_not_connected() -> ErrorRecord:
+    return ErrorRecord(ErrorType.MESSAGE_NODE_NOT_CONNECTED)
+
+
+def message_status(status_code) -> ErrorRecord:
+    return ErrorRecord(ErrorType.MESSAGE_STATUS, status_code=status_code)
+
+
+def message_error(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.MESSAGE_ERROR, detail=_detail(error))
+
+
+def tee_update_skipped_ip_zero() -> ErrorRecord:
+    return ErrorRecord(ErrorType.TEE_UPDATE_SKIPPED_IP_ZERO)
+
+
+def tee_update_error(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.TEE_UPDATE_ERROR, detail=_detail(error))
+
+
+def localhost_tee() -> ErrorRecord:
+    return ErrorRecord(ErrorType.LOCALHOST_TEE)
+
+
+def non_https_tee() -> ErrorRecord:
+    return ErrorRecord(ErrorType.NON_HTTPS_TEE)
+
+
+def worker_already_registered(worker_id, worker_hotkey) -> ErrorRecord:
+    return ErrorRecord(
+        ErrorType.WORKER_ALREADY_REGISTERED,
+        worker_id=str(worker_id),
+        related_hotkey=worker_hotkey,
+    )
+
+
+def address_taken() -> ErrorRecord:
+    return ErrorRecord(ErrorType.ADDRESS_TAKEN)
+
+
+def registration_error(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.REGISTRATION_ERROR, detail=_detail(error))
+
+
+def telemetry_failed() -> ErrorRecord:
+    return ErrorRecord(ErrorType.TELEMETRY_FAILED)
+
+
+def score_report_node_not_connected() -> ErrorRecord:
+    return ErrorRecord(ErrorType.SCORE_REPORT_NODE_NOT_CONNECTED)
+
+
+def score_report_status(status_code) -> ErrorRecord:
+    return ErrorRecord(ErrorType.SCORE_REPORT_STATUS, status_code=status_code)
+
+
+def score_report_error(error) -> ErrorRecord:
+    return ErrorRecord(ErrorType.SCORE_REPORT_ERROR, detail=_detail(error))
@@ -1,62 +1,252 @@
 from db.errors_database import ErrorsDatabase
+from db.memory import MemoryErrorsDatabase
+from validator import error_types
+from validator.config import Config
+from validator.error_counters import ErrorCounters
+from validator.error_types import ErrorRecord, ErrorType
+import asyncio
 import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
 from fiber.logging_utils import get_logger
 import os
 
 logger = get_logger(__name__)
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 class ErrorsStorage:
-    def __init__(self, db_path="errors.db"):
-        self.db = ErrorsDatabase(db_path=db_path)
+    def __init__(self, db_path="errors.db", engine=None):
+        """
+        :param db_path: SQLite file of the sqlite engine
+        :param engine: "sqlite" or "memory", defaults to Config.STORAGE_ENGINE
+        """
+        engine = (engine or Config.STORAGE_ENGINE).lower()
+        if engine == "sqlite":
+            self.db = ErrorsDatabase(db_path=db_path)
+        elif engine == "memory":
+            self.db = MemoryErrorsDatabase()
+        else:
+            raise ValueError(f"Unknown errors storage engine: {engine}")
+        self.db.register_error_types(
+            (error_type.value, error_type.name, template)
+            for error_type, template in error_types.ERROR_TEMPLATES.items()
+        )
         # Get retention period from environment or use default of 5 days
         self.retention_days = int(os.getenv("ERROR_LOGS_RETENTION_DAYS", "5"))
         logger.info(f"Error logs retention period set to {self.retention_days} days")
 
-    def add_error(self, hotkey, tee_address, miner_address, message):
-        """Add a new error entry to the database."""
+        # Repeated errors are merged in memory and written in batches
+        self.flush_interval_seconds = int(
+            os.getenv("ERROR_FLUSH_INTERVAL_SECONDS", "10")
+        )
+        self.max_buffered_errors = int(os.getenv("ERROR_BUFFER_MAX_ENTRIES", "1000"))
+        self.aggregation_window_minutes = int(
+            os.getenv("ERROR_AGGREGATION_WINDOW_MINUTES", "60")
+        )
+        self._buffer = {}
+        self._buffer_lock = threading.Lock()
+        self._flush_task = None
+
+        # Rolling per-minute counts answer get_error_count without scanning
+        # the error log, checkpointed to the database on every flush
+        self.counters = ErrorCounters(
+            int(os.getenv("ERROR_COUNTER_HORIZON_HOURS", "24"))
+        )
+        try:
+            self.counters.load(
+                self.db.load_error_counters(self.counters.oldest_minute())
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load error counters: {e}")
+
+    def add_error(self, hotkey, tee_address, miner_address, error):
+        """
+        Record an error. Identical (hotkey, tee_address, error) errors are
+        merged into one entry with a count and first/last seen timestamps,
+        and written on the next flush.
+
+        :param error: An ErrorRecord from validator.error_types; a plain
+                      message is stored as an OTHER error
+        """
+        if not isinstance(error, ErrorRecord):
+            error = error_types.other(error)
+        logger.debug(f"Recording error for hotkey={hotkey}: {error.render()}")
+        now = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        with self._buffer_lock:
+            key = (hotkey, tee_address, error)
+            entry = self._buffer.get(key)
+            if entry is None:
+                self._buffer[key] = {
+                    "hotkey": hotkey,
+                    "tee_address": tee_address,
+                    "miner_address": miner_address,
+                    "error_type": int(error.error_type),
+                    "worker_id": error.worker_id,
+                    "related_hotkey": error.related_hotkey,
+                    "status_code": error.status_code,
+                    "detail": error.detail,
+                    "count": 1,
+                    "first_seen": now,
+                    "last_seen": now,
+                }
+            else:
+                entry["count"] += 1
+                entry["last_seen"] = now
+                entry["miner_address"] = miner_address
+            buffer_full = len(self._buffer) >= self.max_buffered_errors
+        self.counters.record(hotkey)
+        if buffer_full:
+            return self._flush_full_buffer()
+        return True
+
+    def _flush_full_buffer(self):
+        """
+        Flush the buffer once it's full. On the event loop the write runs in a
+        worker thread, like the other database work, so add_error doesn't
+        stall the loop.
+
+        :return: False if a flush outside the event loop failed
+        """
         try:
-            logger.debug(f"Recording error for hotkey={hotkey}: {message}")
-            self.db.add_error(hotkey, tee_address, miner_address, message)
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.flush()
+        # One flush at a time, it takes everything buffered until it starts
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(asyncio.to_thread(self.flush))
+        return True
+
+    def flush(self):
+        """
+        Write all buffered errors in one transaction.
+
+        :return: True if the buffer was written (or empty), False otherwise
+        """
+        with self._buffer_lock:
+            entries, self._buffer = self._buffer, {}
+        self._checkpoint_counters()
+        if not entries:
+            return True
+        try:
+            self.db.add_errors(entries.values(), self._window_start)
+            logger.debug(f"Flushed {len(entries)} aggregated errors")
             return True
         except sqlite3.Error as e:
-            logger.error(f"Failed to add error: {e}")
+            logger.error(f"Failed to flush {len(entries)} errors: {e}")
+            # Put the entries back so they are retried on the next flush
+            with self._buffer_lock:
+                for key, entry in entries.items():
+                    newer = self._buffer.get(key)
+                    if newer is not None:
+                        entry["count"] += newer["count"]
+                        entry["last_seen"] = newer["last_seen"]
+                        entry["miner_address"] = newer["miner_address"]
+                    self._buffer[key] = entry
             return False
 
+    def _checkpoint_counters(self):
+        """Persist the error counter buckets changed since the last flush."""
+        rows, oldest_minute = self.counters.take_checkpoint()
+        if not rows:
+            return
+        try:
+            self.db.save_error_counters(rows, oldest_minute)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to checkpoint error counters: {e}")
+            self.counters.mark_dirty({minute for minute, _, _ in rows})
+
+    def _window_start(self, first_seen):
+        """Start of the aggregation window that first_seen falls into."""
+        window = timedelta(minutes=max(1, self.aggregation_window_minutes))
+        seen = datetime.strptime(first_seen, TIMESTAMP_FORMAT)
+        start = datetime.min + ((seen - datetime.min) // window) * window
+        return start.strftime(TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def _with_messages(errors):
+        """Add the rendered message and error type name to stored errors."""
+        for error in errors:
+            error["message"] = error_types.render_message(
+                error["error_type"],
+                error["worker_id"],
+                error["related_hotkey"],
+                error["status_code"],
+                error["detail"],
+            )
+            try:
+                error["error_type"] = ErrorType(error["error_type"]).name
+            except ValueError:
+                pass
+        return errors
+
     def get_errors_by_hotkey(self, hotkey, limit=100):
         """Get errors for a specific hotkey."""
+        self.flush()
         try:
-            return self.db.get_errors_by_hotkey(hotkey, limit)
+            return self._with_messages(self.db.get_errors_by_hotkey(hotkey, limit))
         except sqlite3.Error as e:
             logger.error(f"Failed to get errors for hotkey {hotkey}: {e}")
             return []
 
     def get_all_errors(self, limit=100):
         """Get all errors."""
+        self.flush()
         try:
-            return self.db.get_all_errors(limit)
+            return self._with_messages(self.db.get_all_errors(limit))
         except sqlite3.Error as e:
             logger.error(f"Failed to get all errors: {e}")
             return []
 
-    def clean_old_errors(self, hours=24):
+    def search_errors(
+        self,
+        query=None,
+        hotkey_prefix=None,
+        since=None,
+        until=None,
+        limit=100,
+        cursor=None,
+    ):
+        """
+        Search errors, latest first, see ErrorsDatabase.search_errors.
+
+        :raises ValueError: If cursor is not a next_cursor of a previous page
+        :return: Dict with the errors and the next_cursor (None on the last
+                 page)
+        """
+        self.flush()
+        try:
+            errors, next_cursor = self.db.search_errors(
+                query, hotkey_prefix, since, until, limit, cursor
+            )
+            return {"errors": self._with_messages(errors), "next_cursor": next_cursor}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to search errors: {e}")
+            return {"errors": [], "next_cursor": None}
+
+    def clean_old_errors(self, hours=24, limit=None):
         """Clean errors older than the specified hours."""
+        self.flush()
         try:
-            count = self.db.clean_old_errors(hours)
+            count = self.db.clean_old_errors(hours, limit)
             logger.info(f"Cleaned {count} errors older than {hours} hours")
             return count
         except sqlite3.Error as e:
             logger.error(f"Failed to clean old errors: {e}")
             return 0
 
-    def clean_errors_based_on_retention(self):
+    def clean_errors_based_on_retention(self, limit=None):
         """
         Clean errors based on the configured retention period.
         Uses ERROR_LOGS_RETENTION_DAYS environment variable (default: 5 days).
+
+        :param limit: Maximum number of rows deleted per call, None for all
         """
         retention_hours = self.retention_days * 24
+        self.flush()
         try:
-            count = self.db.clean_old_errors(retention_hours)
+            count = self.db.clean_old_errors(retention_hours, limit)
             logger.info(
                 f"Retention cleanup: removed {count} errors older than {self.retention_days} days"
             )
@@ -65,10 +255,57 @@ class ErrorsStorage:
             logger.error(f"Failed to clean errors based on retention period: {e}")
             return 0
 
-    def get_error_count(self, hours=24):
-        """Get count of errors in the last specified hours."""
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim free pages and refresh the query planner statistics."""
         try:
-            return self.db.get_error_count(hours)
+            self.db.optimize(vacuum_pages)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to optimize errors database: {e}")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the errors database to target_path while it stays in use. The
+        buffered errors are flushed first, so the copy includes them.
+
+        :return: Snapshot details, None if the engine keeps no file or the
+                 copy failed
+        """
+        self.flush()
+        try:
+            return self.db.snapshot(target_path, pages_per_step, step_pause_seconds)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to snapshot errors database: {e}")
+            return None
+
+    def get_error_count(self, hours=24, hotkey=None):
+        """
+        Get count of errors in the last specified hours, of all hotkeys or
+        one. Windows within the counter horizon are summed from the rolling
+        counters, longer ones are counted in the database.
+        """
+        if self.counters.covers(hours):
+            return self.counters.count(hours, hotkey)
+        self.flush()
+        try:
+            return self.db.get_error_count(hours, hotkey)
         except sqlite3.Error as e:
             logger.error(f"Failed to get error count: {e}")
             return 0
+
+    def get_error_counts_by_type(self, hotkey=None, hours=24):
+        """
+        Get error counts per hotkey and error type in the last specified
+        hours.
+
+        :return: Dict of hotkey -> {error type name: count}
+        """
+        self.flush()
+        try:
+            rows = self.db.get_error_counts_by_type(hotkey, hours)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get error counts by type: {e}")
+            return {}
+        counts = {}
+        for row_hotkey, code, name, count in rows:
+            counts.setdefault(row_hotkey, {})[name or str(code)] = count
+        return counts
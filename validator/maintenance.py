@@ -0,0 +1,161 @@
+import os
+import time
+import asyncio
+from fiber.logging_utils import get_logger
+
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+from validator.process_monitor import ProcessMonitor
+
+if TYPE_CHECKING:
+    from neurons.validator import Validator
+
+logger = get_logger(__name__)
+
+TELEMETRY_EXPIRATION_HOURS = int(os.getenv("TELEMETRY_EXPIRATION_HOURS", "8"))
+MAINTENANCE_CHUNK_SIZE = int(os.getenv("MAINTENANCE_CHUNK_SIZE", "500"))
+MAINTENANCE_CHUNK_PAUSE_SECONDS = float(
+    os.getenv("MAINTENANCE_CHUNK_PAUSE_SECONDS", "0.05")
+)
+MAINTENANCE_VACUUM_PAGES = int(os.getenv("MAINTENANCE_VACUUM_PAGES", "1000"))
+
+# Processes that count as foreground work; vacuum/optimize waits for them
+FOREGROUND_PROCESSES = ("update_tee", "telemetry_loop", "telemetry_compaction")
+
+
+class MaintenanceScheduler:
+    """
+    Runs the housekeeping of the validator's SQLite files off the hot path.
+
+    Cleanups delete in chunks of chunk_size rows, each in its own short
+    transaction on a worker thread, with a pause in between so foreground
+    reads and writes can take the database locks. Vacuum and optimize only
+    run when no foreground process is in flight. Timings of every job are
+    recorded in the process monitor under "maintenance".
+    """
+
+    def __init__(
+        self,
+        validator: "Validator",
+        process_monitor: ProcessMonitor,
+        chunk_size: int = MAINTENANCE_CHUNK_SIZE,
+        chunk_pause_seconds: float = MAINTENANCE_CHUNK_PAUSE_SECONDS,
+        vacuum_pages: int = MAINTENANCE_VACUUM_PAGES,
+    ):
+        self.validator = validator
+        self.process_monitor = process_monitor
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_pause_seconds = chunk_pause_seconds
+        self.vacuum_pages = vacuum_pages
+
+    def cleanup_jobs(self) -> List[Tuple[str, Callable[[int], int]]]:
+        """
+        The chunked cleanups, as (name, delete) pairs where delete(limit)
+        removes at most limit rows and returns how many it removed.
+        """
+        errors_storage = self.validator.node_manager.errors_storage
+        return [
+            (
+                "telemetry_expiration",
+                lambda limit: self.validator.telemetry_storage.clean_old_entries(
+                    TELEMETRY_EXPIRATION_HOURS, limit
+                ),
+            ),
+            ("error_retention", errors_storage.clean_errors_based_on_retention),
+            (
+                "unregistered_tees",
+                self.validator.routing_table.clean_old_unregistered_tees,
+            ),
+        ]
+
+    def optimize_jobs(self) -> List[Tuple[str, Callable[[int], None]]]:
+        """The vacuum/optimize passes, one per database file."""
+        return [
+            ("optimize_telemetry", self.validator.telemetry_storage.optimize),
+            ("optimize_errors", self.validator.node_manager.errors_storage.optimize),
+            ("optimize_routing_table", self.validator.routing_table.optimize),
+        ]
+
+    def is_quiet(self) -> bool:
+        """True when no foreground process is currently running."""
+        running = self.process_monitor.current_executions.values()
+        return not any(
+            execution["process_name"] in FOREGROUND_PROCESSES for execution in running
+        )
+
+    async def run_chunked(self, delete: Callable[[int], int]) -> Tuple[int, int]:
+        """
+        Call delete in chunks until a chunk removes fewer rows than asked.
+
+        :return: (rows removed, chunks run)
+        """
+        removed, chunks = 0, 0
+        while True:
+            count = await asyncio.to_thread(delete, self.chunk_size)
+            removed += count or 0
+            chunks += 1
+            if not count or count < self.chunk_size:
+                return removed, chunks
+            await asyncio.sleep(self.chunk_pause_seconds)
+
+    async def run_once(self) -> dict:
+        """
+        Run every cleanup, then vacuum/optimize if the validator is quiet.
+
+        :return: Dict of job name -> timing and row counts
+        """
+        execution_id = self.process_monitor.start_process("maintenance")
+        results = {}
+        errors = []
+        for name, delete in self.cleanup_jobs():
+            started = time.monotonic()
+            try:
+                removed, chunks = await self.run_chunked(delete)
+                results[name] = {"removed": removed, "chunks": chunks}
+            except Exception as e:
+                logger.error(f"Maintenance job {name} failed: {str(e)}")
+                errors.append(f"{name}: {str(e)}")
+                results[name] = {"error": str(e)}
+            results[name]["seconds"] = round(time.monotonic() - started, 3)
+
+        for name, optimize in self.optimize_jobs():
+            if not self.is_quiet():
+                results[name] = {"skipped": "foreground process running"}
+                continue
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(optimize, self.vacuum_pages)
+                results[name] = {}
+            except Exception as e:
+                logger.error(f"Maintenance job {name} failed: {str(e)}")
+                errors.append(f"{name}: {str(e)}")
+                results[name] = {"error": str(e)}
+            results[name]["seconds"] = round(time.monotonic() - started, 3)
+
+        removed = sum(result.get("removed", 0) for result in results.values())
+        self.process_monitor.update_metrics(
+            execution_id,
+            nodes_processed=removed,
+            errors=errors,
+            additional_metrics=results,
+        )
+        self.process_monitor.end_process(execution_id)
+        return results
+
+    async def run(self, cadence_seconds) -> None:
+        """Background task running maintenance every cadence_seconds."""
+        # Ensure we have a safe cadence value (at least 60 seconds)
+        safe_cadence = max(60, int(cadence_seconds or 600))
+
+        logger.info(
+            f"Starting maintenance loop (cadence: {safe_cadence}s, "
+            f"chunk size: {self.chunk_size})"
+        )
+
+        while True:
+            try:
+                await asyncio.sleep(safe_cadence)
+                results = await self.run_once()
+                logger.debug(f"Maintenance finished: {results}")
+            except Exception as e:
+                logger.error(f"Error in maintenance loop: {str(e)}")
@@ -1,7 +1,7 @@
 from fiber.logging_utils import get_logger
 
 from fiber.chain import interface
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from neurons.validator import Validator
@@ -9,6 +9,55 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+class MetagraphIndex:
+    """
+    Constant-time hotkey <-> uid lookups over the metagraph nodes as of one
+    sync. Built once per sync by MetagraphManager and shared by scoring,
+    NATS and the API instead of scanning or re-mapping the nodes per call.
+    """
+
+    def __init__(self, nodes: Optional[Dict[str, object]] = None):
+        """
+        :param nodes: metagraph.nodes, hotkey -> node with a node_id
+        """
+        nodes = nodes or {}
+        # In metagraph order
+        self.hotkey_to_uid: Dict[str, int] = {
+            hotkey: node.node_id for hotkey, node in nodes.items()
+        }
+        self.uid_to_hotkey: Dict[int, str] = {
+            uid: hotkey for hotkey, uid in self.hotkey_to_uid.items()
+        }
+        # Dense, the hotkey of every uid up to the highest, None for gaps
+        self.hotkeys_by_uid: List[Optional[str]] = [None] * (
+            max(self.uid_to_hotkey, default=-1) + 1
+        )
+        for uid, hotkey in self.uid_to_hotkey.items():
+            self.hotkeys_by_uid[uid] = hotkey
+
+    def uid(self, hotkey: str, default=None) -> Optional[int]:
+        """The uid of a hotkey, default if it isn't in the metagraph."""
+        return self.hotkey_to_uid.get(hotkey, default)
+
+    def hotkey(self, uid: int, default=None) -> Optional[str]:
+        """The hotkey of a uid, default if no node has it."""
+        if 0 <= uid < len(self.hotkeys_by_uid):
+            hotkey = self.hotkeys_by_uid[uid]
+            if hotkey is not None:
+                return hotkey
+        return default
+
+    def items(self) -> Iterator[Tuple[int, str]]:
+        """(uid, hotkey) of every node, in metagraph order."""
+        return ((uid, hotkey) for hotkey, uid in self.hotkey_to_uid.items())
+
+    def __contains__(self, hotkey) -> bool:
+        return hotkey in self.hotkey_to_uid
+
+    def __len__(self) -> int:
+        return len(self.hotkey_to_uid)
+
+
 class MetagraphManager:
     def __init__(self, validator: "Validator"):
         """
@@ -17,6 +66,11 @@ class MetagraphManager:
         :param validator: The validator instance to manage the metagraph.
         """
         self.validator = validator
+        self.index = MetagraphIndex(validator.metagraph.nodes)
+
+    def rebuild_index(self) -> None:
+        """Index the metagraph nodes again, after they were synced."""
+        self.index = MetagraphIndex(self.validator.metagraph.nodes)
 
     def sync_substrate(self) -> None:
         """
@@ -33,6 +87,7 @@ class MetagraphManager:
         try:
             self.sync_substrate()
             self.validator.metagraph.sync_nodes()
+            self.rebuild_index()
 
             await self.validator.node_manager.remove_disconnected_nodes()
 
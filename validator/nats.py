@@ -27,27 +27,7 @@ class MinersNATSPublisher:
             if process_monitor:
                 execution_id = process_monitor.start_process("send_connected_nodes")
 
-            # Check if routing table is currently being updated
-            if getattr(self.validator, "routing_table_updating", False):
-                logger.debug("Skipping NATS publish during routing table update")
-
-                # Update metrics for skipped execution
-                if execution_id and process_monitor:
-                    process_monitor.update_metrics(
-                        execution_id,
-                        nodes_processed=0,
-                        successful_nodes=0,
-                        failed_nodes=0,
-                        additional_metrics={
-                            "skipped": True,
-                            "reason": "routing_table_updating",
-                            "addresses": [],
-                        },
-                    )
-                    process_monitor.end_process(execution_id)
-                return
-
-            # Get connected nodes from the validator using atomic method
+            # Read from the latest committed routing table snapshot
             routing_table = self.validator.routing_table
             addresses = routing_table.get_all_addresses_atomic()
 
@@ -167,40 +147,10 @@ class MinersNATSPublisher:
             if process_monitor:
                 execution_id = process_monitor.start_process("send_priority_miners")
 
-            # Check if routing table is currently being updated
-            if getattr(self.validator, "routing_table_updating", False):
-                logger.debug(
-                    "Skipping priority miners NATS publish during routing table update"
-                )
-
-                # Update metrics for skipped execution
-                if execution_id and process_monitor:
-                    process_monitor.update_metrics(
-                        execution_id,
-                        nodes_processed=0,
-                        successful_nodes=0,
-                        failed_nodes=0,
-                        additional_metrics={
-                            "skipped": True,
-                            "reason": "routing_table_updating",
-                            "priority_miners": [],
-                        },
-                    )
-                    process_monitor.end_process(execution_id)
-                return
-
-            # Get telemetry data and calculate priority miners
+            # Get priority miners sorted by the cached scores
             logger.info("Calculating priority miners based on scoring")
-            telemetry = self.validator.telemetry_storage.get_all_telemetry()
-            delta_node_data = self.validator.weights_manager._get_delta_node_data(
-                telemetry
-            )
-
-            # Get priority miners sorted by score
             priority_miners = (
-                await self.validator.weights_manager.get_priority_miners_by_score(
-                    delta_node_data
-                )
+                await self.validator.weights_manager.get_priority_miners_by_score()
             )
 
             if len(priority_miners) == 0:
@@ -288,14 +238,8 @@ class MinersNATSPublisher:
             if execution_id and process_monitor:
                 priority_miners = []
                 try:
-                    # Try to get telemetry for error reporting
-                    telemetry = self.validator.telemetry_storage.get_all_telemetry()
-                    delta_node_data = (
-                        self.validator.weights_manager._get_delta_node_data(telemetry)
-                    )
-                    priority_miners = await self.validator.weights_manager.get_priority_miners_by_score(
-                        delta_node_data
-                    )
+                    # Try to get priority miners for error reporting
+                    priority_miners = await self.validator.weights_manager.get_priority_miners_by_score()
                 except:
                     pass  # If we can't get priority miners, just use empty list
 
@@ -10,6 +10,8 @@ from fiber.logging_utils import get_logger
 from interfaces.types import NodeData
 from validator.telemetry import TEETelemetryClient
 from validator.errors_storage import ErrorsStorage
+from validator.score_reports import ScoreReportQueue
+from validator import error_types
 import asyncio
 from datetime import datetime
 
@@ -29,25 +31,21 @@ class NodeManager:
         self.validator = validator
         self.connected_nodes: Dict[str, Node] = {}
         self.errors_storage = ErrorsStorage()
+        # Score reports are delivered in the background, see send_score_report
+        self.score_reports = ScoreReportQueue(self.send_score_report)
 
-        # Schedule error logs cleanup based on retention period
-        asyncio.create_task(self.run_periodic_error_cleanup())
+        # Periodically write buffered errors
+        asyncio.create_task(self.run_periodic_error_flush())
+        asyncio.create_task(self.score_reports.run())
 
-    async def run_periodic_error_cleanup(self):
-        """Run periodic cleanup of error logs based on retention period."""
-        cleanup_interval_hours = 6  # Run cleanup every 6 hours
+    async def run_periodic_error_flush(self):
+        """Write the errors buffered by ErrorsStorage in batches."""
         while True:
             try:
-                # Wait for first interval
-                await asyncio.sleep(cleanup_interval_hours * 3600)
-
-                # Perform cleanup based on retention policy
-                count = self.errors_storage.clean_errors_based_on_retention()
-                logger.info(f"Scheduled error logs cleanup removed {count} old entries")
-
+                await asyncio.sleep(self.errors_storage.flush_interval_seconds)
+                await asyncio.to_thread(self.errors_storage.flush)
             except Exception as e:
-                logger.error(f"Error during scheduled error logs cleanup: {str(e)}")
-                await asyncio.sleep(3600)  # Wait one hour and try again
+                logger.error(f"Error during scheduled error flush: {str(e)}")
 
     async def connect_with_miner(
         self, miner_address: str, miner_hotkey: str, node: Node
@@ -76,7 +74,7 @@ class NodeManager:
                     hotkey=miner_hotkey,
                     tee_address="",
                     miner_address=miner_address,
-                    message="Failed to establish secure connection",
+                    error=error_types.handshake_failed(),
                 )
                 return False
 
@@ -114,7 +112,7 @@ class NodeManager:
                 hotkey=miner_hotkey,
                 tee_address="",
                 miner_address=miner_address,
-                message=f"Connection error: {str(e)}",
+                error=error_types.connection_error(e),
             )
             return False
 
@@ -128,7 +126,7 @@ class NodeManager:
                 hotkey=node.hotkey,
                 tee_address="",
                 miner_address=f"{node.ip}:{node.port}",
-                message=f"Failed to get TEE address: {str(e)}",
+                error=error_types.tee_address_failed(e),
             )
 
     async def connect_new_nodes(self) -> None:
@@ -164,7 +162,7 @@ class NodeManager:
                         hotkey=node.hotkey,
                         tee_address="",
                         miner_address=f"{node.ip}:{node.port}",
-                        message="Skipped: IP is 0",
+                        error=error_types.skipped_ip_zero(),
                     )
                     continue
 
@@ -200,7 +198,7 @@ class NodeManager:
                     hotkey=hotkey,
                     tee_address="",
                     miner_address="",
-                    message="Node deregistered from metagraph",
+                    error=error_types.node_deregistered(),
                 )
                 keys_to_delete.append(hotkey)
 
@@ -226,7 +224,7 @@ class NodeManager:
                     hotkey=node_hotkey,
                     tee_address="",
                     miner_address="",
-                    message="Failed to send message: Node not connected",
+                    error=error_types.message_node_not_connected(),
                 )
                 return
 
@@ -256,7 +254,7 @@ class NodeManager:
                     hotkey=node_hotkey,
                     tee_address="",
                     miner_address=f"{node.ip}:{node.port}",
-                    message=f"Failed to send message: Status code {response.status_code}",
+                    error=error_types.message_status(response.status_code),
                 )
 
         except Exception as e:
@@ -267,31 +265,45 @@ class NodeManager:
                 hotkey=node_hotkey,
                 tee_address="",
                 miner_address="",
-                message=f"Error sending message: {str(e)}",
+                error=error_types.message_error(e),
             )
 
     async def update_tee_list(self):
         logger.info("Starting TEE list update")
         routing_table = self.validator.routing_table
 
-        # Note: routing_table_updating flag is now managed by background_tasks
-        # to ensure proper coordination with NATS publishing
+        # Readers keep using the previous snapshot until the batch commits
 
         # Get all current entries and initialize tracking
         current_entries_set, verified_entries = self._get_current_entries_for_update(
             routing_table
         )
 
-        # Process all connected nodes
-        await self._process_connected_nodes(routing_table, verified_entries)
+        # Collect the cycle's mutations and apply them in a single transaction
+        batch = routing_table.batch()
 
-        # Clean up unverified entries
-        await self._cleanup_unverified_entries(
-            routing_table, current_entries_set, verified_entries
-        )
+        try:
+            # Process all connected nodes
+            await self._process_connected_nodes(
+                routing_table, batch, verified_entries
+            )
 
-        # Clean up unregistered TEEs
-        await self._cleanup_unregistered_tees(routing_table)
+            # Clean up unverified entries
+            await self._cleanup_unverified_entries(
+                routing_table, batch, current_entries_set, verified_entries
+            )
+
+            # Clean up unregistered TEEs
+            await self._cleanup_unregistered_tees(batch)
+        except Exception as e:
+            logger.error(
+                f"TEE list update failed after queuing {len(batch)} "
+                f"operations: {str(e)}"
+            )
+            raise
+        finally:
+            # Keep what the cycle got through, like the direct writes did
+            batch.commit()
 
         logger.info("Completed TEE list update ✅")
 
@@ -313,7 +325,7 @@ class NodeManager:
 
         return current_entries_set, verified_entries
 
-    async def _process_connected_nodes(self, routing_table, verified_entries):
+    async def _process_connected_nodes(self, routing_table, batch, verified_entries):
         """Process all connected nodes for TEE registration."""
         # Shuffle connected nodes for fair processing order
         connected_nodes_items = list(self.connected_nodes.items())
@@ -324,17 +336,19 @@ class NodeManager:
             if hotkey in self.validator.metagraph.nodes:
                 node = self.validator.metagraph.nodes[hotkey]
                 await self._process_single_node(
-                    node, hotkey, routing_table, verified_entries
+                    node, hotkey, routing_table, batch, verified_entries
                 )
 
-    async def _process_single_node(self, node, hotkey, routing_table, verified_entries):
+    async def _process_single_node(
+        self, node, hotkey, routing_table, batch, verified_entries
+    ):
         """Process a single node's TEE addresses."""
         if node.ip == "0":
             self.errors_storage.add_error(
                 hotkey=hotkey,
                 tee_address="",
                 miner_address=f"{node.ip}:{node.port}",
-                message="Skipped updating TEE: IP is 0",
+                error=error_types.tee_update_skipped_ip_zero(),
             )
             return
 
@@ -350,7 +364,12 @@ class NodeManager:
                 for tee_address in tee_addresses.split(","):
                     tee_address = tee_address.strip()
                     await self._process_tee_address(
-                        tee_address, node, hotkey, routing_table, verified_entries
+                        tee_address,
+                        node,
+                        hotkey,
+                        routing_table,
+                        batch,
+                        verified_entries,
                     )
             else:
                 logger.debug(f"No TEE addresses found for hotkey {hotkey}")
@@ -367,7 +386,7 @@ class NodeManager:
                 hotkey=hotkey,
                 tee_address="",
                 miner_address=f"{node.ip}:{node.port}",
-                message=f"Error during TEE update: {str(e)}",
+                error=error_types.tee_update_error(e),
             )
 
     async def _process_tee_address(
@@ -376,6 +395,7 @@ class NodeManager:
         node,
         hotkey,
         routing_table,
+        batch,
         verified_entries,
     ):
         """Process a single TEE address for registration."""
@@ -386,7 +406,7 @@ class NodeManager:
                 hotkey=hotkey,
                 tee_address=tee_address,
                 miner_address=f"{node.ip}:{node.port}",
-                message="Skipped: localhost TEE address",
+                error=error_types.localhost_tee(),
             )
             return
 
@@ -397,7 +417,7 @@ class NodeManager:
                 hotkey=hotkey,
                 tee_address=tee_address,
                 miner_address=f"{node.ip}:{node.port}",
-                message="Skipped: non-HTTPS TEE address",
+                error=error_types.non_https_tee(),
             )
             return
 
@@ -416,7 +436,7 @@ class NodeManager:
                     tee_address,
                     node,
                     routing_table,
-                    "Telemetry failed to return results",
+                    error_types.telemetry_failed(),
                 )
                 return
 
@@ -438,8 +458,8 @@ class NodeManager:
                 )
                 return
 
-            # Check worker ownership
-            worker_hotkey = self.validator.routing_table.get_worker_hotkey(worker_id)
+            # Check worker ownership, including registrations queued this cycle
+            worker_hotkey = batch.get_worker_hotkey(worker_id)
 
             logger.info(f"worker id: {worker_id}")
             logger.info(f"worker hotkey: {worker_hotkey}")
@@ -460,13 +480,15 @@ class NodeManager:
                     hotkey=hotkey,
                     tee_address=tee_address,
                     miner_address=f"{node.ip}:{node.port}",
-                    message=f"Skipped: Worker ID {worker_id} already registered to hotkey {worker_hotkey}",
+                    error=error_types.worker_already_registered(
+                        worker_id, worker_hotkey
+                    ),
                 )
                 return
 
             # Register the worker and TEE address
             await self._register_tee_address(
-                routing_table,
+                batch,
                 hotkey,
                 node,
                 tee_address,
@@ -481,7 +503,7 @@ class NodeManager:
                 hotkey=hotkey,
                 tee_address=tee_address,
                 miner_address=f"{node.ip}:{node.port}",
-                message="Address already exists for another miner",
+                error=error_types.address_taken(),
             )
         except Exception as e:
             logger.error(
@@ -495,11 +517,11 @@ class NodeManager:
                 hotkey=hotkey,
                 tee_address=tee_address,
                 miner_address=f"{node.ip}:{node.port}",
-                message=f"Error during registration: {str(e)}",
+                error=error_types.registration_error(e),
             )
 
     async def _handle_telemetry_failure(
-        self, hotkey, tee_address, node, routing_table, message
+        self, hotkey, tee_address, node, routing_table, error
     ):
         """Handle cases where telemetry fails or returns invalid data."""
         logger.warn(
@@ -515,12 +537,12 @@ class NodeManager:
             hotkey=hotkey,
             tee_address=tee_address,
             miner_address=f"{node.ip}:{node.port}",
-            message=message,
+            error=error,
         )
 
     async def _register_tee_address(
         self,
-        routing_table,
+        batch,
         hotkey,
         node,
         tee_address,
@@ -528,9 +550,9 @@ class NodeManager:
         worker_hotkey,
         verified_entries,
     ):
-        """Register a TEE address and send notifications."""
-        routing_table.register_worker(hotkey=hotkey, worker_id=worker_id)
-        routing_table.add_miner_address(hotkey, node.node_id, tee_address, worker_id)
+        """Queue a TEE address registration and send notifications."""
+        batch.register_worker(hotkey=hotkey, worker_id=worker_id)
+        batch.add_miner_address(hotkey, node.node_id, tee_address, worker_id)
 
         logger.debug(f"Added TEE address {tee_address} for hotkey {hotkey}")
 
@@ -553,7 +575,7 @@ class NodeManager:
         )
 
     async def _cleanup_unverified_entries(
-        self, routing_table, current_entries_set, verified_entries
+        self, routing_table, batch, current_entries_set, verified_entries
     ):
         """Clean up entries that weren't verified in this cycle and are older than a reasonable threshold."""
         unverified_entries = current_entries_set - verified_entries
@@ -581,7 +603,7 @@ class NodeManager:
                                     ).total_seconds() / 3600
 
                                     if age_hours >= 4:
-                                        routing_table.remove_miner_address_by_address(
+                                        batch.remove_miner_address_by_address(
                                             address
                                         )
                                         logger.info(
@@ -603,41 +625,29 @@ class NodeManager:
                         f"Error during cleanup of {hotkey} - {address}: {str(e)}"
                     )
 
-    async def _cleanup_unregistered_tees(self, routing_table):
-        """Clean up any unregistered TEEs that are now in the routing table."""
-        try:
-            # Get all registered addresses
-            registered_addrs = routing_table.get_all_addresses()
-
-            # Get current list of unregistered TEE addresses
-            unregistered_addrs = routing_table.get_all_unregistered_tee_addresses()
-
-            # Check which addresses should be removed from unregistered list
-            cleaned_count = 0
-
-            for address in registered_addrs:
-                if address in unregistered_addrs:
-                    # This address was previously unregistered but is now registered
-                    routing_table.remove_unregistered_tee(address)
-                    cleaned_count += 1
-
-            if cleaned_count > 0:
-                logger.info(
-                    f"Cleaned {cleaned_count} addresses from unregistered TEEs that are now registered"
-                )
-        except Exception as e:
-            logger.error(f"Error cleaning up unregistered TEEs: {str(e)}")
+    async def _cleanup_unregistered_tees(self, batch):
+        """
+        Queue removal of unregistered TEEs that are now in the routing table.
+        Runs in the same transaction as the cycle's registrations, so it sees
+        the addresses added in this update.
+        """
+        batch.remove_registered_unregistered_tees()
 
     async def send_score_report(
         self, node_hotkey: str, score: float, telemetry: NodeData
-    ) -> None:
+    ) -> Optional[bool]:
         """
-        Send a score report to a specific miner.
+        Send a score report to a specific miner. Scoring queues reports on
+        score_reports, which calls this.
 
         Args:
             hotkey (str): The miner's hotkey
             score (float): The calculated score for the miner
             telemetry (dict): The telemetry data for the miner
+
+        Returns:
+            True once delivered, False if the delivery failed, None if the
+            miner isn't connected
         """
         try:
             if node_hotkey not in self.connected_nodes:
@@ -646,9 +656,9 @@ class NodeManager:
                     hotkey=node_hotkey,
                     tee_address="",
                     miner_address="",
-                    message="Failed to send score report: Node not connected",
+                    error=error_types.score_report_node_not_connected(),
                 )
-                return
+                return None
 
             node = self.connected_nodes[node_hotkey]
             validator_node_id = self.validator.metagraph.nodes[
@@ -679,6 +689,7 @@ class NodeManager:
 
             if response.status_code == 200:
                 logger.debug(f"Successfully sent score report to miner {node_hotkey}")
+                return True
             else:
                 logger.warning(
                     f"Failed to send score report to miner {node_hotkey}. "
@@ -688,8 +699,9 @@ class NodeManager:
                     hotkey=node_hotkey,
                     tee_address="",
                     miner_address=f"{node.ip}:{node.port}",
-                    message=f"Failed to send score report: Status code {response.status_code}",
+                    error=error_types.score_report_status(response.status_code),
                 )
+                return False
 
         except Exception as e:
             logger.error(f"Error sending score report to miner {node_hotkey}: {str(e)}")
@@ -697,5 +709,6 @@ class NodeManager:
                 hotkey=node_hotkey,
                 tee_address="",
                 miner_address="",
-                message=f"Error sending score report: {str(e)}",
+                error=error_types.score_report_error(e),
             )
+            return False
@@ -2,17 +2,170 @@ import os
 import aiohttp
 import asyncio
 import random
+import threading
+import time
 
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from db.memory import MemoryRoutingTableDatabase
 from db.routing_table_database import RoutingTableDatabase
 import sqlite3
 from fiber.logging_utils import get_logger
+from validator.config import Config
 
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class RoutingTableSnapshot:
+    """
+    Immutable view of the committed routing table.
+
+    Each refresh produces a new generation, readers keep whatever snapshot
+    they picked up for as long as they need it.
+    """
+
+    generation: int
+    entries: Tuple[Tuple[str, str, Optional[str]], ...]
+    created_at: float
+
+    def __len__(self):
+        return len(self.entries)
+
+    def addresses(self):
+        """Get all addresses, randomized for fair distribution."""
+        addresses = [address for _, address, _ in self.entries]
+        random.shuffle(addresses)
+        return addresses
+
+    def addresses_with_hotkeys(self):
+        """Get all (hotkey, address, worker_id) entries, randomized."""
+        entries = list(self.entries)
+        random.shuffle(entries)
+        return entries
+
+
+class RoutingTableBatch:
+    """
+    Unit of work for the routing table. Collects the mutations of a whole
+    update cycle and applies them in one transaction on commit(), so readers
+    only ever see the table as it was before or after the cycle.
+    """
+
+    def __init__(self, routing_table: "RoutingTable"):
+        self.routing_table = routing_table
+        self.operations = []
+        # Worker registrations queued in this batch, so ownership checks
+        # made later in the same cycle see them
+        self.pending_workers = {}
+
+    def __len__(self):
+        return len(self.operations)
+
+    def register_worker(self, worker_id, hotkey):
+        """Queue registering a worker_id with a hotkey."""
+        self.pending_workers[str(worker_id)] = hotkey
+        self.operations.append(("register_worker", (worker_id, hotkey)))
+
+    def add_miner_address(self, hotkey, uid, address, worker_id=None):
+        """Queue adding (or refreshing) a miner address."""
+        self.operations.append(("add_address", (hotkey, uid, address, worker_id)))
+
+    def remove_miner_address_by_address(self, address):
+        """Queue removing a miner address by address only."""
+        self.operations.append(("remove_address", (address,)))
+
+    def remove_registered_unregistered_tees(self):
+        """Queue dropping unregistered TEEs that are now in the routing table."""
+        self.operations.append(("remove_registered_unregistered_tees", ()))
+
+    def get_worker_hotkey(self, worker_id):
+        """Get the hotkey for a worker_id, including queued registrations."""
+        if str(worker_id) in self.pending_workers:
+            return self.pending_workers[str(worker_id)]
+        return self.routing_table.get_worker_hotkey(worker_id)
+
+    def commit(self):
+        """
+        Apply all queued operations in a single transaction.
+
+        :return: List of per-operation results, empty if the batch failed
+        """
+        operations = self.operations
+        self.operations = []
+        self.pending_workers = {}
+        if not operations:
+            return []
+
+        try:
+            results = self.routing_table.db.apply_batch(operations)
+        except sqlite3.Error as e:
+            logger.error(
+                f"Failed to apply routing table batch of "
+                f"{len(operations)} operations: {e}"
+            )
+            return []
+
+        for (name, args), result in zip(operations, results):
+            if not isinstance(result, sqlite3.IntegrityError):
+                continue
+            if "UNIQUE constraint failed: miner_addresses.address" in str(result):
+                logger.debug(f"Address {args[2]} is already registered in the system")
+            else:
+                logger.error(f"Failed to apply {name}{args}: {result}")
+        snapshot = self.routing_table.refresh_snapshot()
+        logger.info(
+            f"Committed routing table batch of {len(results)} operations, "
+            f"snapshot generation {snapshot.generation}"
+        )
+        return results
+
+
 class RoutingTable:
-    def __init__(self, db_path="miner_tee_addresses.db"):
-        self.db = RoutingTableDatabase(db_path=db_path)
+    def __init__(self, db_path="miner_tee_addresses.db", engine=None):
+        """
+        :param db_path: SQLite file of the sqlite engine
+        :param engine: "sqlite" or "memory", defaults to Config.STORAGE_ENGINE
+        """
+        engine = (engine or Config.STORAGE_ENGINE).lower()
+        if engine == "sqlite":
+            self.db = RoutingTableDatabase(db_path=db_path)
+        elif engine == "memory":
+            self.db = MemoryRoutingTableDatabase()
+        else:
+            raise ValueError(f"Unknown routing table storage engine: {engine}")
+        self._snapshot_lock = threading.Lock()
+        self._snapshot = RoutingTableSnapshot(
+            generation=0, entries=(), created_at=time.time()
+        )
+        self.refresh_snapshot()
+
+    def get_snapshot(self) -> RoutingTableSnapshot:
+        """Get the latest committed snapshot without touching the database."""
+        return self._snapshot
+
+    def refresh_snapshot(self) -> RoutingTableSnapshot:
+        """
+        Build the next snapshot generation from the committed table and swap
+        it in. On failure the current snapshot stays in place.
+        """
+        with self._snapshot_lock:
+            try:
+                entries = tuple(self.db.get_all_miner_addresses())
+            except sqlite3.Error as e:
+                logger.error(f"Failed to refresh routing table snapshot: {e}")
+                return self._snapshot
+            self._snapshot = RoutingTableSnapshot(
+                generation=self._snapshot.generation + 1,
+                entries=entries,
+                created_at=time.time(),
+            )
+            return self._snapshot
+
+    def batch(self) -> RoutingTableBatch:
+        """Start a unit of work that applies its mutations in one commit."""
+        return RoutingTableBatch(self)
 
     def add_miner_address(self, hotkey, uid, address, worker_id=None):
         """Add a new miner address to the database."""
@@ -22,36 +175,9 @@ class RoutingTable:
                 f"address={address}, worker_id={worker_id}"
             )
 
-            # Check if there's already an entry with the exact same fields
-            existing_entries = self.db.get_miner_addresses_by_hotkey(hotkey)
-            for existing_uid, existing_address, existing_worker_id in existing_entries:
-                # Skip if identical entry already exists
-                if (
-                    existing_uid == uid
-                    and existing_address == address
-                    and existing_worker_id == worker_id
-                ):
-                    logger.debug(
-                        "Skipping add: Entry with identical fields already exists"
-                    )
-                    # Update timestamp to current time for the existing entry
-                    self.update_timestamp(hotkey, uid, address, worker_id)
-                    return
-
-                # If same hotkey and uid but different address or worker_id,
-                # remove old record
-                if existing_uid == uid and (
-                    existing_address != address or existing_worker_id != worker_id
-                ):
-                    logger.debug(
-                        "Removing old entry to update with new address or worker_id"
-                    )
-                    self.db.delete_address(hotkey, uid)
-                    break
-
-            # Add the new address
-            self.db.add_address(hotkey, uid, address, worker_id)
-            logger.debug("Successfully added miner address to routing table")
+            outcome = self.db.upsert_address(hotkey, uid, address, worker_id)
+            logger.debug(f"Miner address {outcome} in routing table")
+            self.refresh_snapshot()
         except sqlite3.Error as e:
             error_msg = str(e)
             if "UNIQUE constraint failed: miner_addresses.address" in error_msg:
@@ -85,93 +211,44 @@ class RoutingTable:
         """Remove a specific miner address from the database."""
         try:
             self.db.delete_address(hotkey, uid)
+            self.refresh_snapshot()
         except sqlite3.Error as e:
             logger.error(f"Failed to remove address: {e}")
 
     def clear_miner(self, hotkey):
         """Remove all addresses and worker registrations for a miner."""
         try:
-            with self.db.lock, sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    DELETE FROM miner_addresses WHERE hotkey = ?
-                """,
-                    (hotkey,),
-                )
-                conn.commit()
+            self.db.delete_addresses_by_hotkey(hotkey)
+            self.refresh_snapshot()
         except sqlite3.Error as e:
             logger.error(f"Failed to clear miner: {e}")
 
     def get_miner_addresses(self, hotkey):
         """Retrieve all addresses associated with a given miner hotkey."""
         try:
-            with self.db.lock, sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT address, worker_id FROM miner_addresses WHERE hotkey = ?
-                """,
-                    (hotkey,),
+            return [
+                (address, worker_id)
+                for _, address, worker_id in self.db.get_miner_addresses_by_hotkey(
+                    hotkey
                 )
-                results = cursor.fetchall()
-                return [(address, worker_id) for address, worker_id in results]
+            ]
         except sqlite3.Error as e:
             logger.error(f"Failed to retrieve addresses: {e}")
             return []
 
     def get_all_addresses(self):
         """Get all unique addresses, randomized for fair distribution."""
-        try:
-            with self.db.lock, sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                # Get addresses without ORDER BY to avoid index interference
-                cursor.execute("SELECT address FROM miner_addresses")
-                addresses = [row[0] for row in cursor.fetchall()]
-                # Randomize in Python for true randomization
-                random.shuffle(addresses)
-                return addresses
-        except sqlite3.Error as e:
-            logger.error(f"Failed to get addresses: {e}")
-            return []
+        return self.get_snapshot().addresses()
 
     def get_all_addresses_atomic(self):
-        """Get all addresses atomically with proper locking for NATS publishing."""
-        with self.db.lock:
-            try:
-                with sqlite3.connect(self.db.db_path) as conn:
-                    cursor = conn.cursor()
-                    # Get addresses without ORDER BY to avoid UNIQUE index interference
-                    cursor.execute("SELECT address FROM miner_addresses")
-                    addresses = [row[0] for row in cursor.fetchall()]
-                    # Randomize in Python for true randomization
-                    random.shuffle(addresses)
-                    return addresses
-            except sqlite3.Error as e:
-                logger.error(f"Failed to get addresses atomically: {e}")
-                return []
+        """
+        Get all addresses from one committed snapshot for NATS publishing.
+        """
+        return self.get_snapshot().addresses()
 
     def get_all_addresses_with_hotkeys(self):
-        """Retrieve a list of all addresses and their associated hotkeys from the database."""
-        try:
-            with self.db.lock, sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT hotkey, address, worker_id FROM miner_addresses
-                """
-                )
-                results = cursor.fetchall()
-                # Convert to list and randomize in Python
-                address_list = [
-                    (hotkey, address, worker_id)
-                    for hotkey, address, worker_id in results
-                ]
-                random.shuffle(address_list)
-                return address_list
-        except sqlite3.Error as e:
-            logger.error(f"Failed to retrieve addresses with hotkeys: {e}")
-            return []
+        """Retrieve all addresses and their hotkeys from the latest snapshot."""
+        return self.get_snapshot().addresses_with_hotkeys()
 
     def register_worker(self, worker_id, hotkey):
         """Register a worker_id with a hotkey."""
@@ -218,31 +295,39 @@ class RoutingTable:
             logger.error(f"Failed to get all worker registrations: {e}")
             return []
 
-    def clean_old_worker_registrations(self, hours=24):
+    def clean_old_worker_registrations(self, hours=24, limit=None):
         """Clean worker registrations older than the specified hours."""
         try:
-            self.db.clean_old_worker_registrations(hours)
+            return self.db.clean_old_worker_registrations(hours, limit)
         except sqlite3.Error as e:
             logger.error(f"Failed to clean old worker registrations: {e}")
+            return 0
 
-    def clean_old_entries(self):
+    def clean_old_entries(self, limit=None):
         """Clean all old entries from both tables."""
         try:
-            self.db.clean_old_entries()
+            removed = self.db.clean_old_entries(limit)
+            self.refresh_snapshot()
+            return removed
         except sqlite3.Error as e:
             logger.error(f"Failed to clean old entries: {e}")
+            return 0
 
-    def clean_old_entries_conservative(self):
+    def clean_old_entries_conservative(self, limit=None):
         """Clean very old entries (6+ hours) from both tables."""
         try:
-            self.db.clean_old_entries_conservative()
+            removed = self.db.clean_old_entries_conservative(limit)
+            self.refresh_snapshot()
+            return removed
         except sqlite3.Error as e:
             logger.error(f"Failed to clean old entries conservatively: {e}")
+            return 0
 
     def remove_miner_address_by_address(self, address):
         """Remove a miner address by address only."""
         try:
             self.db.remove_miner_address_by_address(address)
+            self.refresh_snapshot()
         except sqlite3.Error as e:
             logger.error(f"Failed to remove address {address}: {e}")
 
@@ -290,12 +375,33 @@ class RoutingTable:
             logger.error(f"Failed to register TEE worker: {e}")
             return False
 
-    def clean_old_unregistered_tees(self):
+    def clean_old_unregistered_tees(self, limit=None):
         """Clean unregistered TEEs older than one hour."""
         try:
-            self.db.clean_old_unregistered_tees()
+            return self.db.clean_old_unregistered_tees(limit)
         except sqlite3.Error as e:
             logger.error(f"Failed to clean old unregistered TEEs: {e}")
+            return 0
+
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim free pages and refresh the query planner statistics."""
+        try:
+            self.db.optimize(vacuum_pages)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to optimize routing table database: {e}")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the routing table database to target_path while it stays in use.
+
+        :return: Snapshot details, None if the engine keeps no file or the
+                 copy failed
+        """
+        try:
+            return self.db.snapshot(target_path, pages_per_step, step_pause_seconds)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to snapshot routing table database: {e}")
+            return None
 
     def get_all_unregistered_tees(self):
         """Get all unregistered TEEs from the database."""
@@ -0,0 +1,65 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, List
+
+from interfaces.types import NodeData
+
+
+@dataclass
+class ScoreResult:
+    """
+    The outcome of scoring the telemetry deltas. Shared between the callers
+    of WeightsManager.get_scores, treat it as read-only.
+
+    :param uids: Scored UIDs, in order
+    :param weights: The score of each UID
+    :param components: Dict of hotkey -> the parts its score is built from
+    :param delta_node_data: The deltas the scores were computed from
+    """
+
+    uids: List[int]
+    weights: List[float]
+    components: Dict[str, dict] = field(default_factory=dict)
+    delta_node_data: List[NodeData] = field(default_factory=list)
+
+
+class ScoreCache:
+    """
+    The latest ScoreResult of every scoring mode (simulation or not), reused
+    while the key it was computed for is unchanged. The key holds the
+    telemetry generation, which TelemetryStorage bumps after every write, so
+    callers polling between writes don't recompute anything.
+    """
+
+    def __init__(self):
+        self._entries = {}  # simulation -> (key, ScoreResult)
+        # One computation at a time, concurrent callers wait for its result
+        self._lock = asyncio.Lock()
+
+    async def get_or_compute(
+        self,
+        simulation: bool,
+        key: Hashable,
+        compute: Callable[[], Awaitable[ScoreResult]],
+    ) -> ScoreResult:
+        """
+        The cached result for key, computed with compute() on a miss.
+
+        :param simulation: Scoring mode, each mode keeps its own entry
+        :param key: What the result depends on, read before computing it
+        :param compute: Coroutine function returning a fresh ScoreResult
+        """
+        entry = self._entries.get(simulation)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        async with self._lock:
+            entry = self._entries.get(simulation)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            result = await compute()
+            self._entries[simulation] = (key, result)
+            return result
+
+    def invalidate(self):
+        """Drop every cached result."""
+        self._entries = {}
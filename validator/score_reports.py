@@ -0,0 +1,146 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from fiber.logging_utils import get_logger
+
+from interfaces.types import NodeData
+
+logger = get_logger(__name__)
+
+SCORE_REPORT_CONCURRENCY = int(os.getenv("SCORE_REPORT_CONCURRENCY", "16"))
+SCORE_REPORT_MAX_ATTEMPTS = int(os.getenv("SCORE_REPORT_MAX_ATTEMPTS", "3"))
+SCORE_REPORT_RETRY_SECONDS = float(os.getenv("SCORE_REPORT_RETRY_SECONDS", "5"))
+
+
+@dataclass
+class ScoreReport:
+    hotkey: str
+    score: float
+    telemetry: NodeData
+    attempts: int = 0
+
+
+class ScoreReportQueue:
+    """
+    Delivers score reports to miners in the background, so scoring never
+    waits on a miner.
+
+    Reports are coalesced per miner: a report submitted while an older one
+    is still waiting replaces it, only the latest score is sent. Up to
+    concurrency reports are in flight at once. A failed delivery is retried
+    with exponential backoff, unless a newer report for the miner came in
+    meanwhile.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[str, float, NodeData], Awaitable[Optional[bool]]],
+        concurrency: int = SCORE_REPORT_CONCURRENCY,
+        max_attempts: int = SCORE_REPORT_MAX_ATTEMPTS,
+        retry_delay_seconds: float = SCORE_REPORT_RETRY_SECONDS,
+    ):
+        """
+        :param deliver: Coroutine function sending one report, returning
+                        True once delivered, False when the delivery failed
+                        and may be retried, None when there is no miner to
+                        deliver to
+        :param concurrency: Maximum reports in flight
+        :param max_attempts: Deliveries tried per report
+        :param retry_delay_seconds: Delay before the first retry, doubled for
+                                    every further one
+        """
+        self.deliver = deliver
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay_seconds = retry_delay_seconds
+        self._pending = {}  # hotkey -> latest ScoreReport not yet sent
+        self._latest = {}  # hotkey -> latest ScoreReport submitted
+        self._ready = asyncio.Queue()  # hotkeys to send, each at most once
+        self._queued = set()
+        self._in_flight = set()
+        self._retrying = 0
+        self.stats = {
+            "delivered": 0,
+            "skipped": 0,
+            "retried": 0,
+            "failed": 0,
+            "coalesced": 0,
+        }
+
+    def submit(self, hotkey: str, score: float, telemetry: NodeData):
+        """Queue a report, replacing the miner's report still waiting if any."""
+        if hotkey in self._pending:
+            self.stats["coalesced"] += 1
+        report = ScoreReport(hotkey, score, telemetry)
+        self._pending[hotkey] = report
+        self._latest[hotkey] = report
+        self._schedule(hotkey)
+
+    def idle(self) -> bool:
+        """Whether every submitted report was delivered or given up on."""
+        return not (self._pending or self._in_flight or self._retrying)
+
+    def _schedule(self, hotkey):
+        # A miner's report in flight is followed up once it's done
+        if hotkey not in self._queued and hotkey not in self._in_flight:
+            self._queued.add(hotkey)
+            self._ready.put_nowait(hotkey)
+
+    def _retry(self, report: ScoreReport):
+        self._retrying -= 1
+        # A newer score, sent or not, replaces the failed one
+        if self._latest.get(report.hotkey) is report:
+            self._pending[report.hotkey] = report
+            self._schedule(report.hotkey)
+
+    async def run(self):
+        """Background task delivering the queued reports."""
+        logger.info(
+            f"Starting score report delivery (concurrency: {self.concurrency}, "
+            f"attempts: {self.max_attempts})"
+        )
+        await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+
+    async def _worker(self):
+        while True:
+            hotkey = await self._ready.get()
+            self._queued.discard(hotkey)
+            report = self._pending.pop(hotkey, None)
+            if report is None:
+                continue
+
+            self._in_flight.add(hotkey)
+            report.attempts += 1
+            try:
+                delivered = await self.deliver(
+                    report.hotkey, report.score, report.telemetry
+                )
+            except Exception as e:
+                logger.error(f"Error delivering score report to {hotkey}: {str(e)}")
+                delivered = False
+            finally:
+                self._in_flight.discard(hotkey)
+
+            if delivered:
+                self.stats["delivered"] += 1
+            elif delivered is None:
+                self.stats["skipped"] += 1
+            elif self._latest.get(hotkey) is not report:
+                # Superseded by a newer score, no point retrying this one
+                pass
+            elif report.attempts < self.max_attempts:
+                self.stats["retried"] += 1
+                self._retrying += 1
+                delay = self.retry_delay_seconds * 2 ** (report.attempts - 1)
+                asyncio.get_running_loop().call_later(delay, self._retry, report)
+            else:
+                self.stats["failed"] += 1
+                logger.warning(
+                    f"Giving up on score report to {hotkey} after "
+                    f"{report.attempts} attempts"
+                )
+
+            if hotkey in self._pending:
+                self._schedule(hotkey)
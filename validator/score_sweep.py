@@ -0,0 +1,242 @@
+"""
+Evaluate many scoring parameter sets at once over the same delta data.
+
+WeightsManager.calculate_weights scores one parameter set: the kurtosis
+curve of apply_kurtosis_custom over tweets and error quality, their
+weighted sum and the error rate penalty. Here every step is broadcast over
+a (parameter sets x nodes) array instead, so a grid of a thousand sets
+costs about as much as a handful of calculate_weights calls. Row i holds
+exactly the weights calculate_weights gives with the parameters of set i.
+"""
+
+import itertools
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from interfaces.types import NodeData
+
+SWEEP_MAX_POINTS = int(os.getenv("SWEEP_MAX_POINTS", "10000"))
+
+# Defaults of apply_kurtosis_custom and WeightsManager
+SWEEP_DEFAULTS = {
+    "top_percentile": 90.0,
+    "reward_factor": 0.4,
+    "steepness": 2.0,
+    "center_sensitivity": 0.5,
+    "boost_factor": 0.2,
+    "tweets_weight": 0.6,
+    "error_rate_threshold": 10.0,
+}
+
+# Inclusive ranges of the parameters that have one: np.percentile takes
+# 0-100 and error_quality_weight = 1 - tweets_weight can't be negative.
+# error_rate_threshold divides the penalty, it has to be positive.
+SWEEP_RANGES = {
+    "top_percentile": (0.0, 100.0),
+    "tweets_weight": (0.0, 1.0),
+}
+
+
+@dataclass
+class SweepResult:
+    """
+    :param parameters: Column of values per parameter, one entry per set
+    :param uids: Scored UIDs, the columns of weights
+    :param weights: (parameter sets, uids) array of scores
+    :param gini: Gini coefficient of the weights of every set
+    :param top_k_share: Share of the total weight held by the top k UIDs
+    """
+
+    parameters: Dict[str, np.ndarray]
+    uids: List[int]
+    weights: np.ndarray
+    gini: np.ndarray
+    top_k_share: np.ndarray
+
+
+def parameter_grid(**values: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Every combination of the given parameter values, the defaults for the
+    parameters left out.
+
+    error_quality_weight is always 1 - tweets_weight, as WeightsManager
+    requires the two to sum to 1.
+
+    :return: Dict of parameter -> array with one value per combination
+    :raises ValueError: For an unknown parameter, an empty list of values,
+                        a value that isn't a finite number or outside the
+                        parameter's range, or more than SWEEP_MAX_POINTS
+                        combinations
+    """
+    unknown = set(values) - set(SWEEP_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    axes = []
+    for name, default in SWEEP_DEFAULTS.items():
+        axis = values.get(name)
+        axis = [default] if axis is None else list(axis)
+        if not axis:
+            raise ValueError(f"No values given for {name}")
+        check_values(name, axis)
+        axes.append(axis)
+    points = int(np.prod([len(axis) for axis in axes]))
+    if points > SWEEP_MAX_POINTS:
+        raise ValueError(
+            f"{points} parameter sets requested, at most {SWEEP_MAX_POINTS}"
+        )
+    combinations = np.array(list(itertools.product(*axes)), dtype=float)
+    grid = dict(zip(SWEEP_DEFAULTS, combinations.T))
+    grid["error_quality_weight"] = 1 - grid["tweets_weight"]
+    return grid
+
+
+def check_values(name: str, axis: Sequence[float]):
+    """
+    :raises ValueError: If a value of the parameter isn't a finite number in
+                        its range
+    """
+    try:
+        axis = np.array(axis, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} values must be numbers")
+    if not np.all(np.isfinite(axis)):
+        raise ValueError(f"{name} values must be finite")
+    if name == "error_rate_threshold" and np.any(axis <= 0):
+        raise ValueError("error_rate_threshold values must be greater than 0")
+    if name in SWEEP_RANGES:
+        low, high = SWEEP_RANGES[name]
+        if np.any((axis < low) | (axis > high)):
+            raise ValueError(f"{name} values must be between {low:g} and {high:g}")
+
+
+def score_inputs(delta_node_data: List[NodeData]):
+    """
+    The per-node inputs of calculate_weights.
+
+    :return: (tweets, error rates per hour) arrays, the error rate is
+             infinite for nodes without a time span
+    """
+    tweets = np.array(
+        [float(node.twitter_returned_tweets) for node in delta_node_data]
+    )
+    time_spans = np.array(
+        [getattr(node, "time_span_seconds", 0) for node in delta_node_data],
+        dtype=float,
+    )
+    total_errors = np.array(
+        [getattr(node, "total_errors", 0) for node in delta_node_data],
+        dtype=float,
+    )
+    error_rates = np.full(len(delta_node_data), np.inf)
+    measured = time_spans > 0
+    error_rates[measured] = total_errors[measured] / (time_spans[measured] / 3600)
+    return tweets, error_rates
+
+
+def kurtosis_grid(x, grid: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    apply_kurtosis_custom of x for every parameter set of grid.
+
+    :return: (parameter sets, len(x)) array
+    """
+    sets = len(grid["steepness"])
+    if len(x) == 0 or np.all(x == 0):
+        return np.zeros((sets, len(x)))
+
+    x_centered = (x - np.mean(x)) / (np.std(x) + 1e-8)
+    y = 1 / (
+        1
+        + np.exp(
+            -grid["steepness"][:, None]
+            * (x_centered[None, :] - grid["center_sensitivity"][:, None])
+        )
+    )
+    y += grid["boost_factor"][:, None] * np.tanh(x_centered)[None, :]
+
+    thresholds = np.percentile(x, grid["top_percentile"])
+    top_mask = x[None, :] >= thresholds[:, None]
+    y = np.where(top_mask, y * (1 + grid["reward_factor"][:, None]), y)
+
+    low = y.min(axis=1, keepdims=True)
+    high = y.max(axis=1, keepdims=True)
+    return (y - low) / (high - low + 1e-8)
+
+
+def sweep_weights(tweets, error_rates, grid: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    The scores calculate_weights gives every node, for every parameter set.
+
+    :param tweets: Tweets returned per node
+    :param error_rates: Errors per hour per node, inf without a time span
+    :return: (parameter sets, nodes) array
+    """
+    thresholds = grid["error_rate_threshold"][:, None]
+    exceeded = error_rates[None, :] > thresholds
+
+    # Infinite rates count as the highest finite one + 1
+    finite = np.isfinite(error_rates)
+    highest = np.max(error_rates[finite]) if np.any(finite) else 0
+    error_rates = np.where(np.isinf(error_rates), highest + 1, error_rates)
+    error_quality = 1.0 / (1.0 + error_rates)
+
+    base = (
+        kurtosis_grid(tweets, grid) * grid["tweets_weight"][:, None]
+        + kurtosis_grid(error_quality, grid) * grid["error_quality_weight"][:, None]
+    )
+    penalty = np.minimum(1.0, (error_rates[None, :] - thresholds) / thresholds)
+    return np.where(exceeded, base * (1 - penalty), base)
+
+
+def gini(weights: np.ndarray) -> np.ndarray:
+    """Gini coefficient of every row, 0 for rows summing to 0."""
+    n = weights.shape[1]
+    if n == 0:
+        return np.zeros(len(weights))
+    ordered = np.sort(weights, axis=1)
+    totals = ordered.sum(axis=1)
+    ranks = np.arange(1, n + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coefficients = 2 * (ordered @ ranks) / (n * totals) - (n + 1) / n
+    return np.where(totals > 0, coefficients, 0.0)
+
+
+def top_k_share(weights: np.ndarray, k: int) -> np.ndarray:
+    """Share of every row's total held by its k largest entries."""
+    k = max(0, min(k, weights.shape[1]))
+    totals = weights.sum(axis=1)
+    top = -np.sort(-weights, axis=1)[:, :k].sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, top / totals, 0.0)
+
+
+def run_sweep(
+    delta_node_data: List[NodeData], uids: List, grid: Dict[str, np.ndarray], k=10
+) -> SweepResult:
+    """
+    Score the nodes with every parameter set of grid.
+
+    :param delta_node_data: Delta NodeData, as scored by calculate_weights
+    :param uids: The UID of every node, None for nodes not scored
+    :param grid: Parameter sets, see parameter_grid
+    :param k: Number of top UIDs for top_k_share
+    """
+    # Like calculate_weights, the last node of a UID sets its score and UIDs
+    # are sorted numerically
+    last_node = {uid: index for index, uid in enumerate(uids) if uid is not None}
+    scored_uids = sorted(
+        last_node,
+        key=lambda uid: int(uid) if isinstance(uid, str) and uid.isdigit() else uid,
+    )
+    tweets, error_rates = score_inputs(delta_node_data)
+    weights = sweep_weights(tweets, error_rates, grid)
+    weights = weights[:, [last_node[uid] for uid in scored_uids]]
+    return SweepResult(
+        parameters=grid,
+        uids=scored_uids,
+        weights=weights,
+        gini=gini(weights),
+        top_k_share=top_k_share(weights, k),
+    )
@@ -221,6 +221,7 @@ class NodeDataScorer:
 
         logger.info("Syncing metagraph to get latest node information")
         self.validator.metagraph.sync_nodes()
+        self.validator.metagraph_manager.rebuild_index()
 
         nodes = self.validator.routing_table.get_all_addresses_with_hotkeys()
         logger.info(f"Found {len(nodes)} nodes in the routing table")
@@ -254,7 +255,7 @@ class NodeDataScorer:
                     logger.debug(
                         f"Node {hotkey} telemetry successful: {telemetry_result}"
                     )
-                    uid = self.validator.metagraph.nodes[hotkey].node_id
+                    uid = self.validator.metagraph_manager.index.hotkey_to_uid[hotkey]
                     logger.info(f"Node {hotkey[:10]}... has UID: {uid}")
                     logger.info(f"Node {hotkey[:10]}... worker ID: {worker_id}")
 
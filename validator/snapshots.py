@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+from fiber.logging_utils import get_logger
+
+from typing import TYPE_CHECKING, List, Tuple
+
+from validator.process_monitor import ProcessMonitor
+
+if TYPE_CHECKING:
+    from neurons.validator import Validator
+
+logger = get_logger(__name__)
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+# 0 disables the scheduled snapshots, the API can still trigger one
+SNAPSHOT_CADENCE_SECONDS = int(os.getenv("SNAPSHOT_CADENCE_SECONDS", "0"))
+SNAPSHOT_PAGES_PER_STEP = int(os.getenv("SNAPSHOT_PAGES_PER_STEP", "256"))
+SNAPSHOT_STEP_PAUSE_SECONDS = float(os.getenv("SNAPSHOT_STEP_PAUSE_SECONDS", "0.01"))
+
+
+class SnapshotManager:
+    """
+    Writes online copies of the validator's SQLite files to a directory,
+    e.g. to seed a standby validator or for offline analysis.
+
+    Each database is copied with SQLite's backup API on a worker thread
+    (see db/snapshot.py), so the validator keeps reading and writing. Every
+    file in the directory is replaced atomically, it always holds the
+    latest complete snapshot. Runs are recorded in the process monitor
+    under "snapshot".
+    """
+
+    def __init__(
+        self,
+        validator: "Validator",
+        process_monitor: ProcessMonitor,
+        directory: str = SNAPSHOT_DIR,
+        pages_per_step: int = SNAPSHOT_PAGES_PER_STEP,
+        step_pause_seconds: float = SNAPSHOT_STEP_PAUSE_SECONDS,
+    ):
+        self.validator = validator
+        self.process_monitor = process_monitor
+        self.directory = directory
+        self.pages_per_step = pages_per_step
+        self.step_pause_seconds = step_pause_seconds
+        # Only one snapshot at a time, scheduled or requested from the API
+        self._lock = asyncio.Lock()
+
+    def storages(self) -> List[Tuple[str, object]]:
+        """The databases to copy, as (file name, storage) pairs."""
+        return [
+            ("miner_tee_addresses.db", self.validator.routing_table),
+            ("telemetry_data.db", self.validator.telemetry_storage),
+            ("errors.db", self.validator.node_manager.errors_storage),
+        ]
+
+    async def run_once(self) -> dict:
+        """
+        Snapshot every database.
+
+        :return: Dict of file name -> snapshot details, or why none was written
+        """
+        async with self._lock:
+            execution_id = self.process_monitor.start_process("snapshot")
+            results = {}
+            errors = []
+            for name, storage in self.storages():
+                started = time.monotonic()
+                result = await asyncio.to_thread(
+                    storage.snapshot,
+                    os.path.join(self.directory, name),
+                    self.pages_per_step,
+                    self.step_pause_seconds,
+                )
+                if result is None:
+                    # The storage logged a failure, or has no file to copy
+                    logger.warning(f"No snapshot written for {name}")
+                    errors.append(f"{name}: no snapshot written")
+                    result = {
+                        "skipped": "no snapshot written",
+                        "seconds": round(time.monotonic() - started, 3),
+                    }
+                results[name] = result
+
+            self.process_monitor.update_metrics(
+                execution_id,
+                nodes_processed=len(results) - len(errors),
+                errors=errors,
+                additional_metrics=results,
+            )
+            self.process_monitor.end_process(execution_id)
+            return results
+
+    async def run(self, cadence_seconds) -> None:
+        """Background task writing snapshots every cadence_seconds."""
+        # Ensure we have a safe cadence value (at least 5 minutes)
+        safe_cadence = max(300, int(cadence_seconds))
+
+        logger.info(
+            f"Starting snapshot loop (cadence: {safe_cadence}s, "
+            f"directory: {self.directory})"
+        )
+
+        while True:
+            try:
+                await asyncio.sleep(safe_cadence)
+                results = await self.run_once()
+                logger.info(f"Database snapshots written: {results}")
+            except Exception as e:
+                logger.error(f"Error in snapshot loop: {str(e)}")
@@ -1,64 +1,175 @@
+import itertools
+import os
+from dataclasses import replace
+from db.memory import MemoryTelemetryDatabase
 from db.telemetry_database import TelemetryDatabase
+from db.telemetry_log import TelemetryLogDatabase
 import sqlite3
 from fiber.logging_utils import get_logger
 from interfaces.types import NodeData
+from validator.config import Config
 
 logger = get_logger(__name__)
 
+# Overrides Config.STORAGE_ENGINE for telemetry, e.g. to use the log engine
+TELEMETRY_STORAGE_ENGINE = os.getenv("TELEMETRY_STORAGE_ENGINE")
+TELEMETRY_LOG_SEGMENT_MINUTES = int(os.getenv("TELEMETRY_LOG_SEGMENT_MINUTES", "60"))
+
+# The log engine surfaces file errors instead of sqlite3 errors
+STORAGE_ERRORS = (sqlite3.Error, OSError)
+
 
 class TelemetryStorage:
-    def __init__(self, db_path="telemetry_data.db"):
-        self.db = TelemetryDatabase(db_path=db_path)
+    def __init__(self, db_path="telemetry_data.db", engine=None):
+        """
+        :param db_path: SQLite file, the log engine uses a directory next to it
+        :param engine: "sqlite", "log" or "memory", defaults to
+                       TELEMETRY_STORAGE_ENGINE or Config.STORAGE_ENGINE
+        """
+        engine = (engine or TELEMETRY_STORAGE_ENGINE or Config.STORAGE_ENGINE).lower()
+        if engine == "log":
+            self.db = TelemetryLogDatabase(
+                directory=f"{os.path.splitext(db_path)[0]}_log",
+                segment_minutes=TELEMETRY_LOG_SEGMENT_MINUTES,
+            )
+        elif engine == "sqlite":
+            self.db = TelemetryDatabase(db_path=db_path)
+        elif engine == "memory":
+            self.db = MemoryTelemetryDatabase()
+        else:
+            raise ValueError(f"Unknown telemetry storage engine: {engine}")
+        # Bumped after every write, results derived from the telemetry
+        # (e.g. the score cache) are current while it stays the same
+        self._writes = itertools.count(1)
+        self.generation = 0
+
+    def _bump_generation(self):
+        # next() on a count is atomic, writes from several threads each
+        # get their own generation
+        self.generation = next(self._writes)
 
     def add_telemetry(self, telemetry_data):
         """Add a new telemetry entry to the database."""
         try:
             self.db.add_telemetry(telemetry_data)
-        except sqlite3.Error as e:
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to add telemetry: {e}")
+        finally:
+            self._bump_generation()
 
-    def clean_old_entries(self, hours):
+    def clean_old_entries(self, hours, limit=None):
         """
         Clean all telemetry entries older than the specified number
-        of hours.
+        of hours, at most limit entries per call if given.
         """
         try:
-            self.db.clean_old_entries(hours)
-        except sqlite3.Error as e:
+            return self.db.clean_old_entries(hours, limit)
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to clean old telemetry entries: {e}")
+            return 0
+        finally:
+            self._bump_generation()
+
+    def compact_old_entries(self, age_hours, interval_minutes):
+        """
+        Collapse telemetry entries older than age_hours into per-interval
+        rollups, keeping the samples scoring depends on.
+        """
+        try:
+            removed = self.db.compact_old_entries(age_hours, interval_minutes)
+            logger.info(f"Compacted {removed} old telemetry entries into rollups")
+            return removed
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to compact old telemetry entries: {e}")
+            return 0
+        finally:
+            self._bump_generation()
+
+    def optimize(self, vacuum_pages=1000):
+        """Reclaim free pages and refresh the query planner statistics."""
+        try:
+            self.db.optimize(vacuum_pages)
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to optimize telemetry database: {e}")
+
+    def snapshot(self, target_path, pages_per_step=256, step_pause_seconds=0.01):
+        """
+        Copy the telemetry database to target_path while it stays in use.
+
+        :return: Snapshot details, None if the engine keeps no file or the
+                 copy failed
+        """
+        try:
+            return self.db.snapshot(target_path, pages_per_step, step_pause_seconds)
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to snapshot telemetry database: {e}")
+            return None
+
+    def get_rollups_by_hotkey(self, hotkey):
+        """Retrieve the telemetry rollups for a specific hotkey."""
+        try:
+            return self.db.get_rollups_by_hotkey(hotkey)
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to retrieve rollups for hotkey {hotkey}: {e}")
+            return []
 
-    def get_telemetry_by_hotkey(self, hotkey):
+    @staticmethod
+    def row_to_node_data(row):
+        """A row in TELEMETRY_COLUMNS order as NodeData."""
+        return NodeData(
+            hotkey=row[0],
+            uid=row[1],
+            boot_time=row[3],
+            last_operation_time=row[4],
+            current_time=row[5],
+            twitter_auth_errors=row[6],
+            twitter_errors=row[7],
+            twitter_ratelimit_errors=row[8],
+            twitter_returned_other=row[9],
+            twitter_returned_profiles=row[10],
+            twitter_returned_tweets=row[11],
+            twitter_scrapes=row[12],
+            web_errors=row[13],
+            web_success=row[14],
+            timestamp=row[2],
+            worker_id=row[15] if len(row) > 15 else None,
+        )
+
+    def get_telemetry_by_hotkey(
+        self, hotkey, since=None, until=None, limit=None, order="asc"
+    ):
         """
         Retrieve telemetry data for a specific hotkey using the
         TelemetryDatabase method. Returns a list of NodeData objects.
+
+        :param since: Only samples at or after this unix timestamp
+        :param until: Only samples before this unix timestamp
+        :param limit: Maximum number of samples, None for all
+        :param order: "asc" for oldest first, "desc" for latest first
+        :raises ValueError: For an unknown order
         """
         try:
-            telemetry_data = self.db.get_telemetry_by_hotkey(hotkey)
-            return [
-                NodeData(
-                    hotkey=row[0],
-                    uid=row[1],
-                    boot_time=row[3],
-                    last_operation_time=row[4],
-                    current_time=row[5],
-                    twitter_auth_errors=row[6],
-                    twitter_errors=row[7],
-                    twitter_ratelimit_errors=row[8],
-                    twitter_returned_other=row[9],
-                    twitter_returned_profiles=row[10],
-                    twitter_returned_tweets=row[11],
-                    twitter_scrapes=row[12],
-                    web_errors=row[13],
-                    web_success=row[14],
-                    timestamp=row[2],
-                    worker_id=row[15],
-                )
-                for row in telemetry_data
-            ]
-        except sqlite3.Error as e:
+            telemetry_data = self.db.get_telemetry_by_hotkey(
+                hotkey, since, until, limit, order
+            )
+            return [self.row_to_node_data(row) for row in telemetry_data]
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to retrieve telemetry for hotkey {hotkey}: {e}")
             return []
 
+    def get_latest_telemetry(self, hotkey):
+        """
+        Latest telemetry of a hotkey without scanning its samples.
+
+        :return: A NodeData, None if the hotkey has no telemetry
+        """
+        try:
+            row = self.db.get_latest_telemetry(hotkey)
+            return None if row is None else self.row_to_node_data(row)
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to retrieve latest telemetry for {hotkey}: {e}")
+            return None
+
     def get_all_hotkeys_with_telemetry(self):
         """
         Retrieve all unique hotkeys that have at least one telemetry entry
@@ -67,7 +178,7 @@ class TelemetryStorage:
         try:
             hotkeys = self.db.get_all_hotkeys_with_telemetry()
             return hotkeys
-        except sqlite3.Error as e:
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to retrieve hotkeys with telemetry: {e}")
             return []
 
@@ -80,38 +191,59 @@ class TelemetryStorage:
             rows_deleted = self.db.delete_telemetry_by_hotkey(hotkey)
             logger.info(f"Deleted {rows_deleted} telemetry entries for hotkey {hotkey}")
             return rows_deleted
-        except sqlite3.Error as e:
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to delete telemetry for hotkey {hotkey}: {e}")
             return 0
+        finally:
+            self._bump_generation()
 
     def get_all_telemetry(self):
         """
         Retrieve all telemetry data from the database.
         Returns a list of NodeData objects.
         """
+        return [self.row_to_node_data(row) for row in self.get_all_telemetry_rows()]
+
+    def get_all_telemetry_rows(self):
+        """
+        Retrieve all telemetry data as rows in TELEMETRY_COLUMNS order,
+        without building a NodeData per sample.
+        """
         try:
-            telemetry_data = self.db.get_all_telemetry()
-            return [
-                NodeData(
-                    hotkey=row[0],
-                    uid=row[1],
-                    boot_time=row[3],
-                    last_operation_time=row[4],
-                    current_time=row[5],
-                    twitter_auth_errors=row[6],
-                    twitter_errors=row[7],
-                    twitter_ratelimit_errors=row[8],
-                    twitter_returned_other=row[9],
-                    twitter_returned_profiles=row[10],
-                    twitter_returned_tweets=row[11],
-                    twitter_scrapes=row[12],
-                    web_errors=row[13],
-                    web_success=row[14],
-                    timestamp=row[2],
-                    worker_id=row[15] if len(row) > 15 else None,
-                )
-                for row in telemetry_data
-            ]
-        except sqlite3.Error as e:
+            return self.db.get_all_telemetry()
+        except STORAGE_ERRORS as e:
             logger.error(f"Failed to retrieve all telemetry: {e}")
             return []
+
+    def get_delta_states(self):
+        """
+        Retrieve the per-hotkey delta state (sample and reset counts, baseline
+        and latest sample) without scanning the telemetry.
+        Baseline and latest are returned as NodeData objects.
+        """
+        try:
+            return self._states_to_node_data(self.db.get_delta_states())
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to retrieve telemetry delta states: {e}")
+            return []
+
+    def get_delta_telemetry(self):
+        """
+        Compute the per-hotkey delta state from the raw telemetry in a single
+        query, in the same shape as get_delta_states.
+        """
+        try:
+            return self._states_to_node_data(self.db.get_delta_telemetry())
+        except STORAGE_ERRORS as e:
+            logger.error(f"Failed to compute delta telemetry: {e}")
+            return []
+
+    def _states_to_node_data(self, states):
+        return [
+            replace(
+                state,
+                baseline=self.row_to_node_data(state.baseline),
+                latest=self.row_to_node_data(state.latest),
+            )
+            for state in states
+        ]
@@ -1,7 +1,9 @@
 import unittest
 from unittest.mock import Mock, patch, AsyncMock
 import os
+import threading
 from validator.api_routes import ValidatorAPI
+from validator.errors_storage import ErrorsStorage
 from fastapi import HTTPException
 
 
@@ -115,3 +117,31 @@ class TestApiRoutes(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestErrorRoutes(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.errors_storage = ErrorsStorage(engine="memory")
+        self.errors_storage.add_error("hotkey1", "tee1", "miner1", "timeout")
+        validator = Mock()
+        validator.node_manager.errors_storage = self.errors_storage
+        self.api = ValidatorAPI(validator)
+
+        # Record the thread of every flush the routes trigger
+        self.flush_threads = []
+        flush = self.errors_storage.flush
+
+        def record_flush():
+            self.flush_threads.append(threading.get_ident())
+            return flush()
+
+        self.errors_storage.flush = record_flush
+
+    async def test_reads_flush_off_the_event_loop(self):
+        result = await self.api.monitor_errors()
+        self.assertEqual(result["count"], 1)
+        by_hotkey = await self.api.monitor_errors_by_hotkey("hotkey1")
+        self.assertEqual(by_hotkey["count"], 1)
+
+        self.assertTrue(self.flush_threads)
+        self.assertNotIn(threading.get_ident(), self.flush_threads)
@@ -1,5 +1,6 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import asyncio
+from operator import attrgetter, itemgetter
 from fiber.chain import weights, interface
 import numpy as np
 from fiber.logging_utils import get_logger
@@ -7,6 +8,9 @@ from fiber.logging_utils import get_logger
 from neurons import version_numerical
 
 from interfaces.types import NodeData
+from validator.score_cache import ScoreCache, ScoreResult
+from validator.score_sweep import SweepResult, run_sweep
+from db.telemetry_database import TELEMETRY_COLUMNS
 
 
 from typing import TYPE_CHECKING
@@ -16,6 +20,18 @@ if TYPE_CHECKING:
 
 logger = get_logger(__name__)
 
+# Counters scored by their increase from the baseline to the latest record
+DELTA_COUNTERS = (
+    "twitter_auth_errors",
+    "twitter_errors",
+    "twitter_ratelimit_errors",
+    "twitter_returned_profiles",
+    "twitter_returned_tweets",
+    "twitter_scrapes",
+    "web_errors",
+    "web_success",
+)
+
 
 def apply_kurtosis(x):
     if len(x) == 0 or np.all(x == 0):
@@ -120,6 +136,8 @@ class WeightsManager:
         if abs(total_weight - 1.0) > 1e-6:
             raise ValueError(f"Scoring weights must sum to 1.0, got {total_weight}")
 
+        self.score_cache = ScoreCache()
+
     def _convert_timestamp_to_int(self, timestamp) -> int:
         """
         Get telemetry data and calculate deltas using simple reset logic.
@@ -153,6 +171,61 @@ class WeightsManager:
             logger.warning(f"Unexpected timestamp type {type(timestamp)}, using 0")
             return 0
 
+    def _timestamps_to_int(self, timestamps) -> np.ndarray:
+        """_convert_timestamp_to_int over a list, as an int64 array."""
+        if all(type(timestamp) is int for timestamp in timestamps):
+            return np.array(timestamps, dtype=np.int64)
+        return np.fromiter(
+            map(self._convert_timestamp_to_int, timestamps),
+            dtype=np.int64,
+            count=len(timestamps),
+        )
+
+    def _delta_endpoint_indices(self, hotkeys, timestamps, tweets) -> dict:
+        """
+        Find the baseline and latest record of every hotkey from the hotkey,
+        timestamp and twitter_returned_tweets columns of the records.
+
+        The baseline moves to any record whose twitter_returned_tweets drops
+        below the current baseline, so it ends up on the first occurrence of
+        the hotkey's minimum. Instead of walking the records, they are sorted
+        once by (hotkey, timestamp) and every hotkey's minimum and latest
+        record found with segment reductions.
+
+        :return: Dict of hotkey -> (baseline index, latest index) into the
+                 columns, or None for a hotkey with a single record, in order
+                 of first appearance
+        """
+        codes = {hotkey: code for code, hotkey in enumerate(dict.fromkeys(hotkeys))}
+        hotkey_codes = np.fromiter(
+            map(codes.__getitem__, hotkeys), dtype=np.int64, count=len(hotkeys)
+        )
+        timestamps = self._timestamps_to_int(timestamps)
+        tweets = np.array(tweets)
+
+        # Stable, records with equal timestamps keep their order
+        order = np.lexsort((timestamps, hotkey_codes))
+        sorted_codes = hotkey_codes[order]
+        sorted_tweets = tweets[order]
+        starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1))
+        ends = np.append(starts[1:], len(order)) - 1
+
+        endpoints = dict.fromkeys(codes)
+        if len(order):
+            minimums = np.minimum.reduceat(sorted_tweets, starts)
+            at_minimum = np.flatnonzero(sorted_tweets == minimums[sorted_codes])
+            # Every segment holds its minimum, the first match at or after
+            # its start is the segment's first occurrence
+            baselines = order[at_minimum[np.searchsorted(at_minimum, starts)]]
+            latest = order[ends]
+            hotkeys = list(codes)
+            for code in np.flatnonzero(ends > starts).tolist():
+                endpoints[hotkeys[code]] = (
+                    int(baselines[code]),
+                    int(latest[code]),
+                )
+        return endpoints
+
     def _get_delta_node_data(self, telemetry_data: List[NodeData]) -> List[NodeData]:
         """
         Get telemetry data and calculate deltas between latest and oldest
@@ -162,55 +235,110 @@ class WeightsManager:
         :param telemetry_data: List of NodeData objects from get_all_telemetry()
         :return: List of NodeData objects containing delta values.
         """
+        endpoints = self._delta_endpoint_indices(
+            list(map(attrgetter("hotkey"), telemetry_data)),
+            list(map(attrgetter("timestamp"), telemetry_data)),
+            list(map(attrgetter("twitter_returned_tweets"), telemetry_data)),
+        )
+        return self._assemble_delta_node_data(
+            {
+                hotkey: None
+                if indices is None
+                else tuple(telemetry_data[index] for index in indices)
+                for hotkey, indices in endpoints.items()
+            }
+        )
+
+    def _get_delta_node_data_from_rows(self, rows) -> List[NodeData]:
+        """
+        Same result as _get_delta_node_data, from the rows of
+        get_all_telemetry_rows(). Only the columns the deltas need are
+        read and NodeData is built only for the baseline and latest rows,
+        which is much cheaper on a large table.
+
+        :param rows: Telemetry rows in TELEMETRY_COLUMNS order
+        :return: List of NodeData objects containing delta values.
+        """
+        to_node_data = self.validator.telemetry_storage.row_to_node_data
+        endpoints = self._delta_endpoint_indices(
+            *(
+                list(map(itemgetter(TELEMETRY_COLUMNS.index(column)), rows))
+                for column in ("hotkey", "timestamp", "twitter_returned_tweets")
+            )
+        )
+        return self._assemble_delta_node_data(
+            {
+                hotkey: None
+                if indices is None
+                else tuple(to_node_data(rows[index]) for index in indices)
+                for hotkey, indices in endpoints.items()
+            }
+        )
+
+    def recompute_delta_node_data(self) -> List[NodeData]:
+        """
+        Delta NodeData recomputed from all stored telemetry, to check the
+        incremental delta state of get_delta_node_data against.
+
+        :return: List of NodeData objects containing delta values.
+        """
+        return self._get_delta_node_data_from_rows(
+            self.validator.telemetry_storage.get_all_telemetry_rows()
+        )
+
+    def get_delta_node_data(self) -> List[NodeData]:
+        """
+        Same result as _get_delta_node_data(get_all_telemetry()), read from
+        the per-hotkey delta state the telemetry storage keeps up to date on
+        every insert instead of scanning all telemetry.
+
+        :return: List of NodeData objects containing delta values.
+        """
+        endpoints = {}
+        for state in self.validator.telemetry_storage.get_delta_states():
+            if state.sample_count < 2:
+                endpoints[state.hotkey] = None
+            else:
+                endpoints[state.hotkey] = (state.baseline, state.latest)
+        return self._assemble_delta_node_data(endpoints)
+
+    def _assemble_delta_node_data(self, endpoints) -> List[NodeData]:
+        """
+        Build delta NodeData for every hotkey with telemetry and empty
+        entries for the metagraph hotkeys without any.
+
+        :param endpoints: Dict of hotkey -> (baseline, latest) NodeData, or
+                          None when the hotkey has fewer than two samples
+        :return: List of NodeData objects containing delta values.
+        """
         delta_node_data = []
 
-        # Group telemetry data by hotkey
-        telemetry_by_hotkey = {}
-        for record in telemetry_data:
-            if record.hotkey not in telemetry_by_hotkey:
-                telemetry_by_hotkey[record.hotkey] = []
-            telemetry_by_hotkey[record.hotkey].append(record)
-
-        # Get all hotkeys from metagraph to ensure we include those without
-        # telemetry
-        all_hotkeys = []
-        for node_idx, node in enumerate(self.validator.metagraph.nodes):
-            node_data = self.validator.metagraph.nodes[node]
-            hotkey = node_data.hotkey
-            all_hotkeys.append((node_data.node_id, hotkey))
-
-        print(f"all  hotkeys: {all_hotkeys}")
+        # All hotkeys of the metagraph, to include those without telemetry
+        metagraph_index = self.validator.metagraph_manager.index
+        # Counter deltas from baseline to latest of every hotkey at once,
+        # negative deltas (restarts after the baseline) count as 0
+        measured = [
+            (hotkey, records)
+            for hotkey, records in endpoints.items()
+            if records is not None
+        ]
+        deltas = {}
+        for counter in DELTA_COUNTERS:
+            baseline_values = np.array(
+                [getattr(baseline, counter) for _, (baseline, _) in measured]
+            )
+            latest_values = np.array(
+                [getattr(latest, counter) for _, (_, latest) in measured]
+            )
+            deltas[counter] = np.maximum(0, latest_values - baseline_values).tolist()
+        delta_index = {hotkey: index for index, (hotkey, _) in enumerate(measured)}
+
         # Process hotkeys with telemetry data
         processed_hotkeys = set()
-        for hotkey, telemetry_list in telemetry_by_hotkey.items():
-            if len(telemetry_list) >= 2:
-                # Sort telemetry by timestamp (convert to int first)
-                sorted_telemetry = sorted(
-                    telemetry_list,
-                    key=lambda x: self._convert_timestamp_to_int(x.timestamp),
-                )
-
-                # Find baseline: start from first record, reset on any decrease
-                baseline_record = sorted_telemetry[0]
-                latest_record = sorted_telemetry[-1]
-
-                # Walk through records, reset baseline on any decrease in
-                # twitter_returned_tweets
-                for record in sorted_telemetry[1:]:
-                    if (
-                        record.twitter_returned_tweets
-                        < baseline_record.twitter_returned_tweets
-                    ):
-                        baseline_record = record  # Reset baseline to this record
-                        logger.debug(
-                            f"Reset baseline for {hotkey} at timestamp "
-                            f"{record.timestamp}"
-                        )
-
-                # Calculate simple delta from final baseline to latest
-                delta_boot_time = 0  # Not used in simple mode
-                delta_last_operation_time = 0  # Not used in simple mode
-                delta_twitter_returned_other = 0  # Not used in simple mode
+        for hotkey, records in endpoints.items():
+            if records is not None:
+                baseline_record, latest_record = records
+                index = delta_index[hotkey]
 
                 # Calculate time span for this chunk
                 # (timestamps are in seconds, convert to int first)
@@ -220,83 +348,44 @@ class WeightsManager:
                 last_timestamp = self._convert_timestamp_to_int(latest_record.timestamp)
                 total_time_span_seconds = last_timestamp - first_timestamp
 
-                delta_twitter_auth_errors = max(
-                    0,
-                    latest_record.twitter_auth_errors
-                    - baseline_record.twitter_auth_errors,
-                )
-                delta_twitter_errors = max(
-                    0, latest_record.twitter_errors - baseline_record.twitter_errors
-                )
-                delta_twitter_ratelimit_errors = max(
-                    0,
-                    latest_record.twitter_ratelimit_errors
-                    - baseline_record.twitter_ratelimit_errors,
-                )
-
-                delta_twitter_returned_profiles = max(
-                    0,
-                    latest_record.twitter_returned_profiles
-                    - baseline_record.twitter_returned_profiles,
-                )
-                delta_twitter_returned_tweets = max(
-                    0,
-                    latest_record.twitter_returned_tweets
-                    - baseline_record.twitter_returned_tweets,
-                )
-
-                delta_twitter_scrapes = max(
-                    0, latest_record.twitter_scrapes - baseline_record.twitter_scrapes
-                )
-                delta_web_errors = max(
-                    0, latest_record.web_errors - baseline_record.web_errors
-                )
-                delta_web_success = max(
-                    0, latest_record.web_success - baseline_record.web_success
-                )
-
                 # Use the latest record's data for non-delta fields
-                latest = sorted_telemetry[-1]
+                latest = latest_record
 
-                # Create delta data
+                # Create delta data, boot_time, last_operation_time and
+                # twitter_returned_other are not used in simple mode
                 delta_data = NodeData(
                     hotkey=hotkey,
                     uid=latest.uid,
                     worker_id=latest.worker_id,
                     timestamp=self._convert_timestamp_to_int(latest.timestamp),
-                    boot_time=delta_boot_time,
-                    last_operation_time=delta_last_operation_time,
+                    boot_time=0,
+                    last_operation_time=0,
                     current_time=latest.current_time,
-                    twitter_auth_errors=delta_twitter_auth_errors,
-                    twitter_errors=delta_twitter_errors,
-                    twitter_ratelimit_errors=delta_twitter_ratelimit_errors,
-                    twitter_returned_other=delta_twitter_returned_other,
-                    twitter_returned_profiles=delta_twitter_returned_profiles,
-                    twitter_returned_tweets=delta_twitter_returned_tweets,
-                    twitter_scrapes=delta_twitter_scrapes,
-                    web_errors=delta_web_errors,
-                    web_success=delta_web_success,
+                    twitter_returned_other=0,
+                    **{
+                        counter: values[index] for counter, values in deltas.items()
+                    },
                 )
 
                 # Add custom attributes for error rate calculation
                 delta_data.time_span_seconds = total_time_span_seconds
                 delta_data.total_errors = (
-                    delta_twitter_auth_errors
-                    + delta_twitter_errors
-                    + delta_twitter_ratelimit_errors
+                    delta_data.twitter_auth_errors
+                    + delta_data.twitter_errors
+                    + delta_data.twitter_ratelimit_errors
                 )
 
                 delta_node_data.append(delta_data)
                 processed_hotkeys.add(hotkey)
                 logger.debug(
-                    f"Delta for {hotkey}: tweets={delta_twitter_returned_tweets}"
+                    f"Delta for {hotkey}: tweets={delta_data.twitter_returned_tweets}"
                 )
             else:
                 logger.debug(
                     f"Not enough telemetry data for {hotkey} to calculate deltas"
                 )
                 # Find UID for this hotkey
-                uid = next((uid for uid, hk in all_hotkeys if hk == hotkey), 0)
+                uid = metagraph_index.uid(hotkey, 0)
                 # Add empty telemetry for hotkeys with insufficient data
                 delta_data = NodeData(
                     hotkey=hotkey,
@@ -324,7 +413,7 @@ class WeightsManager:
                 processed_hotkeys.add(hotkey)
 
         # Add empty telemetry for hotkeys without any telemetry data
-        for uid, hotkey in all_hotkeys:
+        for uid, hotkey in metagraph_index.items():
             if hotkey not in processed_hotkeys:
                 logger.debug(f"Adding empty telemetry for {hotkey} (uid: {uid})")
                 delta_data = NodeData(
@@ -355,14 +444,20 @@ class WeightsManager:
         return delta_node_data
 
     async def calculate_weights(
-        self, delta_node_data: List[NodeData], simulation: bool = False
+        self,
+        delta_node_data: List[NodeData],
+        simulation: bool = False,
+        components: Optional[dict] = None,
     ) -> Tuple[List[int], List[float]]:
         """
         Calculate weights for nodes based on their twitter_returned_tweets
         and error rate per hour using configurable weights and a kurtosis curve.
+        Only computes, score reports are sent by get_scores.
 
         :param delta_node_data: List of NodeData objects with delta values
         :param simulation: Whether this is a simulation run
+        :param components: Dict filled with hotkey -> the parts of its score,
+                           if given
         :return: A tuple containing a list of node IDs and their corresponding
                  weights.
         """
@@ -464,12 +559,13 @@ class WeightsManager:
 
         # Calculate combined score
         logger.debug("Calculating combined scores for each node")
+        hotkey_to_uid = self.validator.metagraph_manager.index.hotkey_to_uid
         for idx, node in enumerate(delta_node_data):
             try:
                 if simulation:
                     uid = node.uid
                 else:
-                    uid = self.validator.metagraph.nodes[node.hotkey].node_id
+                    uid = hotkey_to_uid[node.hotkey]
 
                 if uid is not None:
                     # First calculate the base score with configurable weights
@@ -498,6 +594,7 @@ class WeightsManager:
                         )
                     else:
                         # No penalty applied
+                        penalty_factor = 0.0
                         score = base_score
                         logger.debug(
                             f"Node {node.hotkey} (UID {uid}) score: {score:.4f} "
@@ -507,10 +604,16 @@ class WeightsManager:
                         )
 
                     miner_scores[uid] = score
-
-                    await self.validator.node_manager.send_score_report(
-                        node.hotkey, score, node
-                    )
+                    if components is not None:
+                        components[node.hotkey] = {
+                            "uid": uid,
+                            "tweets": node.twitter_returned_tweets,
+                            "error_rate_per_hour": float(error_rates_per_hour[idx]),
+                            "tweets_score": float(tweets[idx]),
+                            "error_quality_score": float(error_quality_scores[idx]),
+                            "penalty": float(penalty_factor),
+                            "score": score,
+                        }
             except KeyError:
                 logger.error(
                     f"Node with hotkey '{node.hotkey}' not found in metagraph."
@@ -528,9 +631,70 @@ class WeightsManager:
 
         return uids, weights
 
+    def _score_key(self) -> tuple:
+        """What the scores depend on, the key of the score cache."""
+        return (
+            self.validator.telemetry_storage.generation,
+            # Rebuilt on every metagraph sync
+            self.validator.metagraph_manager.index,
+            self.tweets_weight,
+            self.error_quality_weight,
+            self.error_rate_threshold,
+        )
+
+    async def get_scores(self, simulation: bool = False) -> ScoreResult:
+        """
+        Scores of the current telemetry deltas, from the score cache unless
+        telemetry, metagraph or scoring weights changed since they were
+        computed. Freshly computed scores (outside simulation) are queued as
+        score reports to the miners.
+
+        :param simulation: Whether this is a simulation run
+        :return: ScoreResult shared with other callers, don't modify it
+        """
+
+        async def compute():
+            delta_node_data = self.get_delta_node_data()
+            components = {}
+            uids, weights = await self.calculate_weights(
+                delta_node_data, simulation, components
+            )
+            if not simulation:
+                score_reports = self.validator.node_manager.score_reports
+                for node in delta_node_data:
+                    if node.hotkey in components:
+                        score_reports.submit(
+                            node.hotkey, components[node.hotkey]["score"], node
+                        )
+            return ScoreResult(uids, weights, components, delta_node_data)
+
+        return await self.score_cache.get_or_compute(
+            simulation, self._score_key(), compute
+        )
+
+    async def sweep_parameters(
+        self, grid: dict, simulation: bool = True, k: int = 10
+    ) -> SweepResult:
+        """
+        Score the current telemetry deltas with every parameter set of a
+        grid at once, see validator/score_sweep.py.
+
+        :param grid: Parameter sets from score_sweep.parameter_grid
+        :param simulation: Whether to take UIDs from the telemetry, as the
+                           score simulation does, or from the metagraph
+        :param k: Number of top UIDs for the top-k share
+        """
+        delta_node_data = (await self.get_scores(simulation)).delta_node_data
+        if simulation:
+            uids = [node.uid for node in delta_node_data]
+        else:
+            hotkey_to_uid = self.validator.metagraph_manager.index.hotkey_to_uid
+            uids = [hotkey_to_uid.get(node.hotkey) for node in delta_node_data]
+        return await asyncio.to_thread(run_sweep, delta_node_data, uids, grid, k)
+
     async def get_priority_miners_by_score(
         self,
-        delta_node_data: List[NodeData],
+        delta_node_data: Optional[List[NodeData]] = None,
         simulation: bool = False,
         list_size: int = 256,
     ) -> List[str]:
@@ -540,14 +704,19 @@ class WeightsManager:
         do random picks while maintaining probability bias towards better
         miners.
 
-        :param delta_node_data: List of NodeData objects with delta values
+        :param delta_node_data: List of NodeData objects with delta values,
+                                None for the cached scores of get_scores
         :param simulation: Whether this is a simulation run
         :param list_size: Size of the weighted list to generate (default: 100)
         :return: Weighted list of worker IP addresses where better miners
                 appear more frequently
         """
         # Get the scores from calculate_weights
-        uids, weights = await self.calculate_weights(delta_node_data, simulation)
+        if delta_node_data is None:
+            scores = await self.get_scores(simulation)
+            uids, weights = scores.uids, scores.weights
+        else:
+            uids, weights = await self.calculate_weights(delta_node_data, simulation)
 
         if not uids or not weights:
             logger.warning("No scores available for priority miners")
@@ -563,10 +732,11 @@ class WeightsManager:
 
         # Create list of (address, score) tuples for addresses that have scores
         address_scores = []
+        hotkey_to_uid = self.validator.metagraph_manager.index.hotkey_to_uid
         for hotkey, address, worker_id in addresses_with_hotkeys:
             try:
                 # Get UID for this hotkey
-                node_uid = self.validator.metagraph.nodes[hotkey].node_id
+                node_uid = hotkey_to_uid[hotkey]
                 if node_uid in uid_to_score:
                     score = uid_to_score[node_uid]
                     address_scores.append((address, score))
@@ -702,9 +872,8 @@ class WeightsManager:
 
             logger.debug("Calculating weights")
 
-            telemetry = self.validator.telemetry_storage.get_all_telemetry()
-            data_to_score = self._get_delta_node_data(telemetry)
-            uids, scores = await self.calculate_weights(data_to_score)
+            result = await self.get_scores()
+            uids, scores = list(result.uids), list(result.weights)
 
             for attempt in range(3):
                 logger.info(f"Setting weights attempt {attempt + 1}/3")
@@ -746,7 +915,7 @@ class WeightsManager:
                                     ),
                                     "attempts": attempt + 1,
                                     "validator_node_id": validator_node_id,
-                                    "total_nodes_scored": len(data_to_score),
+                                    "total_nodes_scored": len(result.delta_node_data),
                                 },
                             )
                             process_monitor.end_process(execution_id)
@@ -791,9 +960,7 @@ class WeightsManager:
                         ),
                         "attempts": 3,
                         "validator_node_id": validator_node_id,
-                        "total_nodes_scored": (
-                            len(data_to_score) if data_to_score else 0
-                        ),
+                        "total_nodes_scored": len(result.delta_node_data),
                     },
                 )
                 process_monitor.end_process(execution_id)